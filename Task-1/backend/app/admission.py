@@ -0,0 +1,200 @@
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Tuple
+
+from fastapi import Depends, HTTPException, status
+
+from app.auth import get_current_user
+from app.metrics import Metrics, get_metrics
+from app.models import User, UserRole
+
+# Lower values are admitted first
+PRIORITY_OVERRIDE = 0
+PRIORITY_SELF_SERVICE = 1
+
+# Roles whose writes (overrides for other users, user administration) go first
+OVERRIDE_ROLES = {UserRole.ADMIN.value, UserRole.TEAM_LEAD.value}
+
+PRIORITY_NAMES = {PRIORITY_OVERRIDE: "override", PRIORITY_SELF_SERVICE: "self_service"}
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of admitted."""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Too many concurrent writes ({reason})")
+        self.reason = reason
+
+
+class AdmissionController:
+    """
+    Concurrency limit with a bounded priority queue in front of it.
+    
+    Up to max_concurrent requests run at once. Further requests wait,
+    highest priority first and in arrival order within a priority, until a
+    slot frees up or queue_timeout passes. When the queue is full, a request
+    that outranks the lowest-priority waiter takes its place (the newest
+    such waiter is shed); otherwise the request itself is shed. Shed
+    requests are answered right away instead of adding to the latency of
+    everyone behind them.
+    
+    Counters and gauges (in Metrics), per controller name:
+        admission.<name>.admitted.<priority>: requests that got a slot
+        admission.<name>.shed.<priority>: requests rejected, queue full
+        admission.<name>.timed_out.<priority>: requests rejected after waiting queue_timeout
+        admission.<name>.in_flight, .queue_depth: current values
+        admission.<name>.queue_depth_peak: highest queue depth seen
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int,
+        max_queue: int,
+        queue_timeout: float,
+        metrics: Metrics
+    ):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.metrics = metrics
+        self._in_flight = 0
+        self._waiters: List[Tuple[int, int, "asyncio.Future[None]"]] = []
+        self._order = itertools.count()
+        self._peak = 0
+
+    @asynccontextmanager
+    async def admit(self, priority: int) -> AsyncIterator[None]:
+        """
+        Hold a slot for the duration of the block.
+        
+        Raises:
+            Overloaded: If the request is shed
+        """
+        if self.max_concurrent <= 0:
+            yield
+            return
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: int) -> None:
+        if self._in_flight < self.max_concurrent and not self._waiters:
+            self._in_flight += 1
+            self._count("admitted", priority)
+            self._update_gauges()
+            return
+        
+        if len(self._waiters) >= self.max_queue:
+            lowest = max(self._waiters, default=None)
+            if lowest is None or lowest[0] <= priority:
+                self._count("shed", priority)
+                raise Overloaded("queue full")
+            self._waiters.remove(lowest)
+            heapq.heapify(self._waiters)
+            self._count("shed", lowest[0])
+            lowest[2].set_exception(Overloaded("displaced by a higher-priority request"))
+        
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._order), future)
+        heapq.heappush(self._waiters, entry)
+        self._update_gauges()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not self._granted(future):
+                self._forget(entry)
+                self._count("timed_out", priority)
+                raise Overloaded("queue timeout")
+        except asyncio.CancelledError:
+            # The client went away; pass on a slot that was handed over meanwhile
+            if self._granted(future):
+                self._release()
+            else:
+                self._forget(entry)
+            raise
+        self._count("admitted", priority)
+
+    def _granted(self, future: "asyncio.Future[None]") -> bool:
+        return future.done() and not future.cancelled() and future.exception() is None
+
+    def _forget(self, entry: Tuple[int, int, "asyncio.Future[None]"]) -> None:
+        entry[2].cancel()
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+        self._update_gauges()
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next waiter, so arrivals cannot jump the queue
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                self._update_gauges()
+                return
+        self._in_flight -= 1
+        self._update_gauges()
+
+    def _count(self, event: str, priority: int) -> None:
+        self.metrics.increment(f"admission.{self.name}.{event}.{PRIORITY_NAMES.get(priority, priority)}")
+
+    def _update_gauges(self) -> None:
+        depth = len(self._waiters)
+        self.metrics.set(f"admission.{self.name}.in_flight", self._in_flight)
+        self.metrics.set(f"admission.{self.name}.queue_depth", depth)
+        if depth > self._peak:
+            self._peak = depth
+            self.metrics.set(f"admission.{self.name}.queue_depth_peak", depth)
+
+
+@asynccontextmanager
+async def admitted(controller: AdmissionController, priority: int) -> AsyncIterator[None]:
+    """Hold an admission slot for a request, answering 503 with Retry-After if shed."""
+    from app.config import WRITE_RETRY_AFTER_SECONDS
+    
+    try:
+        async with controller.admit(priority):
+            yield
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{e}. Please retry shortly",
+            headers={"Retry-After": str(WRITE_RETRY_AFTER_SECONDS)}
+        )
+
+
+def write_priority(user: User) -> int:
+    """Admin and Team Lead writes are admitted before everyone else's."""
+    return PRIORITY_OVERRIDE if user.role in OVERRIDE_ROLES else PRIORITY_SELF_SERVICE
+
+
+async def admit_write(current_user: User = Depends(get_current_user)) -> AsyncIterator[None]:
+    """
+    Dependency: admission for a write, prioritized by the verified caller's
+    role. Authentication runs first, so a request that will be rejected with
+    401 never takes a slot or an override priority; list role checks before
+    it in a route's dependencies for the same with 403.
+    """
+    async with admitted(get_write_admission(), write_priority(current_user)):
+        yield
+
+
+_shared_write_admission: Optional[AdmissionController] = None
+
+
+def get_write_admission() -> AdmissionController:
+    """Get the process-wide controller for participation and registration writes."""
+    from app.config import WRITE_MAX_CONCURRENCY, WRITE_MAX_QUEUE, WRITE_QUEUE_TIMEOUT_SECONDS
+    
+    global _shared_write_admission
+    if _shared_write_admission is None:
+        _shared_write_admission = AdmissionController(
+            "writes", WRITE_MAX_CONCURRENCY, WRITE_MAX_QUEUE, WRITE_QUEUE_TIMEOUT_SECONDS, get_metrics()
+        )
+    return _shared_write_admission
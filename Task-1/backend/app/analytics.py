@@ -0,0 +1,272 @@
+from datetime import date as Date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.db import AsyncJSONStorage, get_async_storage
+from app.headcount_snapshots import MEAL_TYPES, team_key
+from app.intervals import date_range, from_ordinal, to_ordinal
+from app.metrics import Metrics, get_metrics
+from app.models import MEALS_UNAVAILABLE_DAY_TYPES
+from app.repository import Repository, get_repository
+from app.single_flight import SingleFlight
+from app.work_calendar import SPECIAL_DAYS_FILE, WorkCalendar, get_work_calendar
+
+# numpy is imported inside the functions that use it to keep worker start-up fast.
+
+# Recent history the opt-in trend is fitted on
+TREND_WINDOW_DAYS = 56
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+class ParticipationCube:
+    """
+    Participation as a dense boolean array of users x days x meals.
+    
+    Days without a stored record hold the default (opted in). available
+    marks the days on which meals are served.
+    """
+
+    def __init__(
+        self,
+        user_ids: List[int],
+        team_ids: List[Optional[int]],
+        start: str,
+        opted_in: Any,
+        available: Any
+    ):
+        self.user_ids = user_ids
+        self.team_ids = team_ids
+        self.start = start
+        self.opted_in = opted_in
+        self.available = available
+
+    @property
+    def num_days(self) -> int:
+        return self.opted_in.shape[1]
+
+    def day_index(self, date: str) -> int:
+        return to_ordinal(date) - to_ordinal(self.start)
+
+
+def build_participation_cube(
+    users_data: Sequence[Dict],
+    participation_by_date: Dict[str, Dict[int, Dict]],
+    calendar_days: Dict[str, Dict[str, Any]],
+    start: str,
+    end: str
+) -> ParticipationCube:
+    """Fill a ParticipationCube for [start, end] from the by-date participation index."""
+    import numpy as np
+    
+    dates = list(date_range(start, end))
+    rows = {user_dict.get("id"): i for i, user_dict in enumerate(users_data)}
+    opted_in = np.ones((len(users_data), len(dates), len(MEAL_TYPES)), dtype=bool)
+    
+    user_index: List[int] = []
+    day_index: List[int] = []
+    meal_rows: List[List[bool]] = []
+    for day, date in enumerate(dates):
+        for user_id, record in participation_by_date.get(date, {}).items():
+            row = rows.get(user_id)
+            if row is None:
+                continue
+            meals = record.get("meals", {})
+            user_index.append(row)
+            day_index.append(day)
+            meal_rows.append([bool(meals.get(meal_type, False)) for meal_type in MEAL_TYPES])
+    if meal_rows:
+        opted_in[user_index, day_index] = np.array(meal_rows, dtype=bool)
+    
+    available = np.ones(len(dates), dtype=bool)
+    for date, calendar_day in calendar_days.items():
+        special_day = calendar_day.get("special_day")
+        if special_day is not None and special_day.get("day_type") in MEALS_UNAVAILABLE_DAY_TYPES:
+            available[to_ordinal(date) - to_ordinal(start)] = False
+    
+    return ParticipationCube(
+        [user_dict.get("id") for user_dict in users_data],
+        [user_dict.get("team_id") for user_dict in users_data],
+        start,
+        opted_in,
+        available
+    )
+
+
+def join_cubes(earlier: ParticipationCube, later: ParticipationCube) -> ParticipationCube:
+    """Concatenate two cubes over the same users and consecutive date ranges."""
+    import numpy as np
+    
+    return ParticipationCube(
+        earlier.user_ids,
+        earlier.team_ids,
+        earlier.start,
+        np.concatenate((earlier.opted_in, later.opted_in), axis=1),
+        np.concatenate((earlier.available, later.available))
+    )
+
+
+def analyze(cube: ParticipationCube, today: str) -> Dict[str, Any]:
+    """
+    Opt-in rates, weekday seasonality and a forecast from a cube covering
+    history up to today and the days to forecast after it.
+    
+    The forecast for a meal is a linear trend of the deseasonalized daily
+    opt-in rate over the last TREND_WINDOW_DAYS available days, times the
+    target weekday's factor. It never exceeds the opt-ins already registered
+    for the date, since stored opt-outs are known.
+    """
+    import numpy as np
+    
+    today_index = cube.day_index(today)
+    history = cube.opted_in[:, :today_index + 1]
+    history_available = cube.available[:today_index + 1]
+    num_users = cube.opted_in.shape[0]
+    
+    start_ordinal = to_ordinal(cube.start)
+    weekdays = (np.arange(cube.num_days) + Date.fromordinal(start_ordinal).weekday()) % 7
+    history_weekdays = weekdays[:today_index + 1]
+    
+    # Per day and meal: share of users opted in (days x meals)
+    daily_rates = history.mean(axis=0) if num_users else np.zeros(history.shape[1:])
+    available_rates = daily_rates[history_available]
+    meal_rates = available_rates.mean(axis=0) if len(available_rates) else np.zeros(len(MEAL_TYPES))
+    
+    # Per team and meal: opt-ins over available days / (team size x available days)
+    team_keys = sorted({team_key(team_id) for team_id in cube.team_ids})
+    team_position = {key: i for i, key in enumerate(team_keys)}
+    team_index = np.array([team_position[team_key(team_id)] for team_id in cube.team_ids], dtype=np.intp)
+    team_sizes = np.bincount(team_index, minlength=len(team_keys))
+    user_opt_ins = history[:, history_available].sum(axis=1)  # users x meals
+    team_opt_ins = np.stack(
+        [np.bincount(team_index, weights=user_opt_ins[:, m], minlength=len(team_keys)) for m in range(len(MEAL_TYPES))],
+        axis=1
+    ) if num_users else np.zeros((0, len(MEAL_TYPES)))
+    available_days = int(history_available.sum())
+    team_rates = team_opt_ins / np.maximum(team_sizes[:, None] * available_days, 1)
+    
+    # Weekday factor: mean rate on that weekday / mean rate overall
+    weekday_counts = np.bincount(history_weekdays[history_available], minlength=7)
+    weekday_sums = np.stack(
+        [np.bincount(history_weekdays[history_available], weights=available_rates[:, m], minlength=7) for m in range(len(MEAL_TYPES))],
+        axis=1
+    )
+    weekday_rates = np.divide(weekday_sums, weekday_counts[:, None], out=np.tile(meal_rates, (7, 1)), where=weekday_counts[:, None] > 0)
+    weekday_factors = np.divide(weekday_rates, meal_rates, out=np.ones_like(weekday_rates), where=meal_rates > 0)
+    
+    # Trend over the most recent available days, on deseasonalized rates
+    recent = np.flatnonzero(history_available)[-TREND_WINDOW_DAYS:]
+    recent_factors = weekday_factors[history_weekdays[recent]]
+    deseasonalized = np.divide(daily_rates[recent], recent_factors, out=daily_rates[recent].copy(), where=recent_factors > 0)
+    if len(recent) >= 2:
+        slopes, intercepts = np.polyfit(recent.astype(float), deseasonalized, 1)
+    else:
+        slopes = np.zeros(len(MEAL_TYPES))
+        intercepts = deseasonalized[0] if len(recent) else meal_rates
+    
+    forecast = []
+    for day in range(today_index + 1, cube.num_days):
+        registered = cube.opted_in[:, day].sum(axis=0)
+        if not cube.available[day]:
+            predicted = np.zeros(len(MEAL_TYPES), dtype=int)
+            registered = np.zeros(len(MEAL_TYPES), dtype=int)
+        else:
+            rate = np.clip((intercepts + slopes * day) * weekday_factors[weekdays[day]], 0.0, 1.0)
+            predicted = np.minimum(np.rint(rate * num_users).astype(int), registered)
+        forecast.append({
+            "date": from_ordinal(start_ordinal + day),
+            "meals_available": bool(cube.available[day]),
+            "meals": {
+                meal_type: {"registered": int(registered[m]), "forecast": int(predicted[m])}
+                for m, meal_type in enumerate(MEAL_TYPES)
+            },
+        })
+    
+    teams_by_key = {team_key(team_id): team_id for team_id in cube.team_ids}
+    return {
+        "date": today,
+        "history_start": cube.start,
+        "history_days": today_index + 1,
+        "total_employees": num_users,
+        "meal_rates": {meal_type: round(float(meal_rates[m]), 4) for m, meal_type in enumerate(MEAL_TYPES)},
+        "teams": [
+            {
+                "team_id": teams_by_key[key],
+                "total_employees": int(team_sizes[i]),
+                "meal_rates": {meal_type: round(float(team_rates[i, m]), 4) for m, meal_type in enumerate(MEAL_TYPES)},
+            }
+            for i, key in enumerate(team_keys)
+        ],
+        "weekday_factors": {
+            meal_type: {WEEKDAYS[weekday]: round(float(weekday_factors[weekday, m]), 4) for weekday in range(7)}
+            for m, meal_type in enumerate(MEAL_TYPES)
+        },
+        "forecast": forecast,
+    }
+
+
+class Analytics:
+    """
+    Historical participation analytics and headcount forecasts.
+    
+    The cube is built in two parts. Past days only change through manual
+    edits, so their part is built once per day, user list and calendar
+    version. Today and the forecast window are rebuilt for each version of
+    participation.json; that is a few days of data, whatever the history
+    length. Building and analysis run on a worker thread; concurrent
+    identical requests share one run.
+    """
+    
+    def __init__(
+        self,
+        storage: AsyncJSONStorage,
+        repository: Repository,
+        work_calendar: WorkCalendar,
+        metrics: Metrics
+    ):
+        self.storage = storage
+        self.repository = repository
+        self.work_calendar = work_calendar
+        self._flight = SingleFlight("headcount_forecast", metrics)
+        self._history: Optional[Tuple[Tuple, ParticipationCube]] = None
+
+    async def forecast(self, today: str, history_days: int, horizon: int) -> Dict[str, Any]:
+        """Analyze history_days up to today and forecast horizon days after it."""
+        start = from_ordinal(to_ordinal(today) - history_days + 1)
+        yesterday = from_ordinal(to_ordinal(today) - 1)
+        end = from_ordinal(to_ordinal(today) + horizon)
+        users_version, participation_version, calendar_version = await self.storage.stamps(
+            "users.json", "participation.json", SPECIAL_DAYS_FILE
+        )
+        history_key = (users_version, calendar_version, start, yesterday)
+        
+        async def compute() -> Dict[str, Any]:
+            users_data = await self.storage.read_users_cached()
+            participation_by_date = await self.repository.participation_by_date()
+            calendar_days = (await self.work_calendar.view()).resolve(start, end)
+            
+            def run() -> Dict[str, Any]:
+                cached = self._history
+                if cached is not None and cached[0] == history_key:
+                    history = cached[1]
+                else:
+                    history = build_participation_cube(users_data, participation_by_date, calendar_days, start, yesterday)
+                    self._history = (history_key, history)
+                upcoming = build_participation_cube(users_data, participation_by_date, calendar_days, today, end)
+                return analyze(join_cubes(history, upcoming), today)
+            
+            return await run_in_threadpool(run)
+        
+        return await self._flight.do((history_key, participation_version, end), compute)
+
+
+_shared_analytics: Optional[Analytics] = None
+
+
+def get_analytics() -> Analytics:
+    """Get the process-wide Analytics instance."""
+    global _shared_analytics
+    if _shared_analytics is None:
+        _shared_analytics = Analytics(get_async_storage(), get_repository(), get_work_calendar(), get_metrics())
+    return _shared_analytics
@@ -2,17 +2,22 @@ from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
-import bcrypt
 from pydantic import BaseModel
 
+from app.metrics import get_metrics
 from app.models import User, UserRole
-from app.db import JSONStorage
-from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_HOURS
+from app.repository import get_repository
+from app.user_versions import get_user_versions
+from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_HOURS, STATELESS_AUTH
+
+# jose (with cryptography) and bcrypt are imported inside the functions that
+# use them to keep worker start-up fast.
 
 security = HTTPBearer()
 
-storage = JSONStorage()
+repository = get_repository()
+user_versions = get_user_versions()
+metrics = get_metrics()
 
 
 class Token(BaseModel):
@@ -26,6 +31,8 @@ class TokenData(BaseModel):
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt."""
+    import bcrypt
+    
     salt = bcrypt.gensalt()
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
@@ -33,10 +40,20 @@ def hash_password(password: str) -> str:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a bcrypt hash."""
+    import bcrypt
+    
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 
+def preload_backends() -> None:
+    """Import the bcrypt and JWT backends ahead of the first login."""
+    import bcrypt  # noqa: F401
+    from jose import jwt  # noqa: F401
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    from jose import jwt
+    
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -48,7 +65,19 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def token_claims(user: User) -> dict:
+    """
+    Claims for a user's access token: the username, plus id, role, team_id and
+    user version when stateless auth is enabled.
+    """
+    if not STATELESS_AUTH:
+        return {"sub": user.username}
+    return {"sub": user.username, "uid": user.id, "role": user.role, "team_id": user.team_id, "uv": user.version}
+
+
 def decode_token(token: str) -> Optional[dict]:
+    from jose import JWTError, jwt
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
@@ -59,6 +88,14 @@ def decode_token(token: str) -> Optional[dict]:
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> User:
+    """
+    Resolve the bearer token to the current user.
+    
+    With stateless auth, a token whose user version is still current is
+    trusted as is: the user is built from its claims and only id, username,
+    role, team_id and version are set. Tokens without claims, or from before
+    a role or team change, fall back to looking the user up by username.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -75,17 +112,21 @@ async def get_current_user(
     if username is None:
         raise credentials_exception
     
-    users_data = storage.read_users()
-    user_dict = None
-    for user_data in users_data:
-        if user_data.get("username") == username:
-            user_dict = user_data
-            break
+    user_id = payload.get("uid")
+    if STATELESS_AUTH and user_id is not None:
+        version = payload.get("uv")
+        if version is not None and await user_versions.get(user_id) == version:
+            metrics.increment("auth.stateless")
+            return User.model_construct(
+                id=user_id, username=username, role=payload.get("role"), team_id=payload.get("team_id"), version=version
+            )
     
-    if user_dict is None:
+    metrics.increment("auth.lookups")
+    user = await repository.get_user_by_username(username)
+    if user is None:
         raise credentials_exception
     
-    return User(**user_dict)
+    return user
 
 
 async def require_admin(current_user: User = Depends(get_current_user)) -> User:
@@ -10,6 +10,12 @@ if not SECRET_KEY:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 8
 
+# Put id, role, team_id and the user version in access tokens and authorize from
+# the token alone while the version is current (see app/user_versions.py). Role
+# and team changes reach other workers within REVALIDATE seconds.
+STATELESS_AUTH = os.getenv("MHP_STATELESS_AUTH", "false").lower() in ("1", "true", "yes")
+STATELESS_AUTH_REVALIDATE_SECONDS = float(os.getenv("MHP_STATELESS_AUTH_REVALIDATE_SECONDS", "1.0"))
+
 API_TITLE = "Meal Headcount Planner API"
 API_DESCRIPTION = "API for managing meal headcounts and planning"
 API_VERSION = "1.0.0"
@@ -21,3 +27,36 @@ CORS_ALLOW_HEADERS = ["*"]
 
 UVICORN_HOST = "127.0.0.1"
 UVICORN_PORT = 8000
+
+# Preload and index data files before the app starts accepting requests
+WARMUP_ON_STARTUP = os.getenv("MHP_WARMUP_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+
+# fsync policy for storage writes: none / batched / always (see app/db.py)
+STORAGE_DURABILITY = os.getenv("MHP_STORAGE_DURABILITY", "batched")
+STORAGE_FSYNC_INTERVAL_SECONDS = float(os.getenv("MHP_STORAGE_FSYNC_INTERVAL_SECONDS", "1.0"))
+
+# On-disk format of data files: pretty / compact / ndjson / columnar (see app/storage_formats.py)
+STORAGE_FORMAT = os.getenv("MHP_STORAGE_FORMAT", "pretty")
+
+# Data files at least this large get a binary sidecar for fast loading (-1: never)
+STORAGE_SIDECAR_MIN_BYTES = int(os.getenv("MHP_STORAGE_SIDECAR_MIN_BYTES", str(1024 * 1024)))
+
+# Participation for a date locks at this hour (24h clock) on the previous day
+CUTOFF_HOUR = int(os.getenv("MHP_CUTOFF_HOUR", "21"))
+
+# Freeze headcounts at cutoff in a background job
+ROLLOVER_JOB_ENABLED = os.getenv("MHP_ROLLOVER_JOB_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Serve per-request user and participation lookups from a lookup table one
+# worker publishes in shared memory (see app/shared_dataset.py). Workers still
+# keep their own snapshots for everything else, so this does not save memory.
+SHARED_DATASET_ENABLED = os.getenv("MHP_SHARED_DATASET", "false").lower() in ("1", "true", "yes")
+SHARED_DATASET_PUBLISH_INTERVAL_SECONDS = float(os.getenv("MHP_SHARED_DATASET_PUBLISH_INTERVAL_SECONDS", "0.5"))
+
+# Admission control for participation and registration writes (see app/admission.py).
+# At most MAX_CONCURRENCY run at once per worker (0: no limit); up to MAX_QUEUE wait
+# for at most QUEUE_TIMEOUT seconds, the rest get 503 with Retry-After.
+WRITE_MAX_CONCURRENCY = int(os.getenv("MHP_WRITE_MAX_CONCURRENCY", "32"))
+WRITE_MAX_QUEUE = int(os.getenv("MHP_WRITE_MAX_QUEUE", "256"))
+WRITE_QUEUE_TIMEOUT_SECONDS = float(os.getenv("MHP_WRITE_QUEUE_TIMEOUT_SECONDS", "5.0"))
+WRITE_RETRY_AFTER_SECONDS = int(os.getenv("MHP_WRITE_RETRY_AFTER_SECONDS", "2"))
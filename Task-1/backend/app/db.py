@@ -1,11 +1,80 @@
-import json
+import asyncio
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
-from typing import Any, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
 import tempfile
 import time
 import threading
 
+from app.snapshot_sidecar import read_sidecar, source_key, write_sidecar
+from app.storage_formats import STORAGE_FORMATS, dump_records, parse_records
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, only in-process locking
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# fsync policies for atomic writes:
+#   none    - no fsync; fastest, a power loss can leave an empty or stale file
+#   batched - fsync each temp file before the rename, fsync the directory at
+#             most once per interval in the background; a power loss can only
+#             roll back to an earlier complete version
+#   always  - fsync the file and the directory on every write
+DURABILITY_MODES = ("none", "batched", "always")
+
+# Buffer for streaming a data file into its temporary file
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+# Data files at least this large get a binary sidecar (see app/snapshot_sidecar.py)
+SIDECAR_MIN_BYTES = 1024 * 1024
+
+# Sidecars of written files are refreshed in the background this long after
+# the write, so a burst of writes to a file refreshes its sidecar once
+SIDECAR_REFRESH_DELAY_SECONDS = 1.0
+
+
+class Snapshot:
+    """
+    Immutable view of one data file at one version.
+    
+    Records are shared by every reader of the snapshot and must not be
+    mutated. Indexes derived from the records can be memoized on the snapshot
+    with derive(); they live exactly as long as the version they describe.
+    """
+    
+    __slots__ = ("filename", "stamp", "records", "_derived", "_derive_lock")
+    
+    def __init__(self, filename: str, stamp: Tuple[int, ...], records: Tuple[Any, ...]):
+        self.filename = filename
+        self.stamp = stamp
+        self.records = records
+        self._derived: Dict[str, Any] = {}
+        self._derive_lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        """The file's version number when this snapshot was taken."""
+        return self.stamp[0]
+
+    def derive(self, name: str, builder: Callable[[Tuple[Any, ...]], T]) -> T:
+        """Build (once) and return a structure derived from the records."""
+        derived = self._derived.get(name)
+        if derived is None:
+            with self._derive_lock:
+                derived = self._derived.get(name)
+                if derived is None:
+                    derived = builder(self.records)
+                    self._derived[name] = derived
+        return derived
+
 
 class JSONStorage:
     """
@@ -14,14 +83,47 @@ class JSONStorage:
     This class provides a robust way to read and write JSON files with the following features:
     - Atomic writes to prevent data corruption
     - Thread-safe operations using locks
+    - Cross-process locking (fcntl advisory locks) so several uvicorn workers
+      can share the data directory
+    - Read-modify-write transactions
+    - Per-file version stamps, bumped on every write by any process
     - Retry mechanism for Windows file locking issues
     - Automatic directory creation
+    - Immutable, versioned snapshots for lock-free readers; writers build the
+      next version copy-on-write and swap it in
+    - Configurable durability (see DURABILITY_MODES) and file format (see
+      STORAGE_FORMATS; every format is recognized when reading)
+    - Binary sidecars of the parsed records for large files, loaded instead
+      of parsing the JSON while it is unchanged (sidecar_min_bytes=None
+      disables them); refreshed off the write path
     """
     
-    def __init__(self, base_dir: str = "data"):
+    def __init__(
+        self,
+        base_dir: str = "data",
+        durability: str = "none",
+        fsync_interval: float = 1.0,
+        file_format: str = "pretty",
+        sidecar_min_bytes: Optional[int] = SIDECAR_MIN_BYTES
+    ):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Invalid durability mode: {durability}. Valid modes are: {', '.join(DURABILITY_MODES)}")
+        if file_format not in STORAGE_FORMATS:
+            raise ValueError(f"Invalid storage format: {file_format}. Valid formats are: {', '.join(STORAGE_FORMATS)}")
         self.base_dir = Path(base_dir)
+        self.durability = durability
+        self.fsync_interval = fsync_interval
+        self.file_format = file_format
+        self.sidecar_min_bytes = sidecar_min_bytes
         self._ensure_directory_exists()
         self._lock = threading.Lock()
+        self._directory_dirty = False
+        self._flusher: Optional[threading.Thread] = None
+        self._pending_sidecars: Dict[Path, Tuple[os.stat_result, Tuple[Any, ...]]] = {}
+        self._sidecar_writer: Optional[threading.Thread] = None
+        self._file_locks: Dict[str, threading.Lock] = {}
+        self._lock_fds: Dict[str, int] = {}
+        self._snapshots: Dict[str, Snapshot] = {}
 
     def _ensure_directory_exists(self) -> None:
         """Create the data directory if it doesn't exist."""
@@ -31,6 +133,87 @@ class JSONStorage:
         """Get the full path for a given filename."""
         return self.base_dir / filename
 
+    def _lock_fd(self, filename: str) -> int:
+        """
+        Get the open descriptor of the lock file that guards a data file.
+        
+        The lock file holds the advisory lock and the file's version number.
+        """
+        fd = self._lock_fds.get(filename)
+        if fd is None:
+            with self._lock:
+                fd = self._lock_fds.get(filename)
+                if fd is None:
+                    lock_path = self.base_dir / f".{filename}.lock"
+                    fd = os.open(str(lock_path), os.O_RDWR | os.O_CREAT, 0o644)
+                    # The fd is published last: a thread that sees it takes the fast path
+                    # above and then looks up the threading lock
+                    self._file_locks[filename] = threading.Lock()
+                    self._lock_fds[filename] = fd
+        return fd
+
+    def version(self, filename: str) -> int:
+        """
+        Get the version number of a data file.
+        
+        Every write through JSONStorage, from any process, increments it.
+        """
+        fd = self._lock_fd(filename)
+        if hasattr(os, "pread"):
+            raw = os.pread(fd, 32, 0)
+        else:
+            with self._file_locks[filename]:
+                os.lseek(fd, 0, os.SEEK_SET)
+                raw = os.read(fd, 32)
+        return int(raw) if raw.strip() else 0
+
+    def _bump_version(self, filename: str) -> int:
+        """Increment the version number; caller must hold the file lock."""
+        fd = self._lock_fd(filename)
+        new_version = self.version(filename) + 1
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, b"%20d" % new_version)
+        return new_version
+
+    @contextmanager
+    def _file_lock(self, filename: str) -> Iterator[None]:
+        """
+        Hold the exclusive lock for a data file.
+        
+        A threading lock serializes threads of this process; an fcntl advisory
+        lock on the lock file serializes other processes.
+        """
+        fd = self._lock_fd(filename)
+        with self._file_locks[filename]:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+
+    @contextmanager
+    def locked(self, filename: str) -> Iterator[None]:
+        """
+        Hold a data file's exclusive lock without writing it.
+        
+        For reading other files consistently with it: no transaction on the
+        file can be half done while the lock is held.
+        """
+        with self._file_lock(filename):
+            yield
+
+    def _stamp(self, filename: str, stat_result: os.stat_result) -> Tuple[int, ...]:
+        """
+        Identify the current contents of a data file.
+        
+        The version number catches writes by other workers; the stat fields
+        also catch edits made outside JSONStorage (os.replace gives every
+        atomic write a new inode).
+        """
+        return (self.version(filename), stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino)
+
     def _initialize_file_if_missing(self, file_path: Path) -> None:
         """Create an empty JSON file if it doesn't exist."""
         if not file_path.exists():
@@ -48,6 +231,9 @@ class JSONStorage:
         On Windows, file locking can cause PermissionError when replacing files.
         This method implements exponential backoff retry logic to handle these cases.
         
+        The data is serialized in the storage's file_format, streaming into
+        the temporary file.
+        
         Args:
             file_path: The target file path to write to
             data: The data to write (must be JSON serializable)
@@ -63,8 +249,11 @@ class JSONStorage:
         )
         
         try:
-            with os.fdopen(temp_fd, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            with os.fdopen(temp_fd, 'wb', buffering=WRITE_BUFFER_BYTES) as f:
+                dump_records(data, f, self.file_format)
+                if self.durability != "none":
+                    f.flush()
+                    os.fsync(f.fileno())
             
             max_retries = 5
             retry_delay = 0.1
@@ -87,11 +276,55 @@ class JSONStorage:
             except OSError:
                 pass
             raise
+        
+        if self.durability == "always":
+            self._fsync_directory()
+        elif self.durability == "batched":
+            self._schedule_directory_sync()
+
+    def _fsync_directory(self) -> None:
+        """Persist renames in the data directory (not supported on Windows)."""
+        if os.name == "nt":
+            return
+        dir_fd = os.open(str(self.base_dir), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def _schedule_directory_sync(self) -> None:
+        """Mark the directory for the next background fsync (batched mode)."""
+        with self._lock:
+            self._directory_dirty = True
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="storage-fsync", daemon=True)
+                self._flusher.start()
 
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(self.fsync_interval)
+            try:
+                self.flush()
+            except OSError:
+                # Keep the thread alive: the directory stays dirty and is retried
+                logger.exception("Syncing the data directory failed")
+
+    def flush(self) -> None:
+        """Make every completed write durable now (batched mode)."""
+        with self._lock:
+            dirty = self._directory_dirty
+            self._directory_dirty = False
+        if dirty:
+            try:
+                self._fsync_directory()
+            except OSError:
+                with self._lock:
+                    self._directory_dirty = True
+                raise
 
     def read(self, filename: str) -> List[Any]:
         """
-        Read and parse JSON data from a file.
+        Read and parse JSON data from a file (in any of STORAGE_FORMATS).
         
         Args:
             filename: The name of the file to read
@@ -102,8 +335,8 @@ class JSONStorage:
         file_path = self._get_file_path(filename)
         self._initialize_file_if_missing(file_path)
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(file_path, 'rb') as f:
+            return parse_records(f.read())
 
     def write(self, filename: str, data: List[Any]) -> None:
         """
@@ -116,14 +349,221 @@ class JSONStorage:
             filename: The name of the file to write to
             data: The data to write (must be JSON serializable)
         """
+        with self._file_lock(filename):
+            self._write_locked(filename, data)
+
+    def _write_locked(self, filename: str, data: List[Any]) -> Snapshot:
+        """
+        Write a data file, bump its version and publish it as the new snapshot.
+        
+        Caller must hold the file lock.
+        """
         file_path = self._get_file_path(filename)
+        self._write_atomic(file_path, data)
+        self._bump_version(filename)
+        stat_result = os.stat(file_path)
+        snapshot = Snapshot(filename, self._stamp(filename, stat_result), tuple(data))
+        self._publish(snapshot)
+        if self._wants_sidecar(stat_result):
+            self._schedule_sidecar(file_path, stat_result, snapshot.records)
+        return snapshot
+
+    def _wants_sidecar(self, stat_result: os.stat_result) -> bool:
+        return self.sidecar_min_bytes is not None and stat_result.st_size >= self.sidecar_min_bytes
+
+    def _schedule_sidecar(self, file_path: Path, stat_result: os.stat_result, records: Tuple[Any, ...]) -> None:
+        """
+        Queue a written file's sidecar for the background writer.
+        
+        Marshalling a large file takes about as long as writing its JSON, so
+        it is kept out of the write and its lock. Until the refresh, the old
+        sidecar no longer matches the file and cold reads parse the JSON.
+        """
         with self._lock:
-            self._write_atomic(file_path, data)
+            self._pending_sidecars[file_path] = (stat_result, records)
+            if self._sidecar_writer is None:
+                self._sidecar_writer = threading.Thread(target=self._sidecar_loop, name="storage-sidecar", daemon=True)
+                self._sidecar_writer.start()
+
+    def _sidecar_loop(self) -> None:
+        while True:
+            time.sleep(SIDECAR_REFRESH_DELAY_SECONDS)
+            self.refresh_sidecars()
+
+    def refresh_sidecars(self) -> None:
+        """Write the sidecars queued by writes now; files written again since are left to the next refresh."""
+        with self._lock:
+            pending, self._pending_sidecars = self._pending_sidecars, {}
+        for file_path, (stat_result, records) in pending.items():
+            try:
+                if source_key(os.stat(file_path)) != source_key(stat_result):
+                    continue
+            except OSError:
+                continue
+            self._write_sidecar(file_path, stat_result, list(records))
+
+    def _write_sidecar(self, file_path: Path, stat_result: os.stat_result, data: List[Any]) -> None:
+        """Refresh a data file's sidecar; the JSON is already written, so failures only cost speed."""
+        if not self._wants_sidecar(stat_result):
+            return
+        try:
+            write_sidecar(file_path, stat_result, data)
+        except (OSError, ValueError):
+            pass
+
+    def _publish(self, snapshot: Snapshot) -> None:
+        """Swap in a snapshot unless a newer version is already published."""
+        with self._lock:
+            current = self._snapshots.get(snapshot.filename)
+            if current is None or current.version <= snapshot.version:
+                self._snapshots[snapshot.filename] = snapshot
+
+    def _load_snapshot(self, filename: str) -> Snapshot:
+        """Load a data file (from its sidecar if it is current) into a new snapshot and publish it."""
+        file_path = self._get_file_path(filename)
+        self._initialize_file_if_missing(file_path)
+        
+        with open(file_path, 'rb') as f:
+            stat_result = os.fstat(f.fileno())
+            stamp = self._stamp(filename, stat_result)
+            data = read_sidecar(file_path, stat_result) if self._wants_sidecar(stat_result) else None
+            if data is None:
+                data = parse_records(f.read())
+                # The next cold read (a restart, another worker) loads the sidecar
+                self._write_sidecar(file_path, stat_result, data)
+        
+        snapshot = Snapshot(filename, stamp, tuple(data))
+        self._publish(snapshot)
+        return snapshot
+
+    @contextmanager
+    def transaction(self, filename: str) -> Iterator[List[Any]]:
+        """
+        Read-modify-write a data file under the cross-process lock.
+        
+        Yields a copy of the current record list; it is written back and
+        published as the next snapshot when the block exits normally. If the
+        block raises, nothing is written.
+        
+        Records are shared with published snapshots, so they are copy-on-write:
+        replace a record with an updated copy instead of mutating it.
+        
+        Example:
+            with storage.transaction("participation.json") as participation:
+                participation[i] = {**participation[i], "meals": new_meals}
+        
+        Args:
+            filename: The name of the file to update
+        """
+        with self._file_lock(filename):
+            data = list(self.snapshot(filename).records)
+            yield data
+            self._write_locked(filename, data)
+
+    def snapshot(self, filename: str) -> Snapshot:
+        """
+        Get the current immutable snapshot of a data file.
+        
+        Readers take no lock: the published snapshot is returned as long as
+        its stamp matches the file, otherwise the file is parsed once into a
+        new snapshot. A snapshot never changes, so long-running readers keep
+        a consistent view while writers publish newer versions.
+        
+        Args:
+            filename: The name of the file to read
+        """
+        snapshot = self.peek_snapshot(filename)
+        if snapshot is not None:
+            return snapshot
+        return self._load_snapshot(filename)
+
+    def peek_snapshot(self, filename: str) -> Optional[Snapshot]:
+        """
+        Get the published snapshot of a file if it is still current, without parsing.
+        
+        Costs one stat and one version read, so async callers can use it on
+        the event loop before falling back to a parse on the executor.
+        """
+        snapshot = self._snapshots.get(filename)
+        if snapshot is None:
+            return None
+        try:
+            stat_result = os.stat(self._get_file_path(filename))
+        except FileNotFoundError:
+            return None
+        if snapshot.stamp != self._stamp(filename, stat_result):
+            return None
+        return snapshot
+
+    def stamp(self, filename: str) -> Optional[Tuple[int, ...]]:
+        """
+        Get the current stamp of a data file without reading it.
+        
+        Costs one stat and one version read. Returns None if the file is missing.
+        """
+        try:
+            stat_result = os.stat(self._get_file_path(filename))
+        except FileNotFoundError:
+            return None
+        return self._stamp(filename, stat_result)
+
+    def read_cached(self, filename: str) -> Sequence[Any]:
+        """
+        Read the records of the current snapshot of a file (see snapshot).
+        
+        Args:
+            filename: The name of the file to read
+            
+        Returns:
+            The records as a shared, read-only sequence
+        """
+        return self.snapshot(filename).records
+
+    def update(self, filename: str, mutator: Callable[[List[Any]], T]) -> T:
+        """
+        Run a mutator inside a transaction and return its result.
+        
+        Args:
+            filename: The name of the file to update
+            mutator: Called with a copy of the record list; changes it in place,
+                replacing (not mutating) records. Raising aborts the
+                transaction without writing.
+        """
+        return self.update_versioned(filename, mutator)[0]
+
+    def update_versioned(
+        self,
+        filename: str,
+        mutator: Callable[[List[Any]], T],
+        after_write: Optional[Callable[[T], None]] = None
+    ) -> Tuple[T, Snapshot, Snapshot]:
+        """
+        Like update, but also return the snapshots before and after the write.
+        
+        Callers that maintain structures incrementally can apply their change
+        only if the structure was built from the "before" snapshot.
+        
+        after_write, if given, is called with the mutator's result once the
+        write has succeeded, still holding the lock: for updating data derived
+        from the file consistently with readers that hold its lock.
+        """
+        with self._file_lock(filename):
+            before = self.snapshot(filename)
+            data = list(before.records)
+            result = mutator(data)
+            after = self._write_locked(filename, data)
+            if after_write is not None:
+                after_write(result)
+        return result, before, after
 
     def read_users(self) -> List[Any]:
         """Read users from users.json file."""
         return self.read("users.json")
 
+    def read_users_cached(self) -> Sequence[Any]:
+        """Read users from the current snapshot (do not mutate the result)."""
+        return self.read_cached("users.json")
+
     def write_users(self, users: List[Any]) -> None:
         """Write users to users.json file."""
         self.write("users.json", users)
@@ -132,6 +572,10 @@ class JSONStorage:
         """Read participation data from participation.json file."""
         return self.read("participation.json")
 
+    def read_participation_cached(self) -> Sequence[Any]:
+        """Read participation data from the current snapshot (do not mutate the result)."""
+        return self.read_cached("participation.json")
+
     def write_participation(self, participation: List[Any]) -> None:
         """Write participation data to participation.json file."""
         self.write("participation.json", participation)
@@ -146,4 +590,137 @@ class JSONStorage:
         Returns:
             The absolute path as a string
         """
-        return str(self._get_file_path(filename).resolve())
\ No newline at end of file
+        return str(self._get_file_path(filename).resolve())
+
+
+_shared_storage: Optional[JSONStorage] = None
+_shared_storage_lock = threading.Lock()
+
+
+def get_storage() -> JSONStorage:
+    """
+    Get the process-wide JSONStorage instance.
+    
+    The API modules share one instance so that locking and the read cache
+    cover every request handled by the worker.
+    """
+    global _shared_storage
+    if _shared_storage is None:
+        from app.config import (
+            STORAGE_DURABILITY, STORAGE_FORMAT, STORAGE_FSYNC_INTERVAL_SECONDS, STORAGE_SIDECAR_MIN_BYTES
+        )
+        
+        with _shared_storage_lock:
+            if _shared_storage is None:
+                _shared_storage = JSONStorage(
+                    durability=STORAGE_DURABILITY,
+                    fsync_interval=STORAGE_FSYNC_INTERVAL_SECONDS,
+                    file_format=STORAGE_FORMAT,
+                    sidecar_min_bytes=STORAGE_SIDECAR_MIN_BYTES if STORAGE_SIDECAR_MIN_BYTES >= 0 else None
+                )
+    return _shared_storage
+
+
+class AsyncJSONStorage:
+    """
+    Async API over JSONStorage for use in request handlers.
+    
+    File I/O and JSON (de)serialization run on a dedicated thread pool, so a
+    large read or write never blocks the event loop. Snapshots that are
+    still current are returned on the loop without a thread hop.
+    """
+    
+    def __init__(self, storage: JSONStorage, max_workers: int = 4):
+        self.storage = storage
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage")
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    async def read(self, filename: str) -> List[Any]:
+        """Read and parse a file on the storage executor."""
+        return await self._run(self.storage.read, filename)
+
+    async def snapshot(self, filename: str) -> Snapshot:
+        """Get the current snapshot of a file, parsing it on the executor if stale."""
+        snapshot = self.storage.peek_snapshot(filename)
+        if snapshot is not None:
+            return snapshot
+        return await self._run(self.storage.snapshot, filename)
+
+    def stamp(self, filename: str) -> Optional[Tuple[int, ...]]:
+        """Current stamp of a file without reading it; cheap enough for the event loop."""
+        return self.storage.stamp(filename)
+
+    async def stamps(self, *filenames: str) -> Tuple[Tuple[int, ...], ...]:
+        """Current stamps of several files, e.g. to key results computed from them."""
+        return tuple([(await self.snapshot(filename)).stamp for filename in filenames])
+
+    async def read_cached(self, filename: str) -> Sequence[Any]:
+        """Read the records of the current snapshot (do not mutate the result)."""
+        return (await self.snapshot(filename)).records
+
+    async def write(self, filename: str, data: List[Any]) -> None:
+        """Write a file on the storage executor."""
+        await self._run(self.storage.write, filename, data)
+
+    async def flush(self) -> None:
+        """Make every completed write durable now (see JSONStorage.flush)."""
+        await self._run(self.storage.flush)
+
+    async def update(self, filename: str, mutator: Callable[[List[Any]], T]) -> T:
+        """
+        Read-modify-write a file without blocking the event loop.
+        
+        The whole transaction (lock, read, mutator, write) runs on the storage
+        executor, so the mutator must not await anything. See JSONStorage.update.
+        """
+        return await self._run(self.storage.update, filename, mutator)
+
+    async def update_versioned(
+        self,
+        filename: str,
+        mutator: Callable[[List[Any]], T],
+        after_write: Optional[Callable[[T], None]] = None
+    ) -> Tuple[T, Snapshot, Snapshot]:
+        """Read-modify-write a file, returning the snapshots before and after (see JSONStorage.update_versioned)."""
+        return await self._run(self.storage.update_versioned, filename, mutator, after_write)
+
+    async def run_locked(self, filename: str, func: Callable[[], T]) -> T:
+        """Run func on the storage executor holding a file's lock (see JSONStorage.locked)."""
+        def call() -> T:
+            with self.storage.locked(filename):
+                return func()
+        
+        return await self._run(call)
+
+    async def read_users_cached(self) -> Sequence[Any]:
+        """Read users from the current snapshot (do not mutate the result)."""
+        return await self.read_cached("users.json")
+
+    async def update_users(self, mutator: Callable[[List[Any]], T]) -> T:
+        """Read-modify-write users.json (see update)."""
+        return await self.update("users.json", mutator)
+
+    async def read_participation_cached(self) -> Sequence[Any]:
+        """Read participation data from the current snapshot (do not mutate the result)."""
+        return await self.read_cached("participation.json")
+
+    async def update_participation(self, mutator: Callable[[List[Any]], T]) -> T:
+        """Read-modify-write participation.json (see update)."""
+        return await self.update("participation.json", mutator)
+
+
+_shared_async_storage: Optional[AsyncJSONStorage] = None
+
+
+def get_async_storage() -> AsyncJSONStorage:
+    """Get the process-wide AsyncJSONStorage over the shared storage instance."""
+    global _shared_async_storage
+    if _shared_async_storage is None:
+        storage = get_storage()
+        with _shared_storage_lock:
+            if _shared_async_storage is None:
+                _shared_async_storage = AsyncJSONStorage(storage)
+    return _shared_async_storage
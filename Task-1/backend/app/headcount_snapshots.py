@@ -0,0 +1,304 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from app.config import CUTOFF_HOUR
+from app.db import AsyncJSONStorage, Snapshot, get_async_storage
+from app.models import MealType, DEFAULT_PARTICIPATION_MEALS
+from app.participation_journal import PARTICIPATION_FILE
+from app.repository import Repository, build_participation_index, get_repository
+from app.work_calendar import WorkCalendar, get_work_calendar
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOTS_FILE = "headcount_snapshots.json"
+
+MEAL_TYPES = [meal_type.value for meal_type in MealType]
+
+
+def team_key(team_id: Optional[int]) -> str:
+    """Key of a team in a snapshot's team map (JSON object keys are strings)."""
+    return "none" if team_id is None else str(team_id)
+
+
+def cutoff_for(date: str, cutoff_hour: int) -> datetime:
+    """Participation for a date locks at cutoff_hour on the previous day."""
+    day = datetime.strptime(date, "%Y-%m-%d")
+    return day - timedelta(days=1) + timedelta(hours=cutoff_hour)
+
+
+def is_locked(date: str, cutoff_hour: int, now: Optional[datetime] = None) -> bool:
+    """Check whether the cutoff for a date has passed."""
+    return (now or datetime.now()) >= cutoff_for(date, cutoff_hour)
+
+
+def build_snapshot_index(snapshots: Sequence[Dict]) -> Dict[str, Dict]:
+    """Index frozen headcounts by date."""
+    return {record["date"]: record for record in snapshots}
+
+
+def compute_headcount(
+    users_data: Sequence[Dict],
+    participation_index: Dict[Tuple[int, str], Dict],
+    date: str,
+    meals_available: bool = True
+) -> Dict[str, Any]:
+    """
+    Count opted-in users per meal, overall and per team, for a date.
+    
+    Users without a record for the date are opted in to every meal. On a day
+    without meals (office closed, holiday) every count is zero.
+    """
+    meals = {meal_type: 0 for meal_type in MEAL_TYPES}
+    teams: Dict[str, Dict[str, Any]] = {}
+    
+    for user_dict in users_data:
+        team_id = user_dict.get("team_id")
+        team = teams.get(team_key(team_id))
+        if team is None:
+            team = {"team_id": team_id, "total_employees": 0, "meals": {meal_type: 0 for meal_type in MEAL_TYPES}}
+            teams[team_key(team_id)] = team
+        team["total_employees"] += 1
+        
+        if not meals_available:
+            continue
+        
+        record = participation_index.get((user_dict.get("id"), date))
+        user_meals = record.get("meals", {}) if record else DEFAULT_PARTICIPATION_MEALS
+        for meal_type in MEAL_TYPES:
+            if user_meals.get(meal_type, False):
+                meals[meal_type] += 1
+                team["meals"][meal_type] += 1
+    
+    return {
+        "date": date,
+        "total_employees": len(users_data),
+        "meals": meals,
+        "teams": teams,
+    }
+
+
+def apply_meal_change(
+    headcount: Dict[str, Any],
+    team_id: Optional[int],
+    old_meals: Dict[str, bool],
+    new_meals: Dict[str, bool]
+) -> Dict[str, Any]:
+    """
+    Return a copy of a headcount with one user's meal change applied.
+    
+    A user in a team the headcount has no entry for was not counted in it,
+    so the headcount is returned unchanged.
+    """
+    teams = dict(headcount["teams"])
+    team = teams.get(team_key(team_id))
+    if team is None:
+        return headcount
+    meals = dict(headcount["meals"])
+    team_meals = dict(team["meals"])
+    
+    for meal_type in MEAL_TYPES:
+        delta = int(bool(new_meals.get(meal_type, False))) - int(bool(old_meals.get(meal_type, False)))
+        if delta:
+            meals[meal_type] += delta
+            team_meals[meal_type] += delta
+    
+    teams[team_key(team_id)] = {**team, "meals": team_meals}
+    return {**headcount, "meals": meals, "teams": teams}
+
+
+class HeadcountSnapshots:
+    """
+    Frozen headcounts for days whose participation cutoff has passed.
+    
+    At cutoff the next day's headcount is materialized (per meal, per team)
+    into headcount_snapshots.json. Reads for that day come from the snapshot;
+    later participation changes for the day (overrides) patch it
+    incrementally instead of triggering a recount. Patches are made right
+    after the participation.json write of the change, before its lock is
+    released, and counts are taken holding the same lock, so a change is
+    either counted or patched in, never both or neither.
+    
+    Each snapshot notes the users.json version it was counted from. Once
+    users are added or change team, a snapshot is recounted when next read
+    and patches to it are skipped, since it does not count the right people.
+    """
+    
+    def __init__(
+        self,
+        storage: AsyncJSONStorage,
+        repository: Repository,
+        work_calendar: WorkCalendar,
+        cutoff_hour: int
+    ):
+        self.storage = storage
+        self.repository = repository
+        self.work_calendar = work_calendar
+        self.cutoff_hour = cutoff_hour
+
+    async def get(self, date: str) -> Optional[Dict[str, Any]]:
+        """Get the frozen headcount for a date, if one was materialized."""
+        headcount = await self._frozen(date)
+        if headcount is not None and headcount.get("users_version") != await self._users_version():
+            await self.refreeze(date)
+            headcount = await self._frozen(date)
+        return headcount
+
+    async def _frozen(self, date: str) -> Optional[Dict[str, Any]]:
+        snapshot = await self.storage.snapshot(SNAPSHOTS_FILE)
+        return snapshot.derive("by_date", build_snapshot_index).get(date)
+
+    async def _users_version(self) -> int:
+        return (await self.storage.snapshot("users.json")).version
+
+    def _count_inputs(self) -> Tuple[Snapshot, Dict[Tuple[int, str], Dict]]:
+        """Users and the participation index to count from; call holding the participation.json lock."""
+        storage = self.storage.storage
+        participation = storage.snapshot(PARTICIPATION_FILE)
+        return storage.snapshot("users.json"), participation.derive("by_user_date", build_participation_index)
+
+    async def freeze(self, date: str) -> Dict[str, Any]:
+        """Materialize the headcount for a date; an existing snapshot is kept."""
+        existing = await self.get(date)
+        if existing is not None:
+            return existing
+        
+        frozen_at = datetime.now().isoformat(timespec="seconds")
+        
+        def count():
+            users, participation_index = self._count_inputs()
+            # Read under the lock as well: refreeze_range looks for this
+            # snapshot under it, so a special day declared meanwhile is
+            # either seen here or recounted there
+            meals_available = self.work_calendar.view_sync().meals_available(date)
+            
+            def add_snapshot(snapshots):
+                for record in snapshots:
+                    if record.get("date") == date:
+                        return record
+                headcount = {
+                    **compute_headcount(users.records, participation_index, date, meals_available),
+                    "users_version": users.version,
+                    "frozen_at": frozen_at
+                }
+                snapshots.append(headcount)
+                return headcount
+            
+            return self.storage.storage.update(SNAPSHOTS_FILE, add_snapshot)
+        
+        return await self.storage.run_locked(PARTICIPATION_FILE, count)
+
+    async def refreeze(self, date: str) -> None:
+        """Recount an already frozen day, e.g. after its special-day status changed."""
+        await self.refreeze_range(date, date)
+
+    async def refreeze_range(self, start: str, end: str) -> int:
+        """
+        Recount every frozen day in [start, end] in a single write, e.g. after
+        a closure was declared over the range.
+        
+        Days without meals all count the same, so that count is computed once
+        however long the closure. Returns the number of days recounted.
+        """
+        def recount():
+            # Checked under the lock, so a freeze in progress is either done
+            # (and recounted here) or not started (and reads the new calendar)
+            frozen = self.storage.storage.snapshot(SNAPSHOTS_FILE).records
+            if not any(start <= record.get("date", "") <= end for record in frozen):
+                return 0
+            users, participation_index = self._count_inputs()
+            calendar_view = self.work_calendar.view_sync()
+            
+            def replace_snapshots(snapshots):
+                closed_day: Optional[Dict[str, Any]] = None
+                recounted = 0
+                for i, record in enumerate(snapshots):
+                    date = record.get("date", "")
+                    if not start <= date <= end:
+                        continue
+                    if calendar_view.meals_available(date):
+                        headcount = compute_headcount(users.records, participation_index, date)
+                    else:
+                        if closed_day is None:
+                            closed_day = compute_headcount(users.records, participation_index, date, False)
+                        headcount = {**closed_day, "date": date}
+                    snapshots[i] = {**headcount, "users_version": users.version, "frozen_at": record.get("frozen_at")}
+                    recounted += 1
+                return recounted
+            
+            return self.storage.storage.update(SNAPSHOTS_FILE, replace_snapshots)
+        
+        return await self.storage.run_locked(PARTICIPATION_FILE, recount)
+
+    def apply_changes(self, changes: Sequence[Tuple[str, Optional[int], Dict[str, bool], Dict[str, bool]]]) -> None:
+        """
+        Patch frozen headcounts with meal changes, each (date, team_id, old_meals, new_meals).
+        
+        Call holding the participation.json lock, once the write that made
+        the changes has succeeded (see JSONStorage.update_versioned).
+        """
+        storage = self.storage.storage
+        frozen = storage.snapshot(SNAPSHOTS_FILE).derive("by_date", build_snapshot_index)
+        changes = [change for change in changes if change[0] in frozen]
+        if not changes:
+            return
+        users_version = storage.snapshot("users.json").version
+        
+        def patch_snapshots(snapshots):
+            for i, record in enumerate(snapshots):
+                # A snapshot of other users is recounted on its next read instead
+                if record.get("users_version") != users_version:
+                    continue
+                for date, team_id, old_meals, new_meals in changes:
+                    if record.get("date") == date:
+                        record = apply_meal_change(record, team_id, old_meals, new_meals)
+                snapshots[i] = record
+        
+        storage.update(SNAPSHOTS_FILE, patch_snapshots)
+
+    def next_cutoff(self, now: datetime) -> datetime:
+        """The next cutoff moment after now."""
+        cutoff = now.replace(hour=self.cutoff_hour, minute=0, second=0, microsecond=0)
+        return cutoff if cutoff > now else cutoff + timedelta(days=1)
+
+    async def roll_over(self, now: Optional[datetime] = None) -> None:
+        """
+        Freeze every day whose cutoff has passed (today, and tomorrow once
+        today's cutoff is reached) and pre-warm indexes for it.
+        """
+        now = now or datetime.now()
+        today = now.strftime("%Y-%m-%d")
+        tomorrow = (now + timedelta(days=1)).strftime("%Y-%m-%d")
+        
+        for date in (today, tomorrow):
+            if is_locked(date, self.cutoff_hour, now):
+                await self.freeze(date)
+        
+        await self.repository.warm_up()
+
+    async def run_rollover_job(self) -> None:
+        """Roll over now, then at every cutoff, until cancelled."""
+        while True:
+            try:
+                await self.roll_over()
+            except Exception:
+                logger.exception("Headcount rollover failed")
+            delay = (self.next_cutoff(datetime.now()) - datetime.now()).total_seconds()
+            await asyncio.sleep(max(delay, 1.0))
+
+
+_shared_headcount_snapshots: Optional[HeadcountSnapshots] = None
+
+
+def get_headcount_snapshots() -> HeadcountSnapshots:
+    """Get the process-wide HeadcountSnapshots instance."""
+    global _shared_headcount_snapshots
+    if _shared_headcount_snapshots is None:
+        _shared_headcount_snapshots = HeadcountSnapshots(
+            get_async_storage(),
+            get_repository(),
+            get_work_calendar(),
+            CUTOFF_HOUR
+        )
+    return _shared_headcount_snapshots
@@ -0,0 +1,91 @@
+from bisect import bisect_right
+from datetime import date as Date, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+
+def to_ordinal(date: str) -> int:
+    """Convert a YYYY-MM-DD string to a day number."""
+    return Date.fromisoformat(date).toordinal()
+
+
+def from_ordinal(ordinal: int) -> str:
+    """Convert a day number back to a YYYY-MM-DD string."""
+    return Date.fromordinal(ordinal).isoformat()
+
+
+class IntervalIndex:
+    """
+    Index of inclusive date ranges, each carrying a payload.
+    
+    The ranges are cut into disjoint segments, each with the tuple of payloads
+    covering it. A point lookup is one binary search, and a range query walks
+    the overlapping segments once, however many ranges overlap.
+    """
+    
+    def __init__(self, intervals: Iterable[Tuple[str, str, Any]]):
+        events: Dict[int, Tuple[List[Any], List[Any]]] = {}
+        for start, end, payload in intervals:
+            events.setdefault(to_ordinal(start), ([], []))[0].append(payload)
+            events.setdefault(to_ordinal(end) + 1, ([], []))[1].append(payload)
+        
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._payloads: List[Tuple[Any, ...]] = []
+        
+        active: List[Any] = []
+        boundaries = sorted(events)
+        for i, boundary in enumerate(boundaries):
+            opened, closed = events[boundary]
+            for payload in closed:
+                active.remove(payload)
+            active.extend(opened)
+            if active and i + 1 < len(boundaries):
+                self._starts.append(boundary)
+                self._ends.append(boundaries[i + 1])
+                self._payloads.append(tuple(active))
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def at(self, date: str) -> Tuple[Any, ...]:
+        """Payloads of every range that contains the date."""
+        ordinal = to_ordinal(date)
+        i = bisect_right(self._starts, ordinal) - 1
+        if i >= 0 and ordinal < self._ends[i]:
+            return self._payloads[i]
+        return ()
+
+    def covers(self, date: str) -> bool:
+        """Check whether any range contains the date."""
+        return bool(self.at(date))
+
+    def segments(self, start: str, end: str) -> Iterator[Tuple[int, int, Tuple[Any, ...]]]:
+        """
+        Walk covered segments overlapping [start, end], clipped to it.
+        
+        Yields (first_day, last_day_exclusive, payloads) as day numbers.
+        """
+        start_ordinal = to_ordinal(start)
+        end_ordinal = to_ordinal(end) + 1
+        i = max(bisect_right(self._starts, start_ordinal) - 1, 0)
+        while i < len(self._starts) and self._starts[i] < end_ordinal:
+            if self._ends[i] > start_ordinal:
+                yield max(self._starts[i], start_ordinal), min(self._ends[i], end_ordinal), self._payloads[i]
+            i += 1
+
+    def resolve(self, start: str, end: str) -> Dict[str, Tuple[Any, ...]]:
+        """Map every covered date in [start, end] to its payloads, in one sweep."""
+        resolved = {}
+        for first, last, payloads in self.segments(start, end):
+            for ordinal in range(first, last):
+                resolved[from_ordinal(ordinal)] = payloads
+        return resolved
+
+
+def date_range(start: str, end: str) -> Iterator[str]:
+    """Iterate YYYY-MM-DD dates from start to end inclusive."""
+    day = Date.fromisoformat(start)
+    last = Date.fromisoformat(end)
+    while day <= last:
+        yield day.isoformat()
+        day += timedelta(days=1)
@@ -0,0 +1,46 @@
+import threading
+from typing import Dict, Optional
+
+
+class Metrics:
+    """
+    Process-local counters and gauges for runtime behaviour (cache hits,
+    coalesced requests, queue depths, ...). Each uvicorn worker keeps its own.
+    """
+    
+    def __init__(self):
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        """Add amount to a counter, creating it at zero."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def set(self, name: str, value: int) -> None:
+        """Set a gauge (a value that goes up and down, e.g. a queue depth)."""
+        with self._lock:
+            self._counters[name] = value
+
+    def get(self, name: str) -> int:
+        """Current value of a counter."""
+        return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        """Copy of all counters, sorted by name."""
+        with self._lock:
+            return dict(sorted(self._counters.items()))
+
+
+_shared_metrics: Optional[Metrics] = None
+_shared_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """Get the process-wide Metrics instance."""
+    global _shared_metrics
+    if _shared_metrics is None:
+        with _shared_metrics_lock:
+            if _shared_metrics is None:
+                _shared_metrics = Metrics()
+    return _shared_metrics
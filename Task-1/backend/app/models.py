@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from pydantic import BaseModel, Field
 
 
@@ -18,6 +18,16 @@ class MealType(str, Enum):
     OPTIONAL_DINNER = "OptionalDinner"
 
 
+# Meals for a user with no stored record for the day (everyone is opted in by default)
+DEFAULT_PARTICIPATION_MEALS: Dict[str, bool] = {meal_type.value: True for meal_type in MealType}
+
+# Meals shown for a day on which the office is closed
+UNAVAILABLE_MEALS: Dict[str, bool] = {meal_type.value: False for meal_type in MealType}
+
+# Longest participation history that can be requested at once
+MAX_HISTORY_DAYS = 366
+
+
 class User(BaseModel):
     id: int
     username: str = Field(..., min_length=1, max_length=50)
@@ -26,6 +36,8 @@ class User(BaseModel):
     email: str = Field(..., min_length=1, max_length=100)
     role: UserRole
     team_id: Optional[int] = None
+    # Incremented on every role or team change (invalidates stateless tokens)
+    version: int = 0
 
     class Config:
         use_enum_values = True
@@ -79,6 +91,8 @@ class MealRecord(BaseModel):
             MealType.OPTIONAL_DINNER: False,
         }
     )
+    # Incremented on every change; records from before versioning are at 0
+    version: int = 0
 
     class Config:
         use_enum_values = True
@@ -95,3 +109,72 @@ class MealRecord(BaseModel):
                 },
             }
         }
+
+
+class ParticipationHistoryDay(BaseModel):
+    date: str
+    meals: Dict[str, bool]
+    meals_available: bool
+    is_default: bool
+
+
+class ParticipationHistory(BaseModel):
+    user_id: int
+    start: str
+    end: str
+    days: List[ParticipationHistoryDay]
+
+
+class SpecialDayType(str, Enum):
+    CLOSED = "Closed"
+    HOLIDAY = "Holiday"
+    CELEBRATION = "Celebration"
+
+
+# Day types on which the office is shut and meals are not served
+MEALS_UNAVAILABLE_DAY_TYPES = {SpecialDayType.CLOSED.value, SpecialDayType.HOLIDAY.value}
+
+
+class SpecialDay(BaseModel):
+    date: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$")
+    day_type: SpecialDayType
+    note: Optional[str] = Field(default=None, max_length=500)
+
+    class Config:
+        use_enum_values = True
+
+
+class SpecialDayRange(BaseModel):
+    start_date: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$")
+    end_date: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$")
+    day_type: SpecialDayType
+    note: Optional[str] = Field(default=None, max_length=500)
+    # Overwrite special days already defined in the range instead of rejecting the request
+    replace: bool = False
+
+    class Config:
+        use_enum_values = True
+
+
+class WFHPeriodCreate(BaseModel):
+    start_date: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$")
+    end_date: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$")
+    note: Optional[str] = Field(default=None, max_length=500)
+
+
+class WFHPeriod(WFHPeriodCreate):
+    id: int
+
+
+class WorkLocation(str, Enum):
+    OFFICE = "Office"
+    WFH = "WFH"
+
+
+class WorkLocationRecord(BaseModel):
+    user_id: int
+    date: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$")
+    location: WorkLocation
+
+    class Config:
+        use_enum_values = True
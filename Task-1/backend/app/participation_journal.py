@@ -0,0 +1,183 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.db import JSONStorage, Snapshot, get_storage
+from app.work_calendar import SPECIAL_DAYS_FILE
+
+PARTICIPATION_FILE = "participation.json"
+JOURNAL_FILE = "participation_journal.json"
+
+# Older entries are dropped; clients further behind get a full resync
+MAX_JOURNAL_ENTRIES = 2_000
+
+CHANGE = "change"
+RESET = "reset"
+
+
+def todays_date() -> str:
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+def covers(journal: Sequence[Dict[str, Any]], versions: Tuple[int, int, int]) -> bool:
+    """
+    Whether the journal accounts for every write up to these
+    (participation.json, users.json, special_days.json) versions.
+    """
+    return bool(journal) and (
+        journal[-1]["participation_version"],
+        journal[-1]["users_version"],
+        journal[-1].get("calendar_version"),
+    ) == versions
+
+
+def reset_marker(seq: int, versions: Tuple[int, int, int], day: str) -> Dict[str, Any]:
+    """An entry that starts the journal over: changes before seq are unknown."""
+    participation_version, users_version, calendar_version = versions
+    return {
+        "seq": seq,
+        "kind": RESET,
+        "day": day,
+        "participation_version": participation_version,
+        "users_version": users_version,
+        "calendar_version": calendar_version,
+    }
+
+
+class JournalRead:
+    """
+    The answer to "what changed since a cursor".
+    
+    keys is None when the client must resync everything. participation is
+    the snapshot that rows should be built from; it includes every change
+    up to cursor.
+    """
+    
+    __slots__ = ("cursor", "keys", "participation")
+
+    def __init__(self, cursor: int, keys: Optional[List[Tuple[int, str]]], participation: Snapshot):
+        self.cursor = cursor
+        self.keys = keys
+        self.participation = participation
+
+
+class ParticipationJournal:
+    """
+    Sequence-numbered log of changed participation records, in
+    participation_journal.json.
+    
+    Entries are appended inside the participation.json transaction that
+    makes the change, so they are on disk before the change is, and a
+    reader holding the participation.json lock sees the journal and the data
+    at the same point. Each entry notes the participation.json, users.json
+    and special_days.json versions it brings the journal up to (the rows
+    depend on all three). When the files have moved on without a journal
+    entry (a write from elsewhere, a crash between the two writes, a new or
+    changed user, a calendar edit), the journal starts over with a reset
+    marker and clients behind it resync in full.
+    
+    The first entry is always a reset marker: a cursor from before it can no
+    longer be answered, whether the journal was reset or truncated to
+    MAX_JOURNAL_ENTRIES.
+    """
+
+    def __init__(self, storage: JSONStorage, max_entries: int = MAX_JOURNAL_ENTRIES):
+        self.storage = storage
+        self.max_entries = max_entries
+
+    def record(self, keys: Sequence[Tuple[int, str]]) -> None:
+        """
+        Journal changed (user_id, date) records.
+        
+        Call from inside every participation.json transaction that writes,
+        before its write. A write with no keys (only default records created)
+        changes nothing a client sees, but is still recorded so the journal
+        keeps covering participation.json.
+        """
+        versions = self._versions()
+        participation_version, users_version, calendar_version = versions
+        day = todays_date()
+
+        def append(journal):
+            if not covers(journal, versions):
+                self._reset(journal, versions, day)
+            if not keys:
+                journal[-1] = {**journal[-1], "participation_version": participation_version + 1}
+                return
+            seq = journal[-1]["seq"]
+            for user_id, date in keys:
+                seq += 1
+                journal.append({
+                    "seq": seq,
+                    "kind": CHANGE,
+                    "user_id": user_id,
+                    "date": date,
+                    "day": day,
+                    # The version the participation.json write will have
+                    "participation_version": participation_version + 1,
+                    "users_version": users_version,
+                    "calendar_version": calendar_version,
+                })
+            if len(journal) > self.max_entries:
+                dropped = journal[-self.max_entries - 1]
+                journal[:] = [reset_marker(
+                    dropped["seq"],
+                    (dropped["participation_version"], dropped["users_version"], dropped["calendar_version"]),
+                    dropped["day"],
+                )] + journal[-self.max_entries:]
+        
+        self.storage.update(JOURNAL_FILE, append)
+
+    def _versions(self) -> Tuple[int, int, int]:
+        return (
+            self.storage.version(PARTICIPATION_FILE),
+            self.storage.version("users.json"),
+            self.storage.version(SPECIAL_DAYS_FILE),
+        )
+
+    def _reset(self, journal: List[Any], versions: Tuple[int, int, int], day: str) -> None:
+        seq = journal[-1]["seq"] + 1 if journal else 1
+        journal[:] = [reset_marker(seq, versions, day)]
+
+    def read(self, since: Optional[int]) -> JournalRead:
+        """
+        Find the records changed after since (None: a full resync).
+        
+        Changes are reported for today only; a cursor issued on an earlier day
+        gets a full resync, since the rows it describes are for another date.
+        """
+        day = todays_date()
+        with self.storage.locked(PARTICIPATION_FILE):
+            participation = self.storage.snapshot(PARTICIPATION_FILE)
+            versions = self._versions()
+            journal = self.storage.snapshot(JOURNAL_FILE).records
+            if not covers(journal, versions):
+                def start_over(journal):
+                    self._reset(journal, versions, day)
+                    return tuple(journal)
+                
+                journal = self.storage.update(JOURNAL_FILE, start_over)
+        
+        first, cursor = journal[0]["seq"], journal[-1]["seq"]
+        if since is None or not first <= since <= cursor:
+            return JournalRead(cursor, None, participation)
+        
+        # Sequence numbers are consecutive within the journal
+        if journal[since - first]["day"] != day:
+            return JournalRead(cursor, None, participation)
+        
+        keys: Dict[Tuple[int, str], None] = {}
+        for entry in journal[since - first + 1:]:
+            if entry["kind"] == CHANGE and entry["date"] == day:
+                keys[(entry["user_id"], entry["date"])] = None
+        return JournalRead(cursor, list(keys), participation)
+
+
+_shared_participation_journal: Optional[ParticipationJournal] = None
+
+
+def get_participation_journal() -> ParticipationJournal:
+    """Get the process-wide ParticipationJournal instance."""
+    global _shared_participation_journal
+    if _shared_participation_journal is None:
+        _shared_participation_journal = ParticipationJournal(get_storage())
+    return _shared_participation_journal
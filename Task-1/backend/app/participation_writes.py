@@ -0,0 +1,286 @@
+import asyncio
+import logging
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.db import AsyncJSONStorage, Snapshot, get_async_storage
+from app.headcount_snapshots import HeadcountSnapshots, get_headcount_snapshots
+from app.metrics import Metrics, get_metrics
+from app.models import DEFAULT_PARTICIPATION_MEALS
+from app.participation_journal import PARTICIPATION_FILE, ParticipationJournal, get_participation_journal
+from app.repository import Repository, get_repository
+from app.response_cache import ResponseCache, changed_meal_types, get_response_cache
+
+logger = logging.getLogger(__name__)
+
+# Updates for users in different stripes never wait for each other
+LOCK_STRIPES = 64
+
+
+def record_version(record: Dict[str, Any]) -> int:
+    """Version of a stored participation record (records from before versioning are 0)."""
+    return record.get("version", 0)
+
+
+def participation_etag(user_id: int, date: str, version: int) -> str:
+    """Strong ETag of a user's participation record for a date at a version."""
+    return f'"{user_id}-{date}-{version}"'
+
+
+def record_etag(record: Dict[str, Any]) -> str:
+    return participation_etag(record.get("user_id"), record.get("date"), record_version(record))
+
+
+def etag_matches(if_match: str, record: Dict[str, Any]) -> bool:
+    """
+    Evaluate an If-Match header against a record: "*" or a comma-separated
+    list of ETags, compared strongly (weak ETags never match).
+    """
+    if if_match.strip() == "*":
+        return True
+    etag = record_etag(record)
+    return any(candidate.strip() == etag for candidate in if_match.split(","))
+
+
+class VersionConflict(Exception):
+    """Raised when an If-Match precondition does not hold for the stored record."""
+
+    def __init__(self, record: Dict[str, Any]):
+        super().__init__(
+            f"Participation of user {record.get('user_id')} on {record.get('date')} "
+            f"has changed (now version {record_version(record)})"
+        )
+        self.record = record
+
+
+class ParticipationChange:
+    """One queued change: merge meals into a record (or just ensure it exists if meals is None)."""
+    
+    __slots__ = ("user_id", "team_id", "date", "meals", "if_match", "future")
+
+    def __init__(
+        self,
+        user_id: int,
+        team_id: Optional[int],
+        date: str,
+        meals: Optional[Dict[str, bool]],
+        if_match: Optional[str] = None
+    ):
+        self.user_id = user_id
+        self.team_id = team_id
+        self.date = date
+        self.meals = meals
+        self.if_match = if_match
+        self.future: Optional["asyncio.Future[Any]"] = None
+
+
+class _Unchanged(Exception):
+    """Aborts a batch transaction that would not change any record."""
+
+    def __init__(self, outcomes: List[Any]):
+        super().__init__("No participation record changed")
+        self.outcomes = outcomes
+
+
+def apply_changes(participation_data: List[Any], changes: Sequence[ParticipationChange]) -> List[Any]:
+    """
+    Apply a batch of changes to the participation list (a storage mutator).
+    
+    Returns one outcome per change: (old_meals, record) or a VersionConflict.
+    The records of the whole batch are located with a single scan. Every
+    change to a record's meals increments its version.
+    """
+    keys = {(change.user_id, change.date) for change in changes}
+    positions: Dict[Tuple[int, str], int] = {}
+    for i, record in enumerate(participation_data):
+        key = (record.get("user_id"), record.get("date"))
+        if key in keys:
+            positions[key] = i
+    
+    outcomes: List[Any] = []
+    changed = False
+    for change in changes:
+        key = (change.user_id, change.date)
+        i = positions.get(key)
+        if i is not None:
+            record = participation_data[i]
+        else:
+            record = {"user_id": change.user_id, "date": change.date, "meals": dict(DEFAULT_PARTICIPATION_MEALS)}
+        
+        if change.if_match is not None and not etag_matches(change.if_match, record):
+            outcomes.append(VersionConflict(record))
+            continue
+        
+        old_meals = record.get("meals", {})
+        if change.meals is not None:
+            # Records are shared with published snapshots: replace, never mutate
+            record = {**record, "meals": {**old_meals, **change.meals}, "version": record_version(record) + 1}
+        elif i is not None:
+            outcomes.append((old_meals, record))
+            continue
+        
+        if i is None:
+            positions[key] = len(participation_data)
+            participation_data.append(record)
+        else:
+            participation_data[i] = record
+        changed = True
+        outcomes.append((old_meals, record))
+    
+    if not changed:
+        raise _Unchanged(outcomes)
+    return outcomes
+
+
+class ParticipationWriter:
+    """
+    Participation updates with per-record optimistic concurrency.
+    
+    Updates for the same user are serialized by a lock striped by user id;
+    updates for different users queue up while a write is in progress and
+    are committed together in the next write (one transaction on
+    participation.json per batch, however many writers are waiting). The
+    If-Match check runs inside the transaction, under the cross-process file
+    lock, so it also holds against writes from other workers. Changed
+    records are journaled in the same transaction (see ParticipationJournal),
+    and frozen headcounts are patched once the write has succeeded, before
+    the lock is released (see HeadcountSnapshots).
+    
+    Counters (in Metrics):
+        participation_writes.batches: transactions written
+        participation_writes.changes: changes submitted
+    """
+
+    def __init__(
+        self,
+        storage: AsyncJSONStorage,
+        response_cache: ResponseCache,
+        metrics: Metrics,
+        journal: Optional[ParticipationJournal] = None,
+        headcounts: Optional[HeadcountSnapshots] = None,
+        repository: Optional[Repository] = None
+    ):
+        self.storage = storage
+        self.response_cache = response_cache
+        self.journal = journal
+        self.headcounts = headcounts
+        self.repository = repository
+        self.metrics = metrics
+        self._stripes = [asyncio.Lock() for _ in range(LOCK_STRIPES)]
+        self._queue: List[ParticipationChange] = []
+        self._flusher: Optional["asyncio.Task[None]"] = None
+
+    async def update(
+        self,
+        user_id: int,
+        team_id: Optional[int],
+        date: str,
+        meals: Dict[str, bool],
+        if_match: Optional[str] = None
+    ) -> Tuple[Dict[str, bool], Dict[str, Any]]:
+        """
+        Merge meals into a user's record for a date, creating it from the defaults.
+        
+        Returns:
+            The old meals and the new record
+        
+        Raises:
+            VersionConflict: If if_match is given and does not match the stored record
+        """
+        return await self._submit(ParticipationChange(user_id, team_id, date, meals, if_match))
+
+    async def ensure(self, user_id: int, team_id: Optional[int], date: str) -> Dict[str, Any]:
+        """Get a user's record for a date, storing the default record if there is none."""
+        return (await self._submit(ParticipationChange(user_id, team_id, date, None)))[1]
+
+    async def _submit(self, change: ParticipationChange) -> Any:
+        self.metrics.increment("participation_writes.changes")
+        async with self._stripes[change.user_id % LOCK_STRIPES]:
+            change.future = asyncio.get_running_loop().create_future()
+            self._queue.append(change)
+            if self._flusher is None or self._flusher.done():
+                self._flusher = asyncio.ensure_future(self._flush())
+            # Shielded: a caller that goes away does not drop the change from its batch
+            outcome = await asyncio.shield(change.future)
+        if isinstance(outcome, VersionConflict):
+            raise outcome
+        return outcome
+
+    async def _flush(self) -> None:
+        while self._queue:
+            batch, self._queue = self._queue, []
+            try:
+                outcomes, before, after = await self.storage.update_versioned(
+                    PARTICIPATION_FILE, partial(self._apply, batch), partial(self._patch_headcounts, batch)
+                )
+            except _Unchanged as e:
+                outcomes = e.outcomes
+            except Exception as e:
+                for change in batch:
+                    if not change.future.done():
+                        change.future.set_exception(e)
+                continue
+            else:
+                self.metrics.increment("participation_writes.batches")
+                self._report(batch, outcomes, before, after)
+            
+            for change, outcome in zip(batch, outcomes):
+                if not change.future.done():
+                    change.future.set_result(outcome)
+
+    def _apply(self, batch: Sequence[ParticipationChange], participation_data: List[Any]) -> List[Any]:
+        outcomes = apply_changes(participation_data, batch)
+        if self.journal is not None:
+            # Records only ensured to exist look the same as before: nothing to sync,
+            # but the write is still journaled (see ParticipationJournal.record)
+            self.journal.record([
+                (change.user_id, change.date) for change, outcome in zip(batch, outcomes)
+                if change.meals is not None and not isinstance(outcome, VersionConflict)
+            ])
+        return outcomes
+
+    def _patch_headcounts(self, batch: Sequence[ParticipationChange], outcomes: Sequence[Any]) -> None:
+        if self.headcounts is None:
+            return
+        try:
+            self.headcounts.apply_changes([
+                (change.date, change.team_id, outcome[0], outcome[1]["meals"])
+                for change, outcome in zip(batch, outcomes)
+                if change.meals is not None and not isinstance(outcome, VersionConflict)
+            ])
+        except Exception:
+            # The changes are already written: failing the batch now would report them as lost
+            logger.exception("Patching frozen headcounts failed")
+
+    def _report(self, batch: Sequence[ParticipationChange], outcomes: Sequence[Any], before: Snapshot, after: Snapshot) -> None:
+        """Tell the response cache which views the batch changed, and the repository which records."""
+        applied = [
+            (change, outcome) for change, outcome in zip(batch, outcomes)
+            if not isinstance(outcome, VersionConflict)
+        ]
+        dates = {change.date for change, _ in applied}
+        meal_types = set()
+        for _, (old_meals, record) in applied:
+            meal_types |= changed_meal_types(old_meals, record["meals"])
+        self.response_cache.write_applied(
+            PARTICIPATION_FILE, before, after,
+            date=next(iter(dates)) if len(dates) == 1 else None,
+            team_ids={change.team_id for change, _ in applied},
+            meal_types=meal_types
+        )
+        if self.repository is not None:
+            self.repository.participation_written(before, after, [record for _, (_, record) in applied])
+
+
+_shared_participation_writer: Optional[ParticipationWriter] = None
+
+
+def get_participation_writer() -> ParticipationWriter:
+    """Get the process-wide ParticipationWriter instance."""
+    global _shared_participation_writer
+    if _shared_participation_writer is None:
+        _shared_participation_writer = ParticipationWriter(
+            get_async_storage(), get_response_cache(), get_metrics(), get_participation_journal(),
+            get_headcount_snapshots(), get_repository()
+        )
+    return _shared_participation_writer
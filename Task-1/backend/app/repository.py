@@ -0,0 +1,233 @@
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.db import AsyncJSONStorage, Snapshot, get_async_storage
+from app.metrics import Metrics, get_metrics
+from app.models import User, MealRecord
+from app.shared_dataset import SharedDataset, SharedDatasetReader, get_shared_dataset_reader
+from app.single_flight import SingleFlight
+
+
+class ParticipationHistoryIndex:
+    """
+    Each user's participation records sorted by date, at one version of
+    participation.json.
+    
+    Writes through ParticipationWriter are applied in place (see
+    Repository.participation_written), so it is only rebuilt after writes
+    from elsewhere.
+    """
+    
+    def __init__(self, stamp: Tuple, participation_data: Sequence[Dict]):
+        self.stamp = stamp
+        self.by_user = build_participation_by_user(participation_data)
+
+    def put(self, record: Dict[str, Any]) -> None:
+        """Insert a written record, replacing the user's record for its date."""
+        dates, records = self.by_user.setdefault(record.get("user_id"), ([], []))
+        date = record.get("date")
+        i = bisect_left(dates, date)
+        if i < len(dates) and dates[i] == date:
+            records[i] = record
+        else:
+            dates.insert(i, date)
+            records.insert(i, record)
+
+    def between(self, user_id: int, start: str, end: str) -> List[Dict]:
+        """A user's records for dates in [start, end]: two binary searches in their date list."""
+        dates, records = self.by_user.get(user_id, ([], []))
+        return records[bisect_left(dates, start):bisect_right(dates, end)]
+
+
+class Repository:
+    """
+    Typed access to users and participation stored through JSONStorage.
+    
+    Records are validated once, when they are written. Everything read back
+    from storage was written by the API itself, so it is turned into models
+    with ``model_construct`` instead of being re-validated row by row.
+    
+    Lookups read the current storage snapshots. Their indexes are memoized on
+    the snapshot, so they are built once per file version.
+    
+    With a shared dataset reader, single-record lookups (users by username
+    or id, a user's record for a date) are served from shared memory
+    whenever the published generation matches the current file version.
+    It is a lookup cache only: indexes, aggregates and lists are still built
+    from this worker's own snapshots.
+    """
+    
+    def __init__(
+        self,
+        storage: AsyncJSONStorage,
+        shared_dataset: Optional[SharedDatasetReader] = None,
+        metrics: Optional[Metrics] = None
+    ):
+        self.storage = storage
+        self.shared_dataset = shared_dataset
+        self._history: Optional[ParticipationHistoryIndex] = None
+        self._history_flight = SingleFlight("participation_history_index", metrics or get_metrics())
+
+    @staticmethod
+    def trusted_user(user_dict: Dict[str, Any]) -> User:
+        """Build a User from a stored record without validation."""
+        return User.model_construct(**user_dict)
+
+    @staticmethod
+    def trusted_meal_record(record: Dict[str, Any]) -> MealRecord:
+        """Build a MealRecord from a stored record without validation."""
+        return MealRecord.model_construct(**record)
+
+    async def user_indexes(self) -> Tuple[Dict[str, Dict], Dict[int, Dict]]:
+        """Get username and id indexes for the current users.json."""
+        snapshot = await self.storage.snapshot("users.json")
+        return snapshot.derive("user_indexes", build_user_indexes)
+
+    async def participation_index(self) -> Dict[Tuple[int, str], Dict]:
+        """Get the (user_id, date) index for the current participation.json."""
+        snapshot = await self.storage.snapshot("participation.json")
+        return snapshot.derive("by_user_date", build_participation_index)
+
+    async def participation_by_date(self) -> Dict[str, Dict[int, Dict]]:
+        """Get the date -> {user_id: record} index for the current participation.json."""
+        snapshot = await self.storage.snapshot("participation.json")
+        return snapshot.derive("by_date", build_participation_by_date)
+
+    async def history_index(self) -> ParticipationHistoryIndex:
+        """Get the per-user history index for the current participation.json."""
+        snapshot = await self.storage.snapshot("participation.json")
+        index = self._history
+        if index is not None and index.stamp == snapshot.stamp:
+            return index
+        
+        async def build() -> ParticipationHistoryIndex:
+            return await run_in_threadpool(ParticipationHistoryIndex, snapshot.stamp, snapshot.records)
+        
+        index = await self._history_flight.do(snapshot.stamp, build)
+        current = self._history
+        # Never replace an index of a newer version (built or updated meanwhile)
+        if current is None or current.stamp[0] <= index.stamp[0]:
+            self._history = index
+        return index
+
+    async def participation_history(self, user_id: int, start: str, end: str) -> List[Dict]:
+        """
+        Get a user's stored participation records for dates in [start, end].
+        
+        Two binary searches in the user's date list, so the cost depends on
+        the range, not on how much history is stored.
+        """
+        return (await self.history_index()).between(user_id, start, end)
+
+    def participation_written(self, before: Snapshot, after: Snapshot, records: Sequence[Dict[str, Any]]) -> None:
+        """Apply the records written by the write that took participation.json from before to after."""
+        index = self._history
+        # An index built from another version is rebuilt on the next query instead
+        if index is None or index.stamp != before.stamp:
+            return
+        for record in records:
+            index.put(record)
+        index.stamp = after.stamp
+
+    def _fresh_shared_dataset(self, filename: str) -> Optional[SharedDataset]:
+        """The shared dataset, if it was published from the current version of filename."""
+        if self.shared_dataset is None:
+            return None
+        dataset = self.shared_dataset.current()
+        if dataset is None:
+            return None
+        stamp = dataset.users_stamp if filename == "users.json" else dataset.participation_stamp
+        # Right after a write the loader has not republished yet: use our own snapshot
+        return dataset if stamp == self.storage.stamp(filename) else None
+
+    async def get_user_by_username(self, username: str) -> Optional[User]:
+        """Find a user by exact username."""
+        dataset = self._fresh_shared_dataset("users.json")
+        if dataset is not None:
+            user_dict = dataset.user_by_username(username)
+        else:
+            user_dict = (await self.user_indexes())[0].get(username)
+        return self.trusted_user(user_dict) if user_dict is not None else None
+
+    async def get_user_by_id(self, user_id: int) -> Optional[User]:
+        """Find a user by id."""
+        dataset = self._fresh_shared_dataset("users.json")
+        if dataset is not None:
+            user_dict = dataset.user_by_id(user_id)
+        else:
+            user_dict = (await self.user_indexes())[1].get(user_id)
+        return self.trusted_user(user_dict) if user_dict is not None else None
+
+    async def get_meal_record(self, user_id: int, date: str) -> Optional[MealRecord]:
+        """Find the stored participation record for a user on a date."""
+        dataset = self._fresh_shared_dataset("participation.json")
+        if dataset is not None:
+            record = dataset.meal_record(user_id, date)
+        else:
+            record = (await self.participation_index()).get((user_id, date))
+        return self.trusted_meal_record(record) if record is not None else None
+
+    @staticmethod
+    def validate_user(user_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validate a user record before it is written to storage.
+        
+        Raises:
+            pydantic.ValidationError: If the record does not match the User model
+        """
+        return User.model_validate(user_dict).model_dump()
+
+    async def warm_up(self) -> None:
+        """Preload users and participation and build the user indexes."""
+        await self.user_indexes()
+        await self.participation_index()
+
+
+def build_user_indexes(users_data: Sequence[Dict]) -> Tuple[Dict[str, Dict], Dict[int, Dict]]:
+    """Index user records by username and by id."""
+    by_username = {user_dict.get("username"): user_dict for user_dict in users_data}
+    by_id = {user_dict.get("id"): user_dict for user_dict in users_data}
+    return by_username, by_id
+
+
+def build_participation_index(participation_data: Sequence[Dict]) -> Dict[Tuple[int, str], Dict]:
+    """Index participation records by (user_id, date)."""
+    return {(record.get("user_id"), record.get("date")): record for record in participation_data}
+
+
+def build_participation_by_date(participation_data: Sequence[Dict]) -> Dict[str, Dict[int, Dict]]:
+    """Group participation records by date, keyed by user_id."""
+    by_date: Dict[str, Dict[int, Dict]] = {}
+    for record in participation_data:
+        by_date.setdefault(record.get("date"), {})[record.get("user_id")] = record
+    return by_date
+
+
+def build_participation_by_user(participation_data: Sequence[Dict]) -> Dict[int, Tuple[List[str], List[Dict]]]:
+    """Group participation records per user as parallel lists sorted by date."""
+    grouped: Dict[int, List[Dict]] = {}
+    for record in participation_data:
+        grouped.setdefault(record.get("user_id"), []).append(record)
+    
+    by_user: Dict[int, Tuple[List[str], List[Dict]]] = {}
+    for user_id, records in grouped.items():
+        records.sort(key=lambda record: record.get("date"))
+        by_user[user_id] = ([record.get("date") for record in records], records)
+    return by_user
+
+
+_shared_repository: Optional[Repository] = None
+_shared_repository_lock = threading.Lock()
+
+
+def get_repository() -> Repository:
+    """Get the process-wide Repository over the shared storage instance."""
+    global _shared_repository
+    if _shared_repository is None:
+        with _shared_repository_lock:
+            if _shared_repository is None:
+                _shared_repository = Repository(get_async_storage(), get_shared_dataset_reader(), get_metrics())
+    return _shared_repository
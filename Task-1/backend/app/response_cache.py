@@ -0,0 +1,144 @@
+from typing import Awaitable, Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from app.db import AsyncJSONStorage, Snapshot, get_async_storage
+from app.metrics import Metrics, get_metrics
+from app.single_flight import SingleFlight
+from app.work_calendar import SPECIAL_DAYS_FILE
+
+# Files the cached views are computed from
+CACHE_DEPENDENCIES = ("users.json", "participation.json", SPECIAL_DAYS_FILE)
+
+MAX_CACHE_ENTRIES = 512
+
+SCOPE_ALL = "all"
+SCOPE_TEAM = "team"
+
+
+class CacheKey(NamedTuple):
+    endpoint: str
+    date: str
+    scope: str
+    team_id: Optional[int] = None
+    meal_type: Optional[str] = None
+
+
+class ResponseCache:
+    """
+    Rendered JSON bodies of list endpoints, keyed by endpoint, date, role
+    scope, team and meal type.
+
+    Entries are valid for one version of each file in CACHE_DEPENDENCIES (the
+    "synced" stamps). Writes made by this process report themselves through
+    write_applied(): only the entries they affect are dropped (the changed
+    user's team, plus the unscoped views that include everyone) and the
+    synced stamp moves to the new version. Any other change of a dependency
+    (another worker, a calendar edit, a manual edit) clears the whole cache
+    on the next lookup.
+    
+    Misses are rendered through a SingleFlight per endpoint, so concurrent
+    misses for the same key and version share one render.
+    """
+
+    def __init__(self, storage: AsyncJSONStorage, metrics: Metrics, max_entries: int = MAX_CACHE_ENTRIES):
+        self.storage = storage
+        self.metrics = metrics
+        self.max_entries = max_entries
+        self._entries: Dict[CacheKey, bytes] = {}
+        self._synced: Dict[str, Tuple] = {}
+        self._flights: Dict[str, SingleFlight] = {}
+
+    async def sync(self) -> Dict[str, Tuple]:
+        """Drop everything if a dependency changed behind our back; return the synced stamps."""
+        stamps = {}
+        for filename in CACHE_DEPENDENCIES:
+            stamps[filename] = (await self.storage.snapshot(filename)).stamp
+        if stamps != self._synced:
+            self._entries.clear()
+            self._synced = stamps
+        return self._synced
+
+    async def get_or_render(self, key: CacheKey, render: Callable[[], Awaitable[bytes]]) -> bytes:
+        """Return the cached body for key, rendering and storing it on a miss."""
+        synced = await self.sync()
+        body = self._entries.get(key)
+        if body is not None:
+            self.metrics.increment("response_cache.hits")
+            return body
+        
+        self.metrics.increment("response_cache.misses")
+        flight = self._flights.get(key.endpoint)
+        if flight is None:
+            flight = self._flights[key.endpoint] = SingleFlight(key.endpoint, self.metrics)
+        body = await flight.do((key, tuple(synced.get(filename) for filename in CACHE_DEPENDENCIES)), render)
+        # A write may have landed while rendering: only keep bodies for the synced version
+        if synced is self._synced:
+            self._put(key, body)
+        return body
+
+    def _put(self, key: CacheKey, body: bytes) -> None:
+        if len(self._entries) >= self.max_entries:
+            # Oldest first: entries for past dates are never asked for again
+            del self._entries[next(iter(self._entries))]
+        self._entries[key] = body
+
+    def write_applied(
+        self,
+        filename: str,
+        before: Snapshot,
+        after: Snapshot,
+        date: Optional[str] = None,
+        team_ids: Iterable[Optional[int]] = (),
+        meal_types: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        Account for a local write that took filename from before to after.
+
+        Args:
+            date: Only entries for this date are affected (None: every date)
+            team_ids: Teams whose members changed; unscoped entries are always affected
+            meal_types: Meal types that changed (None: all). An empty set means
+                the write did not change any cached view
+        """
+        if filename not in CACHE_DEPENDENCIES:
+            return
+        if self._synced.get(filename) != before.stamp:
+            # Built from some other version; sync() starts over on the next lookup
+            self._entries.clear()
+            self._synced = {}
+            return
+
+        # Replace the dict so a render in flight sees that the version moved
+        self._synced = {**self._synced, filename: after.stamp}
+
+        if meal_types is not None:
+            meal_types = set(meal_types)
+            if not meal_types:
+                return
+        team_ids = set(team_ids)
+
+        for key in [
+            key for key in self._entries
+            if (date is None or key.date == date)
+            and (key.scope == SCOPE_ALL or key.team_id in team_ids)
+            and (meal_types is None or key.meal_type is None or key.meal_type in meal_types)
+        ]:
+            del self._entries[key]
+
+
+def changed_meal_types(old_meals: Dict[str, bool], new_meals: Dict[str, bool]) -> set:
+    """Meal types whose opt-in differs between two meal maps."""
+    return {
+        meal_type for meal_type in set(old_meals) | set(new_meals)
+        if bool(old_meals.get(meal_type, False)) != bool(new_meals.get(meal_type, False))
+    }
+
+
+_shared_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide ResponseCache instance."""
+    global _shared_response_cache
+    if _shared_response_cache is None:
+        _shared_response_cache = ResponseCache(get_async_storage(), get_metrics())
+    return _shared_response_cache
@@ -1,4 +1,4 @@
 # Routers package
-from app.routers import meals, admin, headcount
+from app.routers import meals, admin, headcount, work_calendar
 
-__all__ = ["meals", "admin", "headcount"]
+__all__ = ["meals", "admin", "headcount", "work_calendar"]
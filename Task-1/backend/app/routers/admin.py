@@ -1,36 +1,51 @@
+import os
 from datetime import datetime
-from typing import Dict, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 
-from app.auth import get_current_user
-from app.db import JSONStorage
-from app.models import User, UserRole, MealType, MealRecord
+from app.admission import admit_write
+from app.auth import get_current_user, require_admin
+from app.metrics import get_metrics
+from app.db import get_async_storage
+from app.headcount_snapshots import get_headcount_snapshots
+from app.intervals import date_range, from_ordinal, to_ordinal
+from app.work_calendar import get_work_calendar
+from app.work_locations import get_work_locations
+from app.models import (
+    User, UserRole, UserResponse, MealType, ParticipationHistory, WorkLocation, WorkLocationRecord,
+    DEFAULT_PARTICIPATION_MEALS, MAX_HISTORY_DAYS, UNAVAILABLE_MEALS
+)
+from app.participation_writes import VersionConflict, get_participation_writer, record_etag
+from app.participation_journal import get_participation_journal
+from app.repository import build_participation_index, get_repository
+from app.response_cache import SCOPE_ALL, SCOPE_TEAM, CacheKey, get_response_cache
+from app.user_import import IMPORT_FORMATS, UserImport, UserImportError, parse_rows
+from app.user_search import DEFAULT_SEARCH_LIMIT, get_user_directory
+from app.user_versions import get_user_versions, user_version
+from app.serialization import FastJSONResponse, dumps, participation_history_rows, user_participation_row
 
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
-storage = JSONStorage()
+storage = get_async_storage()
+repository = get_repository()
+headcount_snapshots = get_headcount_snapshots()
+work_calendar = get_work_calendar()
+work_locations = get_work_locations()
+user_directory = get_user_directory()
+response_cache = get_response_cache()
+participation_writer = get_participation_writer()
+participation_journal = get_participation_journal()
+user_versions = get_user_versions()
+metrics = get_metrics()
 
 
 def get_todays_date() -> str:
     return datetime.now().strftime("%Y-%m-%d")
 
 
-def create_default_participation(user_id: int, date: str) -> MealRecord:
-    return MealRecord(
-        user_id=user_id,
-        date=date,
-        meals={
-            MealType.LUNCH: True,
-            MealType.SNACKS: True,
-            MealType.IFTAR: True,
-            MealType.EVENT_DINNER: True,
-            MealType.OPTIONAL_DINNER: True,
-        }
-    )
-
-
 class UserParticipation(BaseModel):
     user_id: int
     username: str
@@ -40,6 +55,7 @@ class UserParticipation(BaseModel):
     team_id: Optional[int] = None
     date: str
     meals: Dict[str, bool]
+    version: int = 0
     
     class Config:
         use_enum_values = True
@@ -50,6 +66,27 @@ class ParticipationUpdateRequest(BaseModel):
     meals: Dict[str, bool]
 
 
+class UserUpdateRequest(BaseModel):
+    role: Optional[UserRole] = None
+    team_id: Optional[int] = None
+    
+    class Config:
+        use_enum_values = True
+
+
+class UserUpdateResponse(UserResponse):
+    version: int
+
+
+class WorkLocationUpdateRequest(BaseModel):
+    target_user_id: int
+    date: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$")
+    location: WorkLocation
+    
+    class Config:
+        use_enum_values = True
+
+
 async def require_admin_or_teamlead_or_logistics(
     current_user: User = Depends(get_current_user)) -> User:
     if current_user.role not in [UserRole.ADMIN.value, UserRole.TEAM_LEAD.value, UserRole.LOGISTICS.value]:
@@ -70,73 +107,294 @@ async def require_admin_or_logistics(
     return current_user
 
 
-@router.get("/participation", response_model=List[UserParticipation])
+class ParticipationChanges(BaseModel):
+    date: str
+    cursor: int
+    full_resync: bool
+    rows: List[UserParticipation]
+
+
+def participation_rows(
+    users_data: Sequence[Dict],
+    participation_index: Dict[Tuple[int, str], Dict],
+    date: str,
+    meals_available: bool,
+    team_id: Optional[int] = None,
+    scoped: bool = False,
+    user_ids: Optional[Set[int]] = None
+) -> List[Dict]:
+    """
+    Build the participation grid rows for a date.
+    
+    Args:
+        team_id: Only members of this team if scoped
+        user_ids: Only these users (None: everyone)
+    """
+    rows = []
+    for user_dict in users_data:
+        if scoped and user_dict.get("team_id") != team_id:
+            continue
+        if user_ids is not None and user_dict.get("id") not in user_ids:
+            continue
+        
+        participation_record = participation_index.get((user_dict.get("id"), date))
+        if not meals_available:
+            meals = UNAVAILABLE_MEALS
+        elif participation_record:
+            meals = participation_record.get("meals", {})
+        else:
+            meals = DEFAULT_PARTICIPATION_MEALS
+        version = participation_record.get("version", 0) if participation_record else 0
+        
+        rows.append(user_participation_row(user_dict, date, meals, version))
+    return rows
+
+
+@router.get("/participation", response_model=List[UserParticipation], response_class=FastJSONResponse)
 async def get_all_participation(
     current_user: User = Depends(require_admin_or_teamlead_or_logistics)):
     today = get_todays_date()
     
-    users_data = storage.read_users()
-    participation_data = storage.read_participation()
+    is_team_lead = current_user.role == UserRole.TEAM_LEAD.value
+    if is_team_lead:
+        cache_key = CacheKey("admin_participation", today, SCOPE_TEAM, current_user.team_id)
+    else:
+        cache_key = CacheKey("admin_participation", today, SCOPE_ALL)
     
-    participation_lookup: Dict[int, Dict] = {}
-    for record in participation_data:
-        if record.get("date") == today:
-            participation_lookup[record.get("user_id")] = record
+    async def render() -> bytes:
+        users_data = await storage.read_users_cached()
+        participation_index = await repository.participation_index()
+        meals_available = await work_calendar.meals_available(today)
+        
+        # Rows come straight from stored records, so they skip User/UserParticipation
+        # model construction and response_model re-validation
+        def build_rows() -> bytes:
+            return dumps(participation_rows(
+                users_data, participation_index, today, meals_available,
+                team_id=current_user.team_id, scoped=is_team_lead
+            ))
+        
+        # Off the event loop, so concurrent misses can coalesce onto this render
+        return await run_in_threadpool(build_rows)
+    
+    return FastJSONResponse(await response_cache.get_or_render(cache_key, render))
+
+
+@router.get("/participation/changes", response_model=ParticipationChanges, response_class=FastJSONResponse)
+async def get_participation_changes(
+    since: Optional[int] = Query(default=None, ge=0),
+    current_user: User = Depends(require_admin_or_teamlead_or_logistics)):
+    """
+    Rows of today's participation grid that changed after the since cursor.
+    
+    Pass the cursor of the previous response as since. When the changes
+    cannot be listed (no or expired cursor, journal reset or truncated, a
+    new day, users or the calendar changed), full_resync is true and rows
+    holds the whole grid, as GET /participation returns it. Team Leads only
+    see their team.
+    """
+    journal_read = await run_in_threadpool(participation_journal.read, since)
+    today = get_todays_date()
+    is_team_lead = current_user.role == UserRole.TEAM_LEAD.value
     
-    result = []
+    users_data = await storage.read_users_cached()
+    participation_index = journal_read.participation.derive("by_user_date", build_participation_index)
+    meals_available = await work_calendar.meals_available(today)
     
-    for user_dict in users_data:
-        user = User(**user_dict)
+    user_ids = None
+    if journal_read.keys is not None:
+        user_ids = {user_id for user_id, date in journal_read.keys if date == today}
+    
+    rows = participation_rows(
+        users_data, participation_index, today, meals_available,
+        team_id=current_user.team_id, scoped=is_team_lead, user_ids=user_ids
+    )
+    
+    return FastJSONResponse({
+        "date": today,
+        "cursor": journal_read.cursor,
+        "full_resync": journal_read.keys is None,
+        "rows": rows,
+    })
 
-        if current_user.role == UserRole.TEAM_LEAD.value:
-            if user.team_id != current_user.team_id:
-                continue
-        
-        participation_record = participation_lookup.get(user.id)
-        if participation_record:
-            meals = participation_record.get("meals", {})
+
+@router.get("/metrics")
+async def get_runtime_metrics(current_user: User = Depends(require_admin)):
+    """Counters of this worker process (cache hits, coalesced requests, ...)."""
+    return {"pid": os.getpid(), "counters": metrics.snapshot()}
+
+
+@router.get("/users/search", response_model=List[UserResponse], response_class=FastJSONResponse)
+async def search_users(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(default=DEFAULT_SEARCH_LIMIT, ge=1, le=50),
+    current_user: User = Depends(require_admin_or_teamlead_or_logistics)):
+    
+    is_team_lead = current_user.role == UserRole.TEAM_LEAD.value
+    matches = await user_directory.search(q, limit, team_id=current_user.team_id, scoped=is_team_lead)
+    
+    return FastJSONResponse([
+        {
+            "id": user_dict.get("id"),
+            "username": user_dict.get("username"),
+            "name": user_dict.get("name"),
+            "email": user_dict.get("email"),
+            "role": user_dict.get("role"),
+            "team_id": user_dict.get("team_id"),
+        }
+        for user_dict in matches
+    ])
+
+
+@router.post("/users/import", dependencies=[Depends(require_admin), Depends(admit_write)])
+async def import_users(
+    request: Request,
+    format: Optional[str] = Query(default=None),
+    dry_run: bool = Query(default=False),
+    current_user: User = Depends(require_admin)):
+    """
+    Register many users at once from a CSV or JSON request body.
+    
+    The format is taken from the format parameter, or from the Content-Type
+    (text/csv for CSV, JSON otherwise). Invalid or duplicate rows are
+    reported per row and skipped; all other users are added in one write.
+    With dry_run the rows are only validated.
+    """
+    content_type = request.headers.get("content-type", "")
+    fmt = format or ("csv" if content_type.startswith("text/csv") else "json")
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid format: {fmt}. Valid formats are: {', '.join(IMPORT_FORMATS)}"
+        )
+    
+    try:
+        user_import = UserImport(parse_rows((await request.body()).decode("utf-8-sig"), fmt))
+        user_import.prepare(await storage.read_users_cached())
+    except (UserImportError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    if not dry_run:
+        # bcrypt dominates; hash on worker threads before taking the users.json lock
+        await run_in_threadpool(user_import.hash)
+        created, before, after = await storage.update_versioned("users.json", user_import.commit)
+        user_directory.users_added(before, after, created)
+        response_cache.write_applied(
+            "users.json", before, after,
+            team_ids={user_dict.get("team_id") for user_dict in created}
+        )
+    
+    return {**user_import.summary(), "dry_run": dry_run}
+
+
+@router.patch("/users/{user_id}", response_model=UserUpdateResponse, dependencies=[Depends(require_admin), Depends(admit_write)])
+async def update_user(
+    user_id: int,
+    update_data: UserUpdateRequest,
+    current_user: User = Depends(require_admin)):
+    """
+    Change a user's role and/or team (fields left out are kept; a null
+    team_id removes the user from their team).
+    
+    A change increments the user's version, so their existing access tokens
+    are looked up again instead of trusted for their old role and team, and
+    frozen headcounts are recounted for the new team.
+    """
+    changes = {field: getattr(update_data, field) for field in update_data.model_fields_set}
+    if "role" in changes and changes["role"] is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="role cannot be null")
+    
+    def apply(users_data):
+        for i, user_dict in enumerate(users_data):
+            if user_dict.get("id") == user_id:
+                break
         else:
-            default_record = create_default_participation(user.id, today)
-            meals = default_record.meals
-        
-        result.append(UserParticipation(
-            user_id=user.id,
-            username=user.username,
-            name=user.name,
-            email=user.email,
-            role=user.role,
-            team_id=user.team_id,
-            date=today,
-            meals=meals
-        ))
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User with id {user_id} not found"
+            )
+        if all(user_dict.get(field) == value for field, value in changes.items()):
+            return user_dict, user_dict
+        # Records are shared with published snapshots: replace, never mutate
+        users_data[i] = repository.validate_user({**user_dict, **changes, "version": user_version(user_dict) + 1})
+        return user_dict, users_data[i]
+    
+    (old_user, new_user), before, after = await storage.update_versioned("users.json", apply)
+    if new_user is not old_user:
+        user_versions.invalidate()
+        response_cache.write_applied(
+            "users.json", before, after, team_ids={old_user.get("team_id"), new_user.get("team_id")}
+        )
+        today = get_todays_date()
+        await headcount_snapshots.refreeze_range(today, from_ordinal(to_ordinal(today) + 1))
+    
+    return {
+        "id": new_user.get("id"),
+        "username": new_user.get("username"),
+        "name": new_user.get("name"),
+        "email": new_user.get("email"),
+        "role": new_user.get("role"),
+        "team_id": new_user.get("team_id"),
+        "version": user_version(new_user),
+    }
+
+
+@router.get("/participation/history", response_model=ParticipationHistory, response_class=FastJSONResponse)
+async def get_user_participation_history(
+    user_id: int,
+    days: int = Query(default=7, ge=1, le=MAX_HISTORY_DAYS),
+    current_user: User = Depends(require_admin_or_teamlead_or_logistics)):
+    
+    target_user = await repository.get_user_by_id(user_id)
+    
+    if target_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with id {user_id} not found"
+        )
+    
+    if current_user.role == UserRole.TEAM_LEAD.value and target_user.team_id != current_user.team_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="TeamLead can only view users in their team"
+        )
+    
+    end = get_todays_date()
+    start = from_ordinal(to_ordinal(end) - days + 1)
     
-    return result
+    records = await repository.participation_history(user_id, start, end)
+    calendar_days = (await work_calendar.view()).resolve(start, end)
+    
+    return FastJSONResponse({
+        "user_id": user_id,
+        "start": start,
+        "end": end,
+        "days": participation_history_rows(date_range(start, end), records, calendar_days),
+    })
 
 
-@router.put("/participation", response_model=UserParticipation)
+@router.put("/participation", response_model=UserParticipation, dependencies=[Depends(require_admin_or_teamlead_or_logistics), Depends(admit_write)])
 async def update_user_participation(
     update_data: ParticipationUpdateRequest,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
     current_user: User = Depends(get_current_user)):
+    """
+    Change a user's meals for today.
     
+    With If-Match, the update applies only if the record is still at that
+    ETag; otherwise 412 is returned with the current ETag.
+    """
     today = get_todays_date()
     
-    users_data = storage.read_users()
-    participation_data = storage.read_participation()
-    
-    target_user_dict = None
-    for user_dict in users_data:
-        if user_dict.get("id") == update_data.target_user_id:
-            target_user_dict = user_dict
-            break
+    target_user = await repository.get_user_by_id(update_data.target_user_id)
     
-    if target_user_dict is None:
+    if target_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with id {update_data.target_user_id} not found"
         )
     
-    target_user = User(**target_user_dict)
-    
     if current_user.role == UserRole.TEAM_LEAD:
         if target_user.team_id != current_user.team_id:
             raise HTTPException(
@@ -157,24 +415,24 @@ async def update_user_participation(
                 detail=f"Invalid meal type: {meal_type}. Valid types are: {', '.join(valid_meal_types)}"
             )
     
-    record_index = None
-    for i, record in enumerate(participation_data):
-        if record.get("user_id") == update_data.target_user_id and record.get("date") == today:
-            record_index = i
-            break
-    
-    if record_index is None:
-        new_record = create_default_participation(update_data.target_user_id, today)
-        new_record_dict = new_record.model_dump()
-        participation_data.append(new_record_dict)
-        record_index = len(participation_data) - 1
-    
-    participation_data[record_index]["meals"].update(update_data.meals)
-    
-    storage.write_participation(participation_data)
+    if not await work_calendar.meals_available(today):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Meals are not available on {today}: the office is closed"
+        )
     
-    updated_record = participation_data[record_index]
+    try:
+        _, updated_record = await participation_writer.update(
+            target_user.id, target_user.team_id, today, update_data.meals, if_match
+        )
+    except VersionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=str(e),
+            headers={"ETag": record_etag(e.record)}
+        )
     
+    response.headers["ETag"] = record_etag(updated_record)
     return UserParticipation(
         user_id=target_user.id,
         username=target_user.username,
@@ -183,6 +441,49 @@ async def update_user_participation(
         role=target_user.role,
         team_id=target_user.team_id,
         date=today,
-        meals=updated_record["meals"]
+        meals=updated_record["meals"],
+        version=updated_record["version"]
     )
 
+
+@router.put("/location", response_model=WorkLocationRecord)
+async def update_user_work_location(
+    update_data: WorkLocationUpdateRequest,
+    current_user: User = Depends(get_current_user)):
+    
+    target_user = await repository.get_user_by_id(update_data.target_user_id)
+    
+    if target_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with id {update_data.target_user_id} not found"
+        )
+    
+    if current_user.role == UserRole.TEAM_LEAD:
+        if target_user.team_id != current_user.team_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="TeamLead can only update users in their team"
+            )
+    elif current_user.role != UserRole.ADMIN.value:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only Admin or TeamLead (for team members) can correct work locations"
+        )
+    
+    try:
+        to_ordinal(update_data.date)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid date: {update_data.date}. Expected YYYY-MM-DD"
+        )
+    
+    record = await work_locations.set_location(
+        target_user.id,
+        target_user.team_id,
+        update_data.date,
+        update_data.location
+    )
+    
+    return WorkLocationRecord(**record)
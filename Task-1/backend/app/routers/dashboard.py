@@ -0,0 +1,246 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from app.auth import get_current_user
+from app.db import get_async_storage
+from app.headcount_snapshots import MEAL_TYPES, compute_headcount, get_headcount_snapshots
+from app.models import User, UserRole, UserResponse, WorkLocation, DEFAULT_PARTICIPATION_MEALS, UNAVAILABLE_MEALS
+from app.repository import build_participation_index, build_user_indexes
+from app.work_calendar import get_work_calendar
+from app.work_locations import get_work_locations
+from app.serialization import FastJSONResponse, meal_count_rows, user_participation_row
+
+
+router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
+
+storage = get_async_storage()
+headcount_snapshots = get_headcount_snapshots()
+work_calendar = get_work_calendar()
+work_locations = get_work_locations()
+
+# Sections each role's landing page shows, in response order
+ROLE_SECTIONS: Dict[str, Tuple[str, ...]] = {
+    UserRole.EMPLOYEE.value: ("user", "meals", "location"),
+    UserRole.TEAM_LEAD.value: ("user", "meals", "location", "team"),
+    UserRole.ADMIN.value: ("user", "meals", "location", "headcount"),
+    UserRole.LOGISTICS.value: ("user", "meals", "location", "headcount"),
+}
+
+ALL_SECTIONS = ("user", "meals", "location", "headcount", "team")
+
+
+def get_todays_date() -> str:
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+class DashboardMeals(BaseModel):
+    user_id: int
+    date: str
+    meals: Dict[str, bool]
+    version: int = 0
+    meals_available: bool
+
+
+class DashboardLocation(BaseModel):
+    location: WorkLocation
+    is_default: bool
+
+    class Config:
+        use_enum_values = True
+
+
+class DashboardMealCount(BaseModel):
+    meal_type: str
+    total_employees: int
+    opted_in: int
+    opted_out: int
+    opted_in_percentage: float
+    opted_out_percentage: float
+
+
+class DashboardTeamCount(BaseModel):
+    team_id: Optional[int] = None
+    total_employees: int
+    meal_counts: Dict[str, int]
+
+
+class DashboardHeadcount(BaseModel):
+    total_employees: int
+    meal_counts: List[DashboardMealCount]
+    teams: List[DashboardTeamCount]
+    frozen: bool
+
+
+class DashboardTeamMember(BaseModel):
+    user_id: int
+    username: str
+    name: str
+    email: str
+    role: str
+    team_id: Optional[int] = None
+    date: str
+    meals: Dict[str, bool]
+
+
+class DashboardTeam(BaseModel):
+    team_id: Optional[int] = None
+    total_employees: int
+    meal_counts: List[DashboardMealCount]
+    members: List[DashboardTeamMember]
+
+
+class Dashboard(BaseModel):
+    date: str
+    sections: List[str]
+    user: Optional[UserResponse] = None
+    meals: Optional[DashboardMeals] = None
+    location: Optional[DashboardLocation] = None
+    headcount: Optional[DashboardHeadcount] = None
+    team: Optional[DashboardTeam] = None
+
+
+def select_sections(role: str, fields: Optional[str]) -> Tuple[str, ...]:
+    """
+    Resolve the fields query parameter against the sections a role may see.
+    
+    Raises:
+        HTTPException: 400 for unknown section names, 403 for sections of other roles
+    """
+    allowed = ROLE_SECTIONS.get(role, ())
+    if fields is None:
+        return allowed
+    
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in ALL_SECTIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown dashboard fields: {', '.join(unknown)}. Valid fields are: {', '.join(ALL_SECTIONS)}"
+        )
+    forbidden = [field for field in requested if field not in allowed]
+    if forbidden:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"{role} cannot access dashboard fields: {', '.join(forbidden)}"
+        )
+    return tuple(section for section in allowed if section in requested)
+
+
+def user_meals(participation_index: Dict[Tuple[int, str], Dict], user_id: int, date: str, meals_available: bool) -> Tuple[Dict[str, bool], int]:
+    """A user's meals and record version for a date, as GET /api/meals/today shows them."""
+    if not meals_available:
+        return UNAVAILABLE_MEALS, 0
+    record = participation_index.get((user_id, date))
+    if record is None:
+        return DEFAULT_PARTICIPATION_MEALS, 0
+    return record.get("meals", {}), record.get("version", 0)
+
+
+def team_section(
+    users_data: Sequence[Dict],
+    participation_index: Dict[Tuple[int, str], Dict],
+    team_id: Optional[int],
+    date: str,
+    meals_available: bool
+) -> Dict[str, Any]:
+    """A team's members with their meals for a date and the team's opt-in counts."""
+    members = []
+    meal_counts = {meal_type: 0 for meal_type in MEAL_TYPES}
+    for user_dict in users_data:
+        if user_dict.get("team_id") != team_id:
+            continue
+        meals, _ = user_meals(participation_index, user_dict.get("id"), date, meals_available)
+        for meal_type in MEAL_TYPES:
+            if meals.get(meal_type, False):
+                meal_counts[meal_type] += 1
+        members.append(user_participation_row(user_dict, date, meals))
+    
+    return {
+        "team_id": team_id,
+        "total_employees": len(members),
+        "meal_counts": meal_count_rows(len(members), meal_counts),
+        "members": members,
+    }
+
+
+@router.get("", response_model=Dashboard, response_class=FastJSONResponse)
+async def get_dashboard(
+    fields: Optional[str] = Query(default=None, description="Comma-separated sections, e.g. user,meals (default: all for the role)"),
+    current_user: User = Depends(get_current_user)):
+    """
+    Everything the current user's landing page shows, in one response.
+    
+    Sections depend on the role: every user gets user, meals and location;
+    Team Leads also get team, Admin and Logistics get headcount. All
+    sections are computed from the same versions of the users,
+    participation and calendar data.
+    """
+    sections = select_sections(current_user.role, fields)
+    today = get_todays_date()
+    
+    users_snapshot = await storage.snapshot("users.json")
+    participation_snapshot = await storage.snapshot("participation.json")
+    calendar_view = await work_calendar.view()
+    
+    users_data = users_snapshot.records
+    user_dict = users_snapshot.derive("user_indexes", build_user_indexes)[1].get(current_user.id)
+    if user_dict is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    participation_index = participation_snapshot.derive("by_user_date", build_participation_index)
+    meals_available = calendar_view.meals_available(today)
+    
+    dashboard: Dict[str, Any] = {"date": today, "sections": list(sections)}
+    
+    if "user" in sections:
+        dashboard["user"] = {
+            "id": user_dict.get("id"),
+            "username": user_dict.get("username"),
+            "name": user_dict.get("name"),
+            "email": user_dict.get("email"),
+            "role": user_dict.get("role"),
+            "team_id": user_dict.get("team_id"),
+        }
+    
+    if "meals" in sections:
+        meals, version = user_meals(participation_index, current_user.id, today, meals_available)
+        dashboard["meals"] = {
+            "user_id": current_user.id,
+            "date": today,
+            "meals": meals,
+            "version": version,
+            "meals_available": meals_available,
+        }
+    
+    if "location" in sections:
+        record = (await work_locations.index()).get((current_user.id, today))
+        if record is not None:
+            dashboard["location"] = {"location": record["location"], "is_default": False}
+        else:
+            default_location = WorkLocation.WFH.value if calendar_view.is_wfh(today) else WorkLocation.OFFICE.value
+            dashboard["location"] = {"location": default_location, "is_default": True}
+    
+    if "headcount" in sections:
+        headcount = await headcount_snapshots.get(today)
+        frozen = headcount is not None
+        if not frozen:
+            headcount = await run_in_threadpool(compute_headcount, users_data, participation_index, today, meals_available)
+        dashboard["headcount"] = {
+            "total_employees": headcount["total_employees"],
+            "meal_counts": meal_count_rows(headcount["total_employees"], headcount["meals"]),
+            "teams": [
+                {"team_id": team["team_id"], "total_employees": team["total_employees"], "meal_counts": team["meals"]}
+                for team in headcount["teams"].values()
+            ],
+            "frozen": frozen,
+        }
+    
+    if "team" in sections:
+        dashboard["team"] = team_section(users_data, participation_index, user_dict.get("team_id"), today, meals_available)
+    
+    return FastJSONResponse(dashboard)
@@ -1,15 +1,33 @@
 from datetime import datetime
 from typing import Dict, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
+from app.analytics import get_analytics
 from app.auth import get_current_user
-from app.db import JSONStorage
-from app.models import User, UserRole, MealType
+from app.db import get_async_storage
+from app.headcount_snapshots import MEAL_TYPES, compute_headcount, get_headcount_snapshots, team_key
+from app.intervals import date_range, to_ordinal
+from app.models import User, UserRole, MealType, WorkLocation, MEALS_UNAVAILABLE_DAY_TYPES
+from app.metrics import get_metrics
+from app.repository import get_repository
+from app.response_cache import SCOPE_ALL, CacheKey, get_response_cache
+from app.work_calendar import SPECIAL_DAYS_FILE, get_work_calendar
+from app.work_locations import get_work_locations, split_by_location
+from app.serialization import FastJSONResponse, dumps, meal_count_rows, meal_user_row
+from app.single_flight import SingleFlight
 
 
 router = APIRouter(prefix="/api/headcount", tags=["headcount"])
 
-storage = JSONStorage()
+storage = get_async_storage()
+repository = get_repository()
+headcount_snapshots = get_headcount_snapshots()
+work_calendar = get_work_calendar()
+work_locations = get_work_locations()
+response_cache = get_response_cache()
+headcount_flight = SingleFlight("headcount_summary", get_metrics())
+analytics = get_analytics()
 
 
 def get_todays_date() -> str:
@@ -36,10 +54,65 @@ class MealCountSummary(BaseModel):
     opted_out_percentage: float = Field(..., ge=0, le=100)
 
 
+class TeamHeadcount(BaseModel):
+    team_id: Optional[int] = None
+    total_employees: int
+    meal_counts: Dict[str, int]
+    location_counts: Dict[str, int] = {}
+
+
 class HeadcountSummary(BaseModel):
     date: str
     total_employees: int
     meal_counts: List[MealCountSummary]
+    location_counts: Dict[str, int] = {}
+    teams: List[TeamHeadcount] = []
+    frozen: bool = False
+
+
+class DailyHeadcount(BaseModel):
+    date: str
+    total_employees: int
+    meals_available: bool
+    special_day_type: Optional[str] = None
+    wfh: bool
+    meal_counts: Dict[str, int]
+    location_counts: Dict[str, int]
+
+
+MAX_RANGE_DAYS = 366
+
+
+MAX_FORECAST_HISTORY_DAYS = 731
+MAX_FORECAST_HORIZON_DAYS = 31
+
+
+class ForecastMealCount(BaseModel):
+    registered: int
+    forecast: int
+
+
+class ForecastDay(BaseModel):
+    date: str
+    meals_available: bool
+    meals: Dict[str, ForecastMealCount]
+
+
+class TeamOptInRates(BaseModel):
+    team_id: Optional[int] = None
+    total_employees: int
+    meal_rates: Dict[str, float]
+
+
+class HeadcountForecast(BaseModel):
+    date: str
+    history_start: str
+    history_days: int
+    total_employees: int
+    meal_rates: Dict[str, float]
+    teams: List[TeamOptInRates]
+    weekday_factors: Dict[str, Dict[str, float]]
+    forecast: List[ForecastDay]
 
 
 class MealUserDetail(BaseModel):
@@ -61,60 +134,133 @@ async def get_headcount_summary(
     current_user: User = Depends(require_admin_or_logistics)):
     today = get_todays_date()
     
-    users_data = storage.read_users()
-    participation_data = storage.read_participation()
-    
-    participation_lookup: Dict[int, Dict] = {}
-    for record in participation_data:
-        if record.get("date") == today:
-            participation_lookup[record.get("user_id")] = record
+    headcount = await headcount_snapshots.get(today)
+    frozen = headcount is not None
+    if not frozen:
+        async def count() -> Dict:
+            users_data = await storage.read_users_cached()
+            participation_index = await repository.participation_index()
+            meals_available = await work_calendar.meals_available(today)
+            return await run_in_threadpool(compute_headcount, users_data, participation_index, today, meals_available)
+        
+        # Dashboards poll together: concurrent requests for the same data versions share one count
+        versions = await storage.stamps("users.json", "participation.json", SPECIAL_DAYS_FILE)
+        headcount = await headcount_flight.do((today, versions), count)
     
-    total_employees = len(users_data)
+    total_employees = headcount["total_employees"]
     
-    meal_counts = {}
-    for meal_type in MealType:
-        meal_counts[meal_type] = {"opted_in": 0, "opted_out": 0}
+    meal_count_summaries = [
+        MealCountSummary(**row)
+        for row in meal_count_rows(total_employees, {meal_type: headcount["meals"][meal_type] for meal_type in MEAL_TYPES})
+    ]
     
-    for user_dict in users_data:
-        user_id = user_dict.get("id")
-        participation_record = participation_lookup.get(user_id)
-        
-        for meal_type in MealType:
-            if participation_record:
-                meals = participation_record.get("meals", {})
-                opted_in = meals.get(meal_type.value, False)
-            else:
-                opted_in = True
-            
-            if opted_in:
-                meal_counts[meal_type]["opted_in"] += 1
-            else:
-                meal_counts[meal_type]["opted_out"] += 1
+    location_counts, team_locations = await work_locations.split(
+        today,
+        {key: team["total_employees"] for key, team in headcount["teams"].items()}
+    )
     
-    meal_count_summaries = []
-    for meal_type in MealType:
-        opted_in = meal_counts[meal_type]["opted_in"]
-        opted_out = meal_counts[meal_type]["opted_out"]
-        opted_in_percentage = (opted_in / total_employees * 100) if total_employees > 0 else 0.0
-        opted_out_percentage = (opted_out / total_employees * 100) if total_employees > 0 else 0.0
-        
-        meal_count_summaries.append(MealCountSummary(
-            meal_type=meal_type.value,
-            total_employees=total_employees,
-            opted_in=opted_in,
-            opted_out=opted_out,
-            opted_in_percentage=round(opted_in_percentage, 2),
-            opted_out_percentage=round(opted_out_percentage, 2)
-        ))
+    team_summaries = [
+        TeamHeadcount(
+            team_id=team["team_id"],
+            total_employees=team["total_employees"],
+            meal_counts=team["meals"],
+            location_counts=team_locations[key]
+        )
+        for key, team in headcount["teams"].items()
+    ]
     
     return HeadcountSummary(
         date=today,
         total_employees=total_employees,
-        meal_counts=meal_count_summaries
+        meal_counts=meal_count_summaries,
+        location_counts=location_counts,
+        teams=team_summaries,
+        frozen=frozen
     )
 
 
-@router.get("/{meal_type}", response_model=MealUserList)
+@router.get("/range", response_model=List[DailyHeadcount], response_class=FastJSONResponse)
+async def get_headcount_range(
+    start: str = Query(..., pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    end: str = Query(..., pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    current_user: User = Depends(require_admin_or_logistics)):
+    try:
+        range_days = to_ordinal(end) - to_ordinal(start) + 1
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start and end must be valid dates (YYYY-MM-DD)"
+        )
+    if range_days < 1 or range_days > MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range must cover 1 to {MAX_RANGE_DAYS} days"
+        )
+    
+    users_data = await storage.read_users_cached()
+    participation_by_date = await repository.participation_by_date()
+    calendar_view = await work_calendar.view()
+    location_counts_by_date = await work_locations.counts_by_date()
+    
+    user_ids = {user_dict.get("id") for user_dict in users_data}
+    total_employees = len(users_data)
+    team_sizes: Dict[str, int] = {}
+    for user_dict in users_data:
+        key = team_key(user_dict.get("team_id"))
+        team_sizes[key] = team_sizes.get(key, 0) + 1
+    
+    # Special days and WFH periods for the whole range in one sweep
+    calendar_days = calendar_view.resolve(start, end)
+    
+    result = []
+    for date in date_range(start, end):
+        calendar_day = calendar_days.get(date, {})
+        special_day = calendar_day.get("special_day")
+        meals_available = special_day is None or special_day.get("day_type") not in MEALS_UNAVAILABLE_DAY_TYPES
+        
+        meal_counts = {meal_type: 0 for meal_type in MEAL_TYPES}
+        if meals_available:
+            records = [
+                record for user_id, record in participation_by_date.get(date, {}).items()
+                if user_id in user_ids
+            ]
+            # Users without a record are opted in to every meal
+            defaults = total_employees - len(records)
+            for meal_type in MEAL_TYPES:
+                meal_counts[meal_type] = defaults + sum(
+                    1 for record in records if record.get("meals", {}).get(meal_type, False)
+                )
+        
+        wfh = "wfh_periods" in calendar_day
+        default_location = WorkLocation.WFH.value if wfh else WorkLocation.OFFICE.value
+        location_counts, _ = split_by_location(team_sizes, location_counts_by_date.get(date, {}), default_location)
+        
+        result.append({
+            "date": date,
+            "total_employees": total_employees,
+            "meals_available": meals_available,
+            "special_day_type": special_day.get("day_type") if special_day else None,
+            "wfh": wfh,
+            "meal_counts": meal_counts,
+            "location_counts": location_counts,
+        })
+    
+    return FastJSONResponse(result)
+
+
+@router.get("/forecast", response_model=HeadcountForecast, response_class=FastJSONResponse)
+async def get_headcount_forecast(
+    history_days: int = Query(default=365, ge=14, le=MAX_FORECAST_HISTORY_DAYS),
+    horizon: int = Query(default=7, ge=1, le=MAX_FORECAST_HORIZON_DAYS),
+    current_user: User = Depends(require_admin_or_logistics)):
+    """
+    Opt-in rates (overall, per team, per weekday) over the last history_days
+    and forecast opt-ins for the next horizon days.
+    """
+    return FastJSONResponse(await analytics.forecast(get_todays_date(), history_days, horizon))
+
+
+@router.get("/{meal_type}", response_model=MealUserList, response_class=FastJSONResponse)
 async def get_meal_users(
     meal_type: str,
     current_user: User = Depends(require_admin_or_logistics)):
@@ -127,36 +273,34 @@ async def get_meal_users(
             detail=f"Invalid meal type: {meal_type}. Valid types are: {', '.join(sorted(valid_meal_types))}"
         )
     
-    users_data = storage.read_users()
-    participation_data = storage.read_participation()
-    
-    participation_lookup: Dict[int, Dict] = {}
-    for record in participation_data:
-        if record.get("date") == today:
-            participation_lookup[record.get("user_id")] = record
-    
-    opted_in_users = []
-    for user_dict in users_data:
-        user_id = user_dict.get("id")
-        participation_record = participation_lookup.get(user_id)
+    async def render() -> bytes:
+        users_data = await storage.read_users_cached()
+        participation_index = await repository.participation_index()
+        meals_available = await work_calendar.meals_available(today)
         
-        if participation_record:
-            meals = participation_record.get("meals", {})
-            opted_in = meals.get(meal_type, False)
-        else:
-            opted_in = True
+        def build_rows() -> bytes:
+            opted_in_users = []
+            for user_dict in users_data if meals_available else ():
+                user_id = user_dict.get("id")
+                participation_record = participation_index.get((user_id, today))
+                
+                if participation_record:
+                    meals = participation_record.get("meals", {})
+                    opted_in = meals.get(meal_type, False)
+                else:
+                    opted_in = True
+                
+                if opted_in:
+                    opted_in_users.append(meal_user_row(user_dict))
+            
+            return dumps({
+                "meal_type": meal_type,
+                "date": today,
+                "opted_in_count": len(opted_in_users),
+                "users": opted_in_users
+            })
         
-        if opted_in:
-            opted_in_users.append(MealUserDetail(
-                user_id=user_dict.get("id"),
-                name=user_dict.get("name"),
-                team_id=user_dict.get("team_id"),
-                team_name=None
-            ))
+        return await run_in_threadpool(build_rows)
     
-    return MealUserList(
-        meal_type=meal_type,
-        date=today,
-        opted_in_count=len(opted_in_users),
-        users=opted_in_users
-    )
+    cache_key = CacheKey("meal_users", today, SCOPE_ALL, meal_type=meal_type)
+    return FastJSONResponse(await response_cache.get_or_render(cache_key, render))
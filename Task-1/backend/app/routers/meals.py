@@ -1,83 +1,119 @@
 from datetime import datetime
-from typing import Dict
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from typing import Dict, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from pydantic import BaseModel, Field
+from app.admission import admit_write
 from app.auth import get_current_user
-from app.db import JSONStorage
-from app.models import User, MealType, MealRecord
+from app.intervals import date_range, from_ordinal, to_ordinal
+from app.work_calendar import get_work_calendar
+from app.work_locations import get_work_locations
+from app.models import (
+    User, MealType, MealRecord, ParticipationHistory, WorkLocation,
+    MAX_HISTORY_DAYS, UNAVAILABLE_MEALS
+)
+from app.participation_writes import VersionConflict, get_participation_writer, participation_etag, record_etag
+from app.repository import Repository, get_repository
+from app.serialization import FastJSONResponse, participation_history_rows
 
 
 router = APIRouter(prefix="/api/meals", tags=["meals"])
 
-storage = JSONStorage()
+repository = get_repository()
+work_calendar = get_work_calendar()
+work_locations = get_work_locations()
+participation_writer = get_participation_writer()
 
 
 def get_todays_date() -> str:
     return datetime.now().strftime("%Y-%m-%d")
 
 
-def create_default_participation(user_id: int, date: str) -> MealRecord:
-    return MealRecord(
-        user_id=user_id,
-        date=date,
-        meals={
-            MealType.LUNCH: True,
-            MealType.SNACKS: True,
-            MealType.IFTAR: True,
-            MealType.EVENT_DINNER: True,
-            MealType.OPTIONAL_DINNER: True,
-        }
-    )
-
-
 class ParticipationUpdate(BaseModel):
     meals: Dict[str, bool]
 
 
+class WorkLocationUpdate(BaseModel):
+    date: Optional[str] = Field(default=None, pattern=r"^\d{4}-\d{2}-\d{2}$")
+    location: WorkLocation
+    
+    class Config:
+        use_enum_values = True
+
+
+class WorkLocationStatus(BaseModel):
+    user_id: int
+    date: str
+    location: WorkLocation
+    is_default: bool
+    
+    class Config:
+        use_enum_values = True
+
+
+def ensure_valid_date(date: str) -> None:
+    try:
+        to_ordinal(date)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid date: {date}. Expected YYYY-MM-DD"
+        )
+
+
 @router.get("/today", response_model=MealRecord)
-async def get_todays_participation(current_user: User = Depends(get_current_user)):
+async def get_todays_participation(response: Response, current_user: User = Depends(get_current_user)):
     today = get_todays_date()
     
-    participation_data = storage.read_participation()
+    if not await work_calendar.meals_available(today):
+        return Repository.trusted_meal_record({
+            "user_id": current_user.id,
+            "date": today,
+            "meals": dict(UNAVAILABLE_MEALS),
+        })
     
-    existing_record = None
-    for record in participation_data:
-        if record.get("user_id") == current_user.id and record.get("date") == today:
-            existing_record = record
-            break
+    cached_record = await repository.get_meal_record(current_user.id, today)
+    if cached_record is not None:
+        response.headers["ETag"] = participation_etag(cached_record.user_id, cached_record.date, cached_record.version)
+        return cached_record
     
-    if existing_record:
-        return MealRecord(**existing_record)
+    record = await participation_writer.ensure(current_user.id, current_user.team_id, today)
+    response.headers["ETag"] = record_etag(record)
     
-    new_record = create_default_participation(current_user.id, today)
-    new_record_dict = new_record.model_dump()
+    return Repository.trusted_meal_record(record)
+
+
+@router.get("/history", response_model=ParticipationHistory, response_class=FastJSONResponse)
+async def get_participation_history(
+    days: int = Query(default=7, ge=1, le=MAX_HISTORY_DAYS),
+    current_user: User = Depends(get_current_user)):
+    end = get_todays_date()
+    start = from_ordinal(to_ordinal(end) - days + 1)
     
-    participation_data.append(new_record_dict)
-    storage.write_participation(participation_data)
+    records = await repository.participation_history(current_user.id, start, end)
+    calendar_days = (await work_calendar.view()).resolve(start, end)
     
-    return new_record
+    return FastJSONResponse({
+        "user_id": current_user.id,
+        "start": start,
+        "end": end,
+        "days": participation_history_rows(date_range(start, end), records, calendar_days),
+    })
 
 
-@router.put("/participation", response_model=MealRecord)
+@router.put("/participation", response_model=MealRecord, dependencies=[Depends(admit_write)])
 async def update_participation(
     update_data: ParticipationUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(default=None),
     current_user: User = Depends(get_current_user)
 ):
-    today = get_todays_date()
+    """
+    Change the current user's meals for today.
     
-    participation_data = storage.read_participation()
-    
-    record_index = None
-    for i, record in enumerate(participation_data):
-        if record.get("user_id") == current_user.id and record.get("date") == today:
-            record_index = i
-            break
-    
-    if record_index is None:
-        new_record = create_default_participation(current_user.id, today)
-        new_record_dict = new_record.model_dump()
-        participation_data.append(new_record_dict)
-        record_index = len(participation_data) - 1
+    Send the ETag from GET /today as If-Match to update only if nobody
+    changed the record since; otherwise 412 is returned with the current ETag.
+    """
+    today = get_todays_date()
     
     valid_meal_types = {mt.value for mt in MealType}
     for meal_type in update_data.meals.keys():
@@ -87,8 +123,53 @@ async def update_participation(
                 detail=f"Invalid meal type: {meal_type}. Valid types are: {', '.join(valid_meal_types)}"
             )
     
-    participation_data[record_index]["meals"].update(update_data.meals)
+    if not await work_calendar.meals_available(today):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Meals are not available on {today}: the office is closed"
+        )
+    
+    try:
+        _, record = await participation_writer.update(
+            current_user.id, current_user.team_id, today, update_data.meals, if_match
+        )
+    except VersionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=str(e),
+            headers={"ETag": record_etag(e.record)}
+        )
+    
+    response.headers["ETag"] = record_etag(record)
+    return Repository.trusted_meal_record(record)
+
+
+@router.get("/location", response_model=WorkLocationStatus)
+async def get_work_location(
+    date: Optional[str] = Query(default=None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    current_user: User = Depends(get_current_user)):
+    date = date or get_todays_date()
+    ensure_valid_date(date)
+    
+    location, is_default = await work_locations.get_location(current_user.id, date)
+    
+    return WorkLocationStatus(user_id=current_user.id, date=date, location=location, is_default=is_default)
+
+
+@router.put("/location", response_model=WorkLocationStatus)
+async def update_work_location(
+    update_data: WorkLocationUpdate,
+    current_user: User = Depends(get_current_user)):
+    today = get_todays_date()
+    date = update_data.date or today
+    ensure_valid_date(date)
+    
+    if date < today:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Work location can only be set for today or a future date"
+        )
     
-    storage.write_participation(participation_data)
+    record = await work_locations.set_location(current_user.id, current_user.team_id, date, update_data.location)
     
-    return MealRecord(**participation_data[record_index])
+    return WorkLocationStatus(user_id=current_user.id, date=date, location=record["location"], is_default=False)
@@ -0,0 +1,254 @@
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+from app.auth import get_current_user
+from app.db import get_async_storage
+from app.headcount_snapshots import get_headcount_snapshots
+from app.intervals import date_range, to_ordinal
+from app.models import User, UserRole, SpecialDay, SpecialDayRange, WFHPeriod, WFHPeriodCreate
+from app.work_calendar import SPECIAL_DAYS_FILE, WFH_PERIODS_FILE, get_work_calendar
+
+
+router = APIRouter(prefix="/api/calendar", tags=["calendar"])
+
+storage = get_async_storage()
+work_calendar = get_work_calendar()
+headcount_snapshots = get_headcount_snapshots()
+
+DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
+
+# Longest range of special days that can be declared or removed at once
+MAX_RANGE_DAYS = 366
+
+
+class SpecialDayRangeResult(BaseModel):
+    start_date: str
+    end_date: str
+    days: int
+    replaced: int
+    headcounts_recounted: int
+
+
+class DayInfo(BaseModel):
+    date: str
+    special_day: Optional[SpecialDay] = None
+    wfh: bool
+    meals_available: bool
+
+
+def ensure_valid_date(date: str) -> None:
+    try:
+        to_ordinal(date)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid date: {date}. Expected YYYY-MM-DD"
+        )
+
+
+def ensure_valid_range(start: str, end: str) -> None:
+    ensure_valid_date(start)
+    ensure_valid_date(end)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must not be after end_date"
+        )
+    if to_ordinal(end) - to_ordinal(start) + 1 > MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A range can span at most {MAX_RANGE_DAYS} days"
+        )
+
+
+async def require_admin_or_logistics(
+    current_user: User = Depends(get_current_user)
+) -> User:
+    if current_user.role not in [UserRole.ADMIN.value, UserRole.LOGISTICS.value]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only users with Admin or Logistics role can manage the calendar"
+        )
+    return current_user
+
+
+@router.get("/special-days", response_model=List[SpecialDay])
+async def list_special_days(
+    start: Optional[str] = Query(default=None, pattern=DATE_PATTERN),
+    end: Optional[str] = Query(default=None, pattern=DATE_PATTERN),
+    current_user: User = Depends(get_current_user)):
+    special_days = await storage.read_cached(SPECIAL_DAYS_FILE)
+    return sorted(
+        (day for day in special_days
+         if (start is None or day["date"] >= start) and (end is None or day["date"] <= end)),
+        key=lambda day: day["date"]
+    )
+
+
+@router.post("/special-days", response_model=SpecialDay, status_code=status.HTTP_201_CREATED)
+async def create_special_day(
+    special_day: SpecialDay,
+    current_user: User = Depends(require_admin_or_logistics)):
+    ensure_valid_date(special_day.date)
+    new_day = special_day.model_dump()
+    
+    def add_special_day(special_days):
+        for day in special_days:
+            if day["date"] == special_day.date:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"A special day is already defined for {special_day.date}"
+                )
+        special_days.append(new_day)
+    
+    await storage.update(SPECIAL_DAYS_FILE, add_special_day)
+    await headcount_snapshots.refreeze(special_day.date)
+    return new_day
+
+
+@router.post("/special-days/range", response_model=SpecialDayRangeResult, status_code=status.HTTP_201_CREATED)
+async def create_special_day_range(
+    special_days_range: SpecialDayRange,
+    current_user: User = Depends(require_admin_or_logistics)):
+    """
+    Declare the same special day (e.g. a closure) for every date in a range.
+    
+    Applied as one write of one calendar entry per date, plus one recount of
+    the frozen headcounts in the range. Participation records are not
+    touched: meal availability is resolved from the calendar when read.
+    Dates that already have a special day are rejected unless replace is set.
+    """
+    start, end = special_days_range.start_date, special_days_range.end_date
+    ensure_valid_range(start, end)
+    dates = list(date_range(start, end))
+    entry = {"day_type": special_days_range.day_type, "note": special_days_range.note}
+    
+    def add_special_days(special_days):
+        existing: Dict[str, int] = {}
+        for i, day in enumerate(special_days):
+            if start <= day["date"] <= end:
+                existing[day["date"]] = i
+        if existing and not special_days_range.replace:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Special days are already defined for: {', '.join(sorted(existing))}"
+            )
+        for date in dates:
+            new_day = {"date": date, **entry}
+            i = existing.get(date)
+            if i is None:
+                special_days.append(new_day)
+            else:
+                special_days[i] = new_day
+        return len(existing)
+    
+    replaced = await storage.update(SPECIAL_DAYS_FILE, add_special_days)
+    recounted = await headcount_snapshots.refreeze_range(start, end)
+    return SpecialDayRangeResult(
+        start_date=start, end_date=end, days=len(dates), replaced=replaced, headcounts_recounted=recounted
+    )
+
+
+@router.delete("/special-days", response_model=SpecialDayRangeResult)
+async def delete_special_day_range(
+    start: str = Query(..., pattern=DATE_PATTERN),
+    end: str = Query(..., pattern=DATE_PATTERN),
+    current_user: User = Depends(require_admin_or_logistics)):
+    """Remove every special day in [start, end] in one write."""
+    ensure_valid_range(start, end)
+    
+    def remove_special_days(special_days):
+        kept = [day for day in special_days if not start <= day["date"] <= end]
+        removed = len(special_days) - len(kept)
+        if not removed:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No special days defined between {start} and {end}"
+            )
+        special_days[:] = kept
+        return removed
+    
+    removed = await storage.update(SPECIAL_DAYS_FILE, remove_special_days)
+    recounted = await headcount_snapshots.refreeze_range(start, end)
+    return SpecialDayRangeResult(
+        start_date=start, end_date=end, days=removed, replaced=0, headcounts_recounted=recounted
+    )
+
+
+@router.delete("/special-days/{date}")
+async def delete_special_day(
+    date: str,
+    current_user: User = Depends(require_admin_or_logistics)):
+    
+    def remove_special_day(special_days):
+        for i, day in enumerate(special_days):
+            if day["date"] == date:
+                del special_days[i]
+                return
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No special day defined for {date}"
+        )
+    
+    await storage.update(SPECIAL_DAYS_FILE, remove_special_day)
+    await headcount_snapshots.refreeze(date)
+    return {"message": f"Special day on {date} removed"}
+
+
+@router.get("/wfh-periods", response_model=List[WFHPeriod])
+async def list_wfh_periods(current_user: User = Depends(get_current_user)):
+    wfh_periods = await storage.read_cached(WFH_PERIODS_FILE)
+    return sorted(wfh_periods, key=lambda period: period["start_date"])
+
+
+@router.post("/wfh-periods", response_model=WFHPeriod, status_code=status.HTTP_201_CREATED)
+async def create_wfh_period(
+    period: WFHPeriodCreate,
+    current_user: User = Depends(require_admin_or_logistics)):
+    ensure_valid_date(period.start_date)
+    ensure_valid_date(period.end_date)
+    if period.start_date > period.end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must not be after end_date"
+        )
+    
+    def add_wfh_period(wfh_periods):
+        new_period = {"id": max((p["id"] for p in wfh_periods), default=0) + 1, **period.model_dump()}
+        wfh_periods.append(new_period)
+        return new_period
+    
+    return await storage.update(WFH_PERIODS_FILE, add_wfh_period)
+
+
+@router.delete("/wfh-periods/{period_id}")
+async def delete_wfh_period(
+    period_id: int,
+    current_user: User = Depends(require_admin_or_logistics)):
+    
+    def remove_wfh_period(wfh_periods):
+        for i, period in enumerate(wfh_periods):
+            if period["id"] == period_id:
+                del wfh_periods[i]
+                return
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"WFH period with id {period_id} not found"
+        )
+    
+    await storage.update(WFH_PERIODS_FILE, remove_wfh_period)
+    return {"message": f"WFH period {period_id} removed"}
+
+
+@router.get("/{date}", response_model=DayInfo)
+async def get_day_info(
+    date: str,
+    current_user: User = Depends(get_current_user)):
+    ensure_valid_date(date)
+    calendar_view = await work_calendar.view()
+    return DayInfo(
+        date=date,
+        special_day=calendar_view.special_day(date),
+        wfh=calendar_view.is_wfh(date),
+        meals_available=calendar_view.meals_available(date)
+    )
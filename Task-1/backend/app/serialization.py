@@ -0,0 +1,104 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import orjson
+from fastapi.responses import Response
+
+from app.models import DEFAULT_PARTICIPATION_MEALS, MEALS_UNAVAILABLE_DAY_TYPES, UNAVAILABLE_MEALS
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content to JSON bytes using orjson."""
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response for large list endpoints.
+
+    Content returned through this class is not re-validated against the
+    route's ``response_model``; the model is kept on the route only for the
+    OpenAPI schema. Use it for rows built from data the API wrote itself.
+    Pre-encoded ``bytes`` are sent as-is.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def user_participation_row(user_dict: Dict[str, Any], date: str, meals: Dict[str, bool], version: int = 0) -> Dict[str, Any]:
+    """Build a ``UserParticipation`` shaped row from a stored user record."""
+    return {
+        "user_id": user_dict.get("id"),
+        "username": user_dict.get("username"),
+        "name": user_dict.get("name"),
+        "email": user_dict.get("email"),
+        "role": user_dict.get("role"),
+        "team_id": user_dict.get("team_id"),
+        "date": date,
+        "meals": meals,
+        "version": version,
+    }
+
+
+def meal_user_row(user_dict: Dict[str, Any], team_name: Optional[str] = None) -> Dict[str, Any]:
+    """Build a ``MealUserDetail`` shaped row from a stored user record."""
+    return {
+        "user_id": user_dict.get("id"),
+        "name": user_dict.get("name"),
+        "team_id": user_dict.get("team_id"),
+        "team_name": team_name,
+    }
+
+
+def meal_count_rows(total_employees: int, meal_counts: Dict[str, int]) -> List[Dict[str, Any]]:
+    """Build ``MealCountSummary`` shaped rows (opt-ins and percentages per meal)."""
+    rows = []
+    for meal_type, opted_in in meal_counts.items():
+        opted_out = total_employees - opted_in
+        rows.append({
+            "meal_type": meal_type,
+            "total_employees": total_employees,
+            "opted_in": opted_in,
+            "opted_out": opted_out,
+            "opted_in_percentage": round(opted_in / total_employees * 100, 2) if total_employees > 0 else 0.0,
+            "opted_out_percentage": round(opted_out / total_employees * 100, 2) if total_employees > 0 else 0.0,
+        })
+    return rows
+
+
+def participation_history_rows(
+    dates: Iterable[str],
+    records: Sequence[Dict[str, Any]],
+    calendar_days: Dict[str, Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Build ``ParticipationHistoryDay`` rows for a user.
+    
+    Args:
+        dates: The days to report, in order
+        records: The user's stored records within those days
+        calendar_days: Special days and WFH periods resolved for the range
+    """
+    by_date = {record.get("date"): record for record in records}
+    rows = []
+    for date in dates:
+        special_day = calendar_days.get(date, {}).get("special_day")
+        meals_available = special_day is None or special_day.get("day_type") not in MEALS_UNAVAILABLE_DAY_TYPES
+        record = by_date.get(date)
+        if not meals_available:
+            meals = UNAVAILABLE_MEALS
+        elif record:
+            meals = record.get("meals", {})
+        else:
+            meals = DEFAULT_PARTICIPATION_MEALS
+        rows.append({
+            "date": date,
+            "meals": meals,
+            "meals_available": meals_available,
+            "is_default": record is None,
+        })
+    return rows
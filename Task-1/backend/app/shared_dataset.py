@@ -0,0 +1,390 @@
+import asyncio
+import hashlib
+import logging
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+
+from app.db import AsyncJSONStorage, get_async_storage
+from app.intervals import to_ordinal
+from app.models import MealType
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"MHPDS\x00\x00\x02"
+
+# magic, generation, users.json stamp, participation.json stamp, user count, record count
+HEADER = struct.Struct("<8sQ4q4qQQ")
+
+# The control segment holds the current generation (0: nothing published)
+CONTROL = struct.Struct("<Q")
+
+NO_STAMP = (-1, -1, -1, -1)
+
+MEAL_TYPES = [meal_type.value for meal_type in MealType]
+
+
+def segment_prefix(base_dir: str) -> str:
+    """Shared memory name prefix for a data directory (one dataset per directory)."""
+    digest = hashlib.sha1(os.path.abspath(base_dir).encode("utf-8")).hexdigest()[:10]
+    return f"mhp_{digest}"
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _attach(name: str, create: bool = False, size: int = 0):
+    """Open a shared memory segment that this process will not unlink on exit."""
+    from multiprocessing import shared_memory
+    
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+    shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+    # Before 3.13 the resource tracker unlinks every segment a process opened
+    # when it exits, including segments other workers still use
+    from multiprocessing import resource_tracker
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _unlink(shm: Any) -> None:
+    """Remove a segment opened with _attach()."""
+    if sys.version_info < (3, 13):
+        # unlink() unregisters the segment again; register it so the tracker agrees
+        from multiprocessing import resource_tracker
+        resource_tracker.register(shm._name, "shared_memory")
+    shm.unlink()
+
+
+def encode_dataset(
+    generation: int,
+    users_stamp: Optional[Tuple[int, ...]],
+    participation_stamp: Optional[Tuple[int, ...]],
+    users_data: Sequence[Dict],
+    participation_data: Sequence[Dict]
+) -> bytes:
+    """
+    Encode users and participation into the read-only shared layout.
+    
+    Sections, each 8-byte aligned after the header:
+        user_ids      int64[n]    sorted ids
+        id_slots      int32[n]    user slot for each sorted id
+        name_offsets  int64[n+1]  into name_bytes, usernames sorted
+        name_slots    int32[n]    user slot for each sorted username
+        name_bytes
+        user_offsets  int64[n+1]  into user_bytes, by slot
+        user_bytes    one orjson document per user
+        record_keys      int64[m]    sorted (user_id << 32 | day ordinal)
+        record_versions  uint32[m]   record version
+        record_meals     uint8[m]    opt-in bitmask, bit i = MEAL_TYPES[i]
+    """
+    slots = range(len(users_data))
+    by_id = sorted(slots, key=lambda slot: users_data[slot].get("id"))
+    by_name = sorted(slots, key=lambda slot: users_data[slot].get("username", "").encode("utf-8"))
+    
+    names = [users_data[slot].get("username", "").encode("utf-8") for slot in by_name]
+    name_offsets = array("q", [0])
+    for name in names:
+        name_offsets.append(name_offsets[-1] + len(name))
+    
+    documents = [orjson.dumps(user_dict) for user_dict in users_data]
+    user_offsets = array("q", [0])
+    for document in documents:
+        user_offsets.append(user_offsets[-1] + len(document))
+    
+    records = sorted(
+        ((record.get("user_id") << 32) | to_ordinal(record.get("date")), record.get("version", 0), record.get("meals", {}))
+        for record in participation_data
+    )
+    record_meals = bytes(
+        sum(1 << i for i, meal_type in enumerate(MEAL_TYPES) if meals.get(meal_type, False))
+        for _, _, meals in records
+    )
+    
+    sections = [
+        array("q", [users_data[slot].get("id") for slot in by_id]).tobytes(),
+        array("i", by_id).tobytes(),
+        name_offsets.tobytes(),
+        array("i", by_name).tobytes(),
+        b"".join(names),
+        user_offsets.tobytes(),
+        b"".join(documents),
+        array("q", [key for key, _, _ in records]).tobytes(),
+        array("I", [version for _, version, _ in records]).tobytes(),
+        record_meals,
+    ]
+    
+    out = bytearray(HEADER.pack(
+        MAGIC,
+        generation,
+        *(users_stamp or NO_STAMP),
+        *(participation_stamp or NO_STAMP),
+        len(users_data),
+        len(records)
+    ))
+    for section in sections:
+        out.extend(b"\x00" * (_align(len(out)) - len(out)))
+        out.extend(section)
+    return bytes(out)
+
+
+class SharedDataset:
+    """
+    Read-only view of one published generation.
+    
+    Lookups index straight into the shared buffer (binary searches over the
+    sorted sections); only the matched user document is decoded.
+    """
+
+    def __init__(self, shm: Any):
+        self.shm = shm
+        buf = shm.buf
+        (magic, self.generation, *stamps, num_users, num_records) = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a dataset segment: {shm.name}")
+        self.users_stamp = tuple(stamps[:4])
+        self.participation_stamp = tuple(stamps[4:])
+        
+        self._views: List[memoryview] = []
+        offset = HEADER.size
+
+        def section(fmt: str, count: int) -> memoryview:
+            nonlocal offset
+            offset = _align(offset)
+            size = count * struct.calcsize(fmt)
+            view = buf[offset:offset + size].cast(fmt)
+            self._views.append(view)
+            offset += size
+            return view
+
+        def raw(size: int) -> memoryview:
+            nonlocal offset
+            offset = _align(offset)
+            view = buf[offset:offset + size]
+            self._views.append(view)
+            offset += size
+            return view
+        
+        self.user_ids = section("q", num_users)
+        self.id_slots = section("i", num_users)
+        self.name_offsets = section("q", num_users + 1)
+        self.name_slots = section("i", num_users)
+        self.name_bytes = raw(self.name_offsets[num_users])
+        self.user_offsets = section("q", num_users + 1)
+        self.user_bytes = raw(self.user_offsets[num_users])
+        self.record_keys = section("q", num_records)
+        self.record_versions = section("I", num_records)
+        self.record_meals = raw(num_records)
+
+    def _user(self, slot: int) -> Dict[str, Any]:
+        return orjson.loads(self.user_bytes[self.user_offsets[slot]:self.user_offsets[slot + 1]])
+
+    def user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
+        i = bisect_left(self.user_ids, user_id)
+        if i < len(self.user_ids) and self.user_ids[i] == user_id:
+            return self._user(self.id_slots[i])
+        return None
+
+    def user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        target = username.encode("utf-8")
+        low, high = 0, len(self.name_slots)
+        while low < high:
+            mid = (low + high) // 2
+            name = bytes(self.name_bytes[self.name_offsets[mid]:self.name_offsets[mid + 1]])
+            if name < target:
+                low = mid + 1
+            else:
+                high = mid
+        if low < len(self.name_slots) and bytes(self.name_bytes[self.name_offsets[low]:self.name_offsets[low + 1]]) == target:
+            return self._user(self.name_slots[low])
+        return None
+
+    def meal_record(self, user_id: int, date: str) -> Optional[Dict[str, Any]]:
+        key = (user_id << 32) | to_ordinal(date)
+        i = bisect_left(self.record_keys, key)
+        if i < len(self.record_keys) and self.record_keys[i] == key:
+            mask = self.record_meals[i]
+            return {
+                "user_id": user_id,
+                "date": date,
+                "meals": {meal_type: bool(mask >> bit & 1) for bit, meal_type in enumerate(MEAL_TYPES)},
+                "version": self.record_versions[i],
+            }
+        return None
+
+    def close(self) -> None:
+        for view in self._views:
+            view.release()
+        self._views = []
+        self.shm.close()
+
+
+class SharedDatasetReader:
+    """
+    Follows the generation counter and keeps the current segment mapped.
+    
+    Checking for a new generation is one read from the control segment.
+    Returns None while nothing is published (or the loader is gone), so
+    callers fall back to their own storage snapshots.
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self._control = None
+        self._dataset: Optional[SharedDataset] = None
+
+    def current(self) -> Optional[SharedDataset]:
+        try:
+            if self._control is None:
+                self._control = _attach(f"{self.prefix}_ctl")
+            (generation,) = CONTROL.unpack_from(self._control.buf, 0)
+            if generation == 0:
+                # The loader withdrew it; a new loader creates a new control segment
+                self._control.close()
+                self._control = None
+                return None
+            if self._dataset is not None and self._dataset.generation == generation:
+                return self._dataset
+            dataset = SharedDataset(_attach(f"{self.prefix}_{generation}"))
+        except (FileNotFoundError, ValueError):
+            return None
+        if self._dataset is not None:
+            # Lookups are synchronous, so no request still holds the old views
+            self._dataset.close()
+        self._dataset = dataset
+        return dataset
+
+    def close(self) -> None:
+        if self._dataset is not None:
+            self._dataset.close()
+            self._dataset = None
+        if self._control is not None:
+            self._control.close()
+            self._control = None
+
+
+class SharedDatasetLoader:
+    """
+    Publishes the dataset for one data directory.
+    
+    Only one process per directory loads: the one holding an exclusive lock
+    on .shared_dataset.lock. It re-encodes whenever users.json or
+    participation.json change, writes a new segment, then bumps the
+    generation in the control segment. The previous segment is unlinked one
+    generation later; workers that still map it keep a valid mapping.
+    """
+
+    def __init__(self, storage: AsyncJSONStorage, prefix: str, interval: float):
+        self.storage = storage
+        self.prefix = prefix
+        self.interval = interval
+        self._lock_fd: Optional[int] = None
+        self._control = None
+        self._segments: List[Any] = []
+        self._published: Tuple = ()
+
+    def try_acquire(self) -> bool:
+        """Become the loader for this directory if no other process is."""
+        if fcntl is None:
+            return False
+        fd = os.open(str(self.storage.storage.base_dir / ".shared_dataset.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        try:
+            self._control = _attach(f"{self.prefix}_ctl", create=True, size=CONTROL.size)
+        except FileExistsError:
+            # Left behind by a loader that crashed
+            self._control = _attach(f"{self.prefix}_ctl")
+        return True
+
+    async def publish_if_changed(self) -> bool:
+        """Publish a new generation if a source file changed since the last one."""
+        stamps = (self.storage.stamp("users.json"), self.storage.stamp("participation.json"))
+        if stamps == self._published:
+            return False
+        
+        users = await self.storage.snapshot("users.json")
+        participation = await self.storage.snapshot("participation.json")
+        (generation,) = CONTROL.unpack_from(self._control.buf, 0)
+        generation += 1
+        payload = await asyncio.get_running_loop().run_in_executor(
+            None, encode_dataset, generation, users.stamp, participation.stamp, users.records, participation.records
+        )
+        
+        shm = _attach(f"{self.prefix}_{generation}", create=True, size=len(payload))
+        shm.buf[:len(payload)] = payload
+        # The generation is bumped last, so readers only see complete segments
+        CONTROL.pack_into(self._control.buf, 0, generation)
+        
+        self._segments.append(shm)
+        while len(self._segments) > 2:
+            old = self._segments.pop(0)
+            old.close()
+            _unlink(old)
+        self._published = (users.stamp, participation.stamp)
+        return True
+
+    async def run(self) -> None:
+        """Publish now and after every change, until cancelled."""
+        try:
+            while True:
+                try:
+                    await self.publish_if_changed()
+                except Exception:
+                    logger.exception("Publishing the shared dataset failed")
+                await asyncio.sleep(self.interval)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Withdraw the dataset: readers fall back to their own snapshots."""
+        if self._control is not None:
+            CONTROL.pack_into(self._control.buf, 0, 0)
+            self._control.close()
+            _unlink(self._control)
+            self._control = None
+        for shm in self._segments:
+            shm.close()
+            _unlink(shm)
+        self._segments = []
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+_shared_reader: Optional[SharedDatasetReader] = None
+
+
+def get_shared_dataset_reader() -> Optional[SharedDatasetReader]:
+    """The process-wide reader, or None when the shared dataset mode is off."""
+    from app.config import SHARED_DATASET_ENABLED
+    
+    global _shared_reader
+    if not SHARED_DATASET_ENABLED:
+        return None
+    if _shared_reader is None:
+        _shared_reader = SharedDatasetReader(segment_prefix(str(get_async_storage().storage.base_dir)))
+    return _shared_reader
+
+
+def get_shared_dataset_loader() -> SharedDatasetLoader:
+    """A loader for the shared storage directory (see SharedDatasetLoader.try_acquire)."""
+    from app.config import SHARED_DATASET_PUBLISH_INTERVAL_SECONDS
+    
+    storage = get_async_storage()
+    return SharedDatasetLoader(storage, segment_prefix(str(storage.storage.base_dir)), SHARED_DATASET_PUBLISH_INTERVAL_SECONDS)
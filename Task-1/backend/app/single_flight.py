@@ -0,0 +1,49 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.metrics import Metrics
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical computations.
+    
+    The first caller for a key starts the computation; callers arriving with
+    the same key while it runs await the same task and share its result (or
+    exception). Keys should identify the inputs, e.g. include the stamps of
+    the files read, so a caller never joins a computation that started
+    before a write it has already seen.
+    
+    Counters (in Metrics):
+        single_flight.<name>.calls: every do() call
+        single_flight.<name>.executions: computations actually run
+        single_flight.<name>.coalesced: calls served by another caller's computation
+    """
+    
+    def __init__(self, name: str, metrics: Metrics):
+        self.name = name
+        self.metrics = metrics
+        self._in_flight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """Run func() for key, or join the run already in flight."""
+        self.metrics.increment(f"single_flight.{self.name}.calls")
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.metrics.increment(f"single_flight.{self.name}.coalesced")
+        else:
+            self.metrics.increment(f"single_flight.{self.name}.executions")
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        # Shielded: a caller that disconnects does not cancel the others' result
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,98 @@
+import gc
+import marshal
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+# A sidecar holds the parsed records of one JSON data file, so a cold read
+# unmarshals them instead of parsing JSON. The JSON stays the source of truth:
+# the sidecar is only used while the JSON is the exact file it was made from.
+
+MAGIC = b"MHPSNAP\x01"
+
+# magic, marshal version, Python major.minor, JSON mtime_ns, size, inode,
+# payload length, payload crc32
+HEADER = struct.Struct("<8sHHqqQQI")
+
+# marshal output is only guaranteed readable by the same Python version
+PYTHON_VERSION = sys.version_info[0] << 8 | sys.version_info[1]
+
+
+def sidecar_path(json_path: Path) -> Path:
+    """The sidecar of a data file: .<name>.snap next to it."""
+    return json_path.with_name(f".{json_path.name}.snap")
+
+
+def source_key(stat_result: os.stat_result) -> Tuple[int, int, int]:
+    """What identifies one version of the JSON file (os.replace gives every write a new inode)."""
+    return (stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino)
+
+
+def write_sidecar(json_path: Path, stat_result: os.stat_result, data: List[Any]) -> None:
+    """
+    Write the sidecar for the JSON file described by stat_result.
+    
+    Atomic, but never fsynced: a sidecar lost or torn by a crash fails its
+    checksum and the JSON is parsed instead.
+    """
+    payload = marshal.dumps(data)
+    header = HEADER.pack(
+        MAGIC, marshal.version, PYTHON_VERSION, *source_key(stat_result), len(payload), zlib.crc32(payload)
+    )
+    path = sidecar_path(json_path)
+    temp_fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}_")
+    try:
+        with os.fdopen(temp_fd, "wb") as f:
+            f.write(header)
+            f.write(payload)
+        os.replace(temp_path, str(path))
+    except Exception:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_sidecar(json_path: Path, stat_result: os.stat_result) -> Optional[List[Any]]:
+    """
+    Load the records from the sidecar of a JSON file.
+    
+    Returns None, and the JSON must be parsed, when there is no sidecar or
+    it was made from another version of the file, by another Python
+    version, or fails its checksum.
+    """
+    try:
+        with open(sidecar_path(json_path), "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return None
+            magic, marshal_version, python_version, mtime_ns, size, ino, length, checksum = HEADER.unpack(header)
+            if (
+                magic != MAGIC
+                or marshal_version != marshal.version
+                or python_version != PYTHON_VERSION
+                or (mtime_ns, size, ino) != source_key(stat_result)
+            ):
+                return None
+            payload = f.read(length)
+    except FileNotFoundError:
+        return None
+    if len(payload) != length or zlib.crc32(payload) != checksum:
+        return None
+    # The records cannot form reference cycles; collections triggered by
+    # allocating millions of them would take most of the load time
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        data = marshal.loads(payload)
+    except (EOFError, ValueError, TypeError):
+        return None
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return data if isinstance(data, list) else None
@@ -0,0 +1,137 @@
+import io
+import json
+from typing import Any, BinaryIO, Dict, List, Sequence
+
+import orjson
+
+# On-disk encodings of a data file's record list:
+#   pretty   - a JSON array indented by 2 (the original format, easiest to read)
+#   compact  - a JSON array with one unindented record per line
+#   ndjson   - one JSON record per line, no enclosing array
+#   columnar - one JSON object holding a column per key: keys are written once,
+#              all-boolean columns are packed into a string of 0/1 digits and
+#              columns of objects are nested tables
+# Readers detect the format from the content, so files in different formats
+# can sit side by side and switching formats takes effect on the next write.
+STORAGE_FORMATS = ("pretty", "compact", "ndjson", "columnar")
+
+COLUMNAR_PREFIX = b'{"$columnar":'
+COLUMNAR_VERSION = 1
+
+# Records serialized per write() call when streaming
+CHUNK_RECORDS = 4096
+
+_MISSING = object()
+
+
+def _dumps(value: Any) -> bytes:
+    # Non-string keys become strings, as json.dump does
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+
+def dump_records(data: Sequence[Any], f: BinaryIO, file_format: str) -> None:
+    """
+    Serialize records to a binary file in one of STORAGE_FORMATS.
+    
+    Output is written record by record (column by column for columnar), so
+    the whole file never exists as one string in memory.
+    """
+    if file_format == "pretty":
+        text = io.TextIOWrapper(f, encoding="utf-8")
+        json.dump(data, text, indent=2, ensure_ascii=False)
+        text.flush()
+        text.detach()
+    elif file_format == "compact":
+        f.write(b"[\n")
+        for start in range(0, len(data), CHUNK_RECORDS):
+            if start:
+                f.write(b",\n")
+            f.write(b",\n".join([_dumps(record) for record in data[start:start + CHUNK_RECORDS]]))
+        f.write(b"\n]\n")
+    elif file_format == "ndjson":
+        for start in range(0, len(data), CHUNK_RECORDS):
+            f.write(b"".join([_dumps(record) + b"\n" for record in data[start:start + CHUNK_RECORDS]]))
+    elif file_format == "columnar":
+        if not all(isinstance(record, dict) for record in data):
+            # Only lists of objects have columns
+            dump_records(data, f, "compact")
+            return
+        f.write(COLUMNAR_PREFIX + b"%d,\"length\":%d,\"columns\":{" % (COLUMNAR_VERSION, len(data)))
+        for i, (key, values) in enumerate(_split_columns(data).items()):
+            if i:
+                f.write(b",")
+            f.write(_dumps(str(key)) + b":" + _dumps(_encode_column(values)))
+        f.write(b"}}\n")
+    else:
+        raise ValueError(f"Invalid storage format: {file_format}. Valid formats are: {', '.join(STORAGE_FORMATS)}")
+
+
+def _split_columns(records: Sequence[Dict[Any, Any]]) -> Dict[Any, List[Any]]:
+    """One list per key (in first-seen order), with _MISSING where a record lacks the key."""
+    columns: Dict[Any, List[Any]] = {}
+    for i, record in enumerate(records):
+        for key, value in record.items():
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = [_MISSING] * i
+            column.append(value)
+        for column in columns.values():
+            if len(column) <= i:
+                column.append(_MISSING)
+    return columns
+
+
+def _encode_column(values: List[Any]) -> Dict[str, Any]:
+    missing = [i for i, value in enumerate(values) if value is _MISSING]
+    present = [value for value in values if value is not _MISSING]
+    if missing:
+        values = [None if value is _MISSING else value for value in values]
+    
+    if present and all(type(value) is bool for value in present):
+        column: Dict[str, Any] = {"bits": "".join(["1" if value else "0" for value in values])}
+    elif present and all(isinstance(value, dict) for value in present):
+        rows = [value if isinstance(value, dict) else {} for value in values]
+        column = {"length": len(rows), "columns": {
+            str(key): _encode_column(sub_values) for key, sub_values in _split_columns(rows).items()
+        }}
+    else:
+        column = {"values": values}
+    if missing:
+        column["missing"] = missing
+    return column
+
+
+def _decode_table(table: Dict[str, Any]) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = [{} for _ in range(table["length"])]
+    for key, column in table["columns"].items():
+        if "bits" in column:
+            values: Sequence[Any] = [bit == "1" for bit in column["bits"]]
+        elif "columns" in column:
+            values = _decode_table(column)
+        else:
+            values = column["values"]
+        missing = column.get("missing")
+        if missing:
+            skip = set(missing)
+            for i, (row, value) in enumerate(zip(rows, values)):
+                if i not in skip:
+                    row[key] = value
+        else:
+            for row, value in zip(rows, values):
+                row[key] = value
+    return rows
+
+
+def parse_records(raw: bytes) -> List[Any]:
+    """Parse a data file written in any of STORAGE_FORMATS (or by hand as a JSON array)."""
+    content = raw.lstrip()
+    if not content:
+        return []
+    if content.startswith(b"["):
+        return json.loads(raw)
+    if content.startswith(COLUMNAR_PREFIX):
+        document = orjson.loads(content)
+        if document["$columnar"] != COLUMNAR_VERSION:
+            raise ValueError(f"Unsupported columnar version: {document['$columnar']}")
+        return _decode_table(document)
+    return [orjson.loads(line) for line in content.splitlines() if line.strip()]
@@ -0,0 +1,174 @@
+import csv
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from pydantic import ValidationError
+
+from app.auth import hash_password
+from app.models import RegisterRequest
+from app.repository import Repository
+
+IMPORT_FORMATS = ("csv", "json")
+CSV_FIELDS = ("username", "password", "name", "email", "role", "team_id")
+MAX_IMPORT_ROWS = 5_000
+
+
+class UserImportError(ValueError):
+    """Raised when an import file cannot be parsed at all."""
+
+
+def parse_rows(content: str, fmt: str) -> List[Dict[str, Any]]:
+    """
+    Parse an import file into one dict per user.
+    
+    CSV files need a header row with the CSV_FIELDS columns (role and team_id
+    may be left empty). JSON files hold a list of user objects, or an object
+    with a "users" list.
+    
+    Raises:
+        UserImportError: If the content is not valid CSV/JSON of that shape
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(content))
+        missing = {"username", "password", "name", "email"} - set(reader.fieldnames or ())
+        if missing:
+            raise UserImportError(f"CSV header is missing: {', '.join(sorted(missing))}")
+        # Empty cells mean "use the default", as if the field were left out
+        return [
+            {field: value for field, value in row.items() if field in CSV_FIELDS and value not in (None, "")}
+            for row in reader
+        ]
+    
+    if fmt == "json":
+        try:
+            data = json.loads(content)
+        except json.JSONDecodeError as e:
+            raise UserImportError(f"Invalid JSON: {e}")
+        if isinstance(data, dict):
+            data = data.get("users")
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise UserImportError('JSON must be a list of users or {"users": [...]}')
+        return data
+    
+    raise UserImportError(f"Unsupported format: {fmt}. Valid formats are: {', '.join(IMPORT_FORMATS)}")
+
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+def hash_passwords(passwords: Sequence[str], max_workers: Optional[int] = None) -> List[str]:
+    """Hash passwords on a thread pool; bcrypt releases the GIL, so they run on all cores."""
+    if not passwords:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as executor:
+        return list(executor.map(hash_password, passwords))
+
+
+class UserImport:
+    """
+    Bulk registration of many users with a single write to users.json.
+    
+    The steps are split so callers can run them in the right place:
+    
+    1. prepare(): validate rows and check username/email uniqueness with
+       hash sets against the current users and the rest of the batch
+    2. hash(): hash all passwords in parallel, outside any lock
+    3. commit(): the users.json mutator; re-checks uniqueness against the
+       data under the lock (someone may have registered in between), assigns
+       ids and appends every remaining user
+    
+    Rows are numbered from 1. Rows that fail are reported in errors and
+    skipped; the rest are imported.
+    """
+
+    def __init__(self, rows: Sequence[Dict[str, Any]]):
+        self.rows = rows
+        self.errors: List[Dict[str, Any]] = []
+        self.created: List[Dict[str, Any]] = []
+        self._pending: List[Tuple[int, RegisterRequest]] = []
+        self._hashed: List[str] = []
+
+    def error(self, row_number: int, message: str) -> None:
+        self.errors.append({"row": row_number, "error": message})
+
+    def prepare(self, existing_users: Sequence[Dict]) -> None:
+        """Validate rows against each other and the existing users."""
+        if len(self.rows) > MAX_IMPORT_ROWS:
+            raise UserImportError(f"Too many rows: {len(self.rows)}. At most {MAX_IMPORT_ROWS} users per import")
+        
+        usernames, emails = existing_keys(existing_users)
+        for row_number, row in enumerate(self.rows, start=1):
+            try:
+                request = RegisterRequest.model_validate(row)
+            except ValidationError as e:
+                self.error(row_number, format_validation_error(e))
+                continue
+            
+            if not self._claim(row_number, request, usernames, emails):
+                continue
+            self._pending.append((row_number, request))
+
+    def hash(self, max_workers: Optional[int] = None) -> None:
+        """Hash the passwords of all rows that passed prepare()."""
+        self._hashed = hash_passwords([request.password for _, request in self._pending], max_workers)
+
+    def commit(self, users_data: List[Any]) -> List[Dict[str, Any]]:
+        """Append the prepared users to users.json data (use as a storage mutator)."""
+        self.created = []
+        usernames, emails = existing_keys(users_data)
+        for (row_number, request), hashed_password in zip(self._pending, self._hashed):
+            if not self._claim(row_number, request, usernames, emails):
+                continue
+            
+            new_user_dict = Repository.validate_user({
+                "id": len(users_data) + 1,
+                "username": request.username,
+                "password": hashed_password,
+                "name": request.name,
+                "email": request.email,
+                "role": request.role,
+                "team_id": request.team_id
+            })
+            users_data.append(new_user_dict)
+            self.created.append(new_user_dict)
+        return self.created
+
+    def _claim(self, row_number: int, request: RegisterRequest, usernames: Set[str], emails: Set[str]) -> bool:
+        username, email = request.username.lower(), request.email.lower()
+        if username in usernames:
+            self.error(row_number, f"Username '{request.username}' already exists")
+            return False
+        if email in emails:
+            self.error(row_number, f"Email '{request.email}' already exists")
+            return False
+        usernames.add(username)
+        emails.add(email)
+        return True
+
+    def summary(self) -> Dict[str, Any]:
+        """The import outcome, without password hashes."""
+        return {
+            "valid_count": len(self._pending),
+            "created_count": len(self.created),
+            "error_count": len(self.errors),
+            "created": [
+                {key: value for key, value in user_dict.items() if key != "password"}
+                for user_dict in self.created
+            ],
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+        }
+
+
+def existing_keys(users_data: Sequence[Dict]) -> Tuple[Set[str], Set[str]]:
+    """Lowercased usernames and emails already taken."""
+    return (
+        {user_dict.get("username", "").lower() for user_dict in users_data},
+        {user_dict.get("email", "").lower() for user_dict in users_data},
+    )
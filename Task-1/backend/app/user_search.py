@@ -0,0 +1,141 @@
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.db import AsyncJSONStorage, Snapshot, get_async_storage
+from app.headcount_snapshots import team_key
+from app.metrics import Metrics, get_metrics
+from app.single_flight import SingleFlight
+
+DEFAULT_SEARCH_LIMIT = 10
+
+
+def search_terms(user_dict: Dict[str, Any]) -> Set[str]:
+    """
+    Lowercased terms a user can be found by: username, email, full name and
+    each word of the name (so "Rahman" finds "Abdur Rahman").
+    """
+    name = user_dict.get("name", "").lower()
+    terms = {user_dict.get("username", "").lower(), user_dict.get("email", "").lower(), name}
+    terms.update(name.split())
+    terms.discard("")
+    return terms
+
+
+class UserSearchIndex:
+    """
+    Prefix index over user search terms at one version of users.json.
+
+    Entries are (term, user_id) pairs kept sorted, so a prefix query is one
+    bisect followed by a scan over the matching run that stops after k users.
+    Each team has its own entry list as well, so a Team Lead's search never
+    scans other teams' matches.
+    """
+
+    def __init__(self, stamp: Tuple, users_data: Sequence[Dict]):
+        self.stamp = stamp
+        self.users: Dict[int, Dict] = {}
+        self.entries: List[Tuple[str, int]] = []
+        self.team_entries: Dict[str, List[Tuple[str, int]]] = {}
+
+        for user_dict in users_data:
+            user_id = user_dict.get("id")
+            self.users[user_id] = user_dict
+            team = self.team_entries.setdefault(team_key(user_dict.get("team_id")), [])
+            for term in search_terms(user_dict):
+                self.entries.append((term, user_id))
+                team.append((term, user_id))
+
+        self.entries.sort()
+        for team in self.team_entries.values():
+            team.sort()
+
+    def add(self, user_dict: Dict[str, Any]) -> None:
+        """Insert a newly registered user."""
+        user_id = user_dict.get("id")
+        self.users[user_id] = user_dict
+        team = self.team_entries.setdefault(team_key(user_dict.get("team_id")), [])
+        for term in search_terms(user_dict):
+            insort(self.entries, (term, user_id))
+            insort(team, (term, user_id))
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT, team_id: Any = None, scoped: bool = False) -> List[Dict]:
+        """
+        Find up to limit users with a term starting with query.
+
+        Results are ordered by the first matching term. With scoped=True only
+        members of team_id are searched.
+        """
+        prefix = query.strip().lower()
+        if not prefix:
+            return []
+        entries = self.team_entries.get(team_key(team_id), []) if scoped else self.entries
+
+        found: Dict[int, None] = {}
+        i = bisect_left(entries, (prefix,))
+        while i < len(entries) and len(found) < limit:
+            term, user_id = entries[i]
+            if not term.startswith(prefix):
+                break
+            found[user_id] = None
+            i += 1
+        return [self.users[user_id] for user_id in found]
+
+
+class UserDirectory:
+    """
+    Typeahead search over users.json.
+
+    The index is built once per users.json version. Registrations made by
+    this process insert into it directly; a write from anywhere else is
+    picked up with one rebuild on the next search. Rebuilds run on a worker
+    thread, and concurrent searches share one.
+    """
+
+    def __init__(self, storage: AsyncJSONStorage, metrics: Metrics):
+        self.storage = storage
+        self._index: Optional[UserSearchIndex] = None
+        self._flight = SingleFlight("user_search_index", metrics)
+
+    async def search_index(self) -> UserSearchIndex:
+        """Get the search index for the current users.json."""
+        snapshot = await self.storage.snapshot("users.json")
+        index = self._index
+        if index is not None and index.stamp == snapshot.stamp:
+            return index
+        
+        async def build() -> UserSearchIndex:
+            return await run_in_threadpool(UserSearchIndex, snapshot.stamp, snapshot.records)
+        
+        index = await self._flight.do(snapshot.stamp, build)
+        current = self._index
+        # Never replace an index of a newer version (built or extended meanwhile)
+        if current is None or current.stamp[0] <= index.stamp[0]:
+            self._index = index
+        return index
+
+    async def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT, team_id: Any = None, scoped: bool = False) -> List[Dict]:
+        """Find up to limit users matching a prefix (see UserSearchIndex.search)."""
+        return (await self.search_index()).search(query, limit, team_id, scoped)
+
+    def users_added(self, before: Snapshot, after: Snapshot, user_dicts: Sequence[Dict[str, Any]]) -> None:
+        """Insert the users registered by the write that took users.json from before to after."""
+        index = self._index
+        # An index built from another version is rebuilt on the next search instead
+        if index is None or index.stamp != before.stamp:
+            return
+        for user_dict in user_dicts:
+            index.add(user_dict)
+        index.stamp = after.stamp
+
+
+_shared_user_directory: Optional[UserDirectory] = None
+
+
+def get_user_directory() -> UserDirectory:
+    """Get the process-wide UserDirectory instance."""
+    global _shared_user_directory
+    if _shared_user_directory is None:
+        _shared_user_directory = UserDirectory(get_async_storage(), get_metrics())
+    return _shared_user_directory
@@ -0,0 +1,60 @@
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from app.db import AsyncJSONStorage, get_async_storage
+
+
+def user_version(user_dict: Dict[str, Any]) -> int:
+    """Version of a stored user record (records from before versioning are 0)."""
+    return user_dict.get("version", 0)
+
+
+def build_user_versions(users_data: Sequence[Dict]) -> Dict[int, int]:
+    """Map user ids to their current versions."""
+    return {user_dict.get("id"): user_version(user_dict) for user_dict in users_data}
+
+
+class UserVersions:
+    """
+    Current version of every user, for verifying stateless tokens.
+    
+    A user's version is incremented whenever their role or team changes, so
+    the claims of a token minted before the change no longer match. The map
+    is derived once per users.json version, and users.json is looked at no
+    more than once per revalidate_interval: between checks a token is
+    verified without touching storage. Other workers see a change within
+    that interval; the worker that made it calls invalidate() and sees it at
+    once.
+    """
+
+    def __init__(self, storage: AsyncJSONStorage, revalidate_interval: float):
+        self.storage = storage
+        self.revalidate_interval = revalidate_interval
+        self._versions: Optional[Dict[int, int]] = None
+        self._next_check = 0.0
+
+    async def get(self, user_id: int) -> Optional[int]:
+        """Current version of a user (None if there is no such user)."""
+        now = time.monotonic()
+        if self._versions is None or now >= self._next_check:
+            snapshot = await self.storage.snapshot("users.json")
+            self._versions = snapshot.derive("user_versions", build_user_versions)
+            self._next_check = now + self.revalidate_interval
+        return self._versions.get(user_id)
+
+    def invalidate(self) -> None:
+        """Re-read users.json on the next lookup (after a local write)."""
+        self._next_check = 0.0
+
+
+_shared_user_versions: Optional[UserVersions] = None
+
+
+def get_user_versions() -> UserVersions:
+    """Get the process-wide UserVersions instance."""
+    from app.config import STATELESS_AUTH_REVALIDATE_SECONDS
+    
+    global _shared_user_versions
+    if _shared_user_versions is None:
+        _shared_user_versions = UserVersions(get_async_storage(), STATELESS_AUTH_REVALIDATE_SECONDS)
+    return _shared_user_versions
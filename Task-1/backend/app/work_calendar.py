@@ -0,0 +1,94 @@
+from typing import Any, Dict, Optional, Sequence
+
+from app.db import AsyncJSONStorage, Snapshot, get_async_storage
+from app.intervals import IntervalIndex
+from app.models import MEALS_UNAVAILABLE_DAY_TYPES
+
+SPECIAL_DAYS_FILE = "special_days.json"
+WFH_PERIODS_FILE = "wfh_periods.json"
+
+
+def build_special_day_index(special_days: Sequence[Dict]) -> IntervalIndex:
+    """Index special days as one-day ranges."""
+    return IntervalIndex((day["date"], day["date"], day) for day in special_days)
+
+
+def build_wfh_index(wfh_periods: Sequence[Dict]) -> IntervalIndex:
+    """Index company-wide WFH periods by their date ranges."""
+    return IntervalIndex((period["start_date"], period["end_date"], period) for period in wfh_periods)
+
+
+class CalendarView:
+    """Special days and WFH periods at one storage version, with interval indexes."""
+    
+    def __init__(self, special_days: IntervalIndex, wfh_periods: IntervalIndex):
+        self.special_days = special_days
+        self.wfh_periods = wfh_periods
+
+    def special_day(self, date: str) -> Optional[Dict[str, Any]]:
+        """The special day defined for a date, if any."""
+        days = self.special_days.at(date)
+        return days[0] if days else None
+
+    def meals_available(self, date: str) -> bool:
+        """Meals are not served on Closed or Holiday days."""
+        special_day = self.special_day(date)
+        return special_day is None or special_day.get("day_type") not in MEALS_UNAVAILABLE_DAY_TYPES
+
+    def is_wfh(self, date: str) -> bool:
+        """Check whether a company-wide WFH period covers a date."""
+        return self.wfh_periods.covers(date)
+
+    def resolve(self, start: str, end: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Resolve special days and WFH periods for every date in [start, end].
+        
+        Both indexes are swept once over the range; dates with nothing
+        defined are left out.
+        """
+        resolved: Dict[str, Dict[str, Any]] = {}
+        for date, days in self.special_days.resolve(start, end).items():
+            resolved.setdefault(date, {})["special_day"] = days[0]
+        for date, periods in self.wfh_periods.resolve(start, end).items():
+            resolved.setdefault(date, {})["wfh_periods"] = periods
+        return resolved
+
+
+class WorkCalendar:
+    """Access to special days and WFH periods through their interval indexes."""
+    
+    def __init__(self, storage: AsyncJSONStorage):
+        self.storage = storage
+
+    async def view(self) -> CalendarView:
+        """Get the calendar at the current storage version."""
+        special_days = await self.storage.snapshot(SPECIAL_DAYS_FILE)
+        wfh_periods = await self.storage.snapshot(WFH_PERIODS_FILE)
+        return self._view(special_days, wfh_periods)
+
+    def view_sync(self) -> CalendarView:
+        """Like view, for code already running on the storage executor."""
+        storage = self.storage.storage
+        return self._view(storage.snapshot(SPECIAL_DAYS_FILE), storage.snapshot(WFH_PERIODS_FILE))
+
+    @staticmethod
+    def _view(special_days: Snapshot, wfh_periods: Snapshot) -> CalendarView:
+        return CalendarView(
+            special_days.derive("interval_index", build_special_day_index),
+            wfh_periods.derive("interval_index", build_wfh_index)
+        )
+
+    async def meals_available(self, date: str) -> bool:
+        """Check whether meals are served on a date."""
+        return (await self.view()).meals_available(date)
+
+
+_shared_work_calendar: Optional[WorkCalendar] = None
+
+
+def get_work_calendar() -> WorkCalendar:
+    """Get the process-wide WorkCalendar instance."""
+    global _shared_work_calendar
+    if _shared_work_calendar is None:
+        _shared_work_calendar = WorkCalendar(get_async_storage())
+    return _shared_work_calendar
@@ -0,0 +1,182 @@
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from app.db import AsyncJSONStorage, Snapshot, get_async_storage
+from app.headcount_snapshots import team_key
+from app.models import WorkLocation
+from app.work_calendar import WorkCalendar, get_work_calendar
+
+WORK_LOCATIONS_FILE = "work_locations.json"
+
+LOCATIONS = [location.value for location in WorkLocation]
+
+
+def build_location_index(location_data: Sequence[Dict]) -> Dict[Tuple[int, str], Dict]:
+    """Index work-location records by (user_id, date)."""
+    return {(record.get("user_id"), record.get("date")): record for record in location_data}
+
+
+def build_location_counts(
+    location_data: Sequence[Dict],
+    team_by_user: Dict[int, Optional[int]]
+) -> Dict[str, Dict[str, Dict[str, int]]]:
+    """
+    Count explicitly set locations per date and team.
+    
+    Returns {date: {team_key: {location: count}}}. Records of users that no
+    longer exist are not counted.
+    """
+    counts: Dict[str, Dict[str, Dict[str, int]]] = {}
+    for record in location_data:
+        user_id = record.get("user_id")
+        if user_id not in team_by_user:
+            continue
+        teams = counts.setdefault(record.get("date"), {})
+        team = teams.setdefault(team_key(team_by_user[user_id]), {location: 0 for location in LOCATIONS})
+        team[record.get("location")] += 1
+    return counts
+
+
+def split_by_location(
+    team_sizes: Dict[str, int],
+    explicit_counts: Dict[str, Dict[str, int]],
+    default_location: str
+) -> Tuple[Dict[str, int], Dict[str, Dict[str, int]]]:
+    """
+    Combine explicit location counts with team sizes into an Office/WFH split.
+    
+    Users who did not set a location for the day are counted at the default
+    location. Returns the overall split and the split per team key.
+    """
+    overall = {location: 0 for location in LOCATIONS}
+    teams: Dict[str, Dict[str, int]] = {}
+    for key, size in team_sizes.items():
+        team = dict(explicit_counts.get(key) or {location: 0 for location in LOCATIONS})
+        team[default_location] += max(size - sum(team.values()), 0)
+        for location in LOCATIONS:
+            overall[location] += team[location]
+        teams[key] = team
+    return overall, teams
+
+
+class LocationCounts:
+    """Explicit location counts at one version of the work-location and user files."""
+    
+    __slots__ = ("locations_stamp", "users_stamp", "by_date")
+    
+    def __init__(self, locations_stamp: Tuple, users_stamp: Tuple, by_date: Dict[str, Dict[str, Dict[str, int]]]):
+        self.locations_stamp = locations_stamp
+        self.users_stamp = users_stamp
+        self.by_date = by_date
+
+    def apply(self, date: str, team_id: Optional[int], old_location: Optional[str], new_location: str) -> None:
+        """Move one user's entry for a date between locations."""
+        # Readers may hold the per-date map across an await: replace it, never mutate
+        teams = dict(self.by_date.get(date, {}))
+        team = dict(teams.get(team_key(team_id)) or {location: 0 for location in LOCATIONS})
+        if old_location is not None:
+            team[old_location] -= 1
+        team[new_location] += 1
+        teams[team_key(team_id)] = team
+        self.by_date[date] = teams
+
+
+class WorkLocations:
+    """
+    Office/WFH location per (user_id, date), stored in work_locations.json.
+    
+    Only explicitly set locations are stored; everyone else is at the default
+    location for the day (WFH inside a company-wide WFH period, otherwise
+    Office). Per-date, per-team counts of the stored entries are kept in
+    memory and patched on each local write, so a headcount's location split
+    costs one lookup per team. A write from another process or a change to
+    users.json triggers one rebuild.
+    """
+    
+    def __init__(self, storage: AsyncJSONStorage, work_calendar: WorkCalendar):
+        self.storage = storage
+        self.work_calendar = work_calendar
+        self._counts: Optional[LocationCounts] = None
+
+    async def index(self) -> Dict[Tuple[int, str], Dict]:
+        """Get the (user_id, date) -> record index at the current version."""
+        snapshot = await self.storage.snapshot(WORK_LOCATIONS_FILE)
+        return snapshot.derive("by_user_date", build_location_index)
+
+    async def default_location(self, date: str) -> str:
+        """The location of users who did not set one for a date."""
+        view = await self.work_calendar.view()
+        return WorkLocation.WFH.value if view.is_wfh(date) else WorkLocation.OFFICE.value
+
+    async def get_location(self, user_id: int, date: str) -> Tuple[str, bool]:
+        """Get a user's location for a date and whether it is the default."""
+        record = (await self.index()).get((user_id, date))
+        if record is not None:
+            return record["location"], False
+        return await self.default_location(date), True
+
+    async def counts_by_date(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Explicit location counts per date and team key (do not mutate the result)."""
+        locations = await self.storage.snapshot(WORK_LOCATIONS_FILE)
+        users = await self.storage.snapshot("users.json")
+        current = self._counts
+        if current is None or current.locations_stamp != locations.stamp or current.users_stamp != users.stamp:
+            team_by_user = {user_dict.get("id"): user_dict.get("team_id") for user_dict in users.records}
+            current = LocationCounts(
+                locations.stamp,
+                users.stamp,
+                build_location_counts(locations.records, team_by_user)
+            )
+            self._counts = current
+        return current.by_date
+
+    async def counts(self, date: str) -> Dict[str, Dict[str, int]]:
+        """Explicit location counts for a date, per team key."""
+        return (await self.counts_by_date()).get(date, {})
+
+    async def split(self, date: str, team_sizes: Dict[str, int]) -> Tuple[Dict[str, int], Dict[str, Dict[str, int]]]:
+        """Get the Office/WFH split for a date, overall and per team key."""
+        return split_by_location(team_sizes, await self.counts(date), await self.default_location(date))
+
+    async def set_location(self, user_id: int, team_id: Optional[int], date: str, location: str) -> Dict[str, Any]:
+        """Set a user's location for a date and return the stored record."""
+        def apply_update(location_data):
+            for i, record in enumerate(location_data):
+                if record.get("user_id") == user_id and record.get("date") == date:
+                    # Records are shared with published snapshots: replace, never mutate
+                    location_data[i] = {**record, "location": location}
+                    return record.get("location"), location_data[i]
+            
+            new_record = {"user_id": user_id, "date": date, "location": location}
+            location_data.append(new_record)
+            return None, new_record
+        
+        (old_location, record), before, after = await self.storage.update_versioned(WORK_LOCATIONS_FILE, apply_update)
+        self._apply_change(before, after, date, team_id, old_location, location)
+        return record
+
+    def _apply_change(
+        self,
+        before: Snapshot,
+        after: Snapshot,
+        date: str,
+        team_id: Optional[int],
+        old_location: Optional[str],
+        new_location: str
+    ) -> None:
+        current = self._counts
+        # Counts built from another version are rebuilt on the next read instead
+        if current is None or current.locations_stamp != before.stamp:
+            return
+        current.apply(date, team_id, old_location, new_location)
+        current.locations_stamp = after.stamp
+
+
+_shared_work_locations: Optional[WorkLocations] = None
+
+
+def get_work_locations() -> WorkLocations:
+    """Get the process-wide WorkLocations instance."""
+    global _shared_work_locations
+    if _shared_work_locations is None:
+        _shared_work_locations = WorkLocations(get_async_storage(), get_work_calendar())
+    return _shared_work_locations
@@ -1,17 +1,28 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from app.auth import (
     hash_password,
     verify_password,
     create_access_token,
+    token_claims,
     get_current_user,
     require_admin,
+    preload_backends,
     Token
 )
-from app.db import JSONStorage
+from app.admission import admit_write
+from app.db import get_async_storage
+from app.repository import get_repository
+from app.headcount_snapshots import get_headcount_snapshots
+from app.response_cache import get_response_cache
+from app.shared_dataset import get_shared_dataset_loader, get_shared_dataset_reader
+from app.user_search import get_user_directory
 from app.models import User, RegisterRequest, UserResponse
-from app.routers import meals, admin, headcount
+from app.routers import meals, admin, headcount, work_calendar, dashboard
 from app.config import (
     API_TITLE,
     API_DESCRIPTION,
@@ -21,18 +32,56 @@ from app.config import (
     CORS_ALLOW_METHODS,
     CORS_ALLOW_HEADERS,
     UVICORN_HOST,
-    UVICORN_PORT
+    UVICORN_PORT,
+    WARMUP_ON_STARTUP,
+    ROLLOVER_JOB_ENABLED,
+    SHARED_DATASET_ENABLED
 )
 
 
+storage = get_async_storage()
+repository = get_repository()
+user_directory = get_user_directory()
+response_cache = get_response_cache()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP_ON_STARTUP:
+        preload_backends()
+        await repository.warm_up()
+        await user_directory.search_index()
+    
+    rollover_task = None
+    if ROLLOVER_JOB_ENABLED:
+        rollover_task = asyncio.create_task(get_headcount_snapshots().run_rollover_job())
+    
+    # One worker per data directory becomes the shared dataset loader
+    loader_task = None
+    if SHARED_DATASET_ENABLED:
+        loader = get_shared_dataset_loader()
+        if loader.try_acquire():
+            loader_task = asyncio.create_task(loader.run())
+    
+    yield
+    
+    if rollover_task is not None:
+        rollover_task.cancel()
+    if loader_task is not None:
+        loader_task.cancel()
+    reader = get_shared_dataset_reader()
+    if reader is not None:
+        reader.close()
+    await storage.flush()
+
+
 app = FastAPI(
     title=API_TITLE,
     description=API_DESCRIPTION,
-    version=API_VERSION
+    version=API_VERSION,
+    lifespan=lifespan
 )
 
-storage = JSONStorage()
-
 class LoginRequest(BaseModel):
     username: str
     password: str
@@ -48,6 +97,8 @@ app.add_middleware(
 app.include_router(meals.router)
 app.include_router(admin.router)
 app.include_router(headcount.router)
+app.include_router(work_calendar.router)
+app.include_router(dashboard.router)
 
 
 @app.get("/")
@@ -66,30 +117,23 @@ async def root():
 
 @app.post("/api/auth/login", response_model=Token)
 async def login(request: LoginRequest):
-    users_data = storage.read_users()
-    user_dict = None
-    for user_data in users_data:
-        if user_data.get("username") == request.username:
-            user_dict = user_data
-            break
+    user = await repository.get_user_by_username(request.username)
     
-    if user_dict is None:
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = User(**user_dict)
-    
-    if not verify_password(request.password, user.password):
+    if not await run_in_threadpool(verify_password, request.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = create_access_token(data={"sub": user.username})
+    access_token = create_access_token(data=token_claims(user))
     
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -102,43 +146,48 @@ async def logout(current_user: User = Depends(get_current_user)):
     }
 
 
-@app.post("/api/auth/register", status_code=status.HTTP_201_CREATED)
+@app.post("/api/auth/register", status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_admin), Depends(admit_write)])
 async def register(request: RegisterRequest, current_user: User = Depends(require_admin)):
 
-    users_data = storage.read_users()
-    
-    request_username_lower = request.username.lower()
-    for user_data in users_data:
-        if user_data.get("username", "").lower() == request_username_lower:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Username '{request.username}' already exists"
-            )
-    
-    request_email_lower = request.email.lower()
-    for user_data in users_data:
-        existing_email = user_data.get("email", "")
-        if existing_email.lower() == request_email_lower:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Email '{request.email}' already exists"
-            )
-    
-    new_id = len(users_data) + 1 if users_data else 1
-    
-    new_user_dict = {
-        "id": new_id,
-        "username": request.username,
-        "password": hash_password(request.password),
-        "name": request.name,
-        "email": request.email,
-        "role": request.role,
-        "team_id": request.team_id
-    }
+    # Hash outside the transaction so the users.json lock is held only briefly
+    hashed_password = await run_in_threadpool(hash_password, request.password)
     
-    users_data.append(new_user_dict)
+    def add_user(users_data):
+        request_username_lower = request.username.lower()
+        for user_data in users_data:
+            if user_data.get("username", "").lower() == request_username_lower:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Username '{request.username}' already exists"
+                )
+        
+        request_email_lower = request.email.lower()
+        for user_data in users_data:
+            existing_email = user_data.get("email", "")
+            if existing_email.lower() == request_email_lower:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Email '{request.email}' already exists"
+                )
+        
+        new_id = len(users_data) + 1 if users_data else 1
+        
+        new_user_dict = repository.validate_user({
+            "id": new_id,
+            "username": request.username,
+            "password": hashed_password,
+            "name": request.name,
+            "email": request.email,
+            "role": request.role,
+            "team_id": request.team_id
+        })
+        
+        users_data.append(new_user_dict)
+        return new_user_dict
     
-    storage.write_users(users_data)
+    new_user_dict, before, after = await storage.update_versioned("users.json", add_user)
+    user_directory.users_added(before, after, [new_user_dict])
+    response_cache.write_applied("users.json", before, after, team_ids={new_user_dict.get("team_id")})
     
     return {
         "message": f"{request.username} is registered successfully",
@@ -0,0 +1,78 @@
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.db import JSONStorage, DURABILITY_MODES
+
+NUM_RECORDS = 2_000
+NUM_WRITES = 50
+
+
+def generate_participation(count):
+    meal_types = ["Lunch", "Snacks", "Iftar", "EventDinner", "OptionalDinner"]
+    return [
+        {
+            "user_id": i,
+            "date": "2026-02-17",
+            "meals": {meal_type: (i + j) % 3 != 0 for j, meal_type in enumerate(meal_types)}
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def benchmark_mode(durability, data, num_writes):
+    """Time individual writes with the given durability mode."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        storage = JSONStorage(temp_dir, durability=durability)
+        storage.write("participation.json", data)
+        
+        latencies = []
+        for _ in range(num_writes):
+            start = time.perf_counter()
+            storage.write("participation.json", data)
+            latencies.append(time.perf_counter() - start)
+        
+        flush_start = time.perf_counter()
+        storage.flush()
+        flush_time = time.perf_counter() - flush_start
+    
+    latencies.sort()
+    return {
+        "mean": statistics.mean(latencies),
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "flush": flush_time,
+    }
+
+
+def main():
+    """
+    Compare write latency of each durability mode.
+    
+    Usage: python benchmark_durability.py [NUM_RECORDS] [NUM_WRITES]
+    Run it on the disk the data directory lives on; tempfile uses the system
+    temp directory, so set TMPDIR accordingly.
+    """
+    num_records = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_RECORDS
+    num_writes = int(sys.argv[2]) if len(sys.argv) > 2 else NUM_WRITES
+    data = generate_participation(num_records)
+    
+    print(f"Durability benchmark ({num_records} records, {num_writes} writes, dir: {tempfile.gettempdir()})")
+    print("-" * 70)
+    print(f"  {'mode':<8} {'mean':>10} {'p50':>10} {'p99':>10} {'final flush':>14}")
+    for durability in DURABILITY_MODES:
+        result = benchmark_mode(durability, data, num_writes)
+        print(
+            f"  {durability:<8} "
+            f"{result['mean'] * 1000:8.2f}ms "
+            f"{result['p50'] * 1000:8.2f}ms "
+            f"{result['p99'] * 1000:8.2f}ms "
+            f"{result['flush'] * 1000:12.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
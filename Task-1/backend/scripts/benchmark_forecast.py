@@ -0,0 +1,63 @@
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("SECRET_KEY", "benchmark-only-secret")
+
+from app.analytics import analyze, build_participation_cube, join_cubes
+from app.headcount_snapshots import MEAL_TYPES
+from app.intervals import date_range, from_ordinal, to_ordinal
+
+NUM_USERS = 10_000
+HISTORY_DAYS = 730
+HORIZON = 7
+# Share of user-days with a stored record (the rest use the default opt-in)
+RECORD_SHARE = 0.3
+TODAY = "2026-02-17"
+
+
+def generate_data(num_users, history_days):
+    rng = random.Random(42)
+    users = [{"id": i, "team_id": (i % 20) + 1} for i in range(1, num_users + 1)]
+    start = from_ordinal(to_ordinal(TODAY) - history_days + 1)
+    end = from_ordinal(to_ordinal(TODAY) + HORIZON)
+    by_date = {}
+    for date in date_range(start, end):
+        by_date[date] = {
+            user["id"]: {"meals": {meal_type: rng.random() > 0.2 for meal_type in MEAL_TYPES}}
+            for user in users
+            if rng.random() < RECORD_SHARE
+        }
+    return users, by_date, start, end
+
+
+def main():
+    num_users = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_USERS
+    history_days = int(sys.argv[2]) if len(sys.argv) > 2 else HISTORY_DAYS
+    users, by_date, start, end = generate_data(num_users, history_days)
+    records = sum(len(day) for day in by_date.values())
+    
+    yesterday = from_ordinal(to_ordinal(TODAY) - 1)
+    
+    started = time.perf_counter()
+    history = build_participation_cube(users, by_date, {}, start, yesterday)
+    history_built = time.perf_counter()
+    upcoming = build_participation_cube(users, by_date, {}, TODAY, end)
+    cube = join_cubes(history, upcoming)
+    upcoming_built = time.perf_counter()
+    result = analyze(cube, TODAY)
+    analyzed = time.perf_counter()
+    
+    print(f"Forecast benchmark ({num_users} users x {history_days} days, {records} stored records)")
+    print("-" * 60)
+    print(f"  Past days cube (once per day):       {(history_built - started) * 1000:8.1f} ms")
+    print(f"  Today + horizon cube, join:          {(upcoming_built - history_built) * 1000:8.1f} ms")
+    print(f"  Rates, seasonality and forecast:     {(analyzed - upcoming_built) * 1000:8.1f} ms")
+    print(f"  Lunch forecast for {result['forecast'][0]['date']}:      {result['forecast'][0]['meals']['Lunch']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("SECRET_KEY", "benchmark-only-secret")
+
+from app.db import AsyncJSONStorage, JSONStorage
+from app.metrics import Metrics
+from app.participation_writes import ParticipationWriter
+from app.response_cache import ResponseCache
+
+NUM_RECORDS = 20_000
+WRITER_COUNTS = [1, 4, 16, 64]
+UPDATES_PER_WRITER = 20
+DATE = "2026-03-02"
+
+
+def generate_participation(count):
+    return [
+        {"user_id": i, "date": f"2026-02-{(i % 28) + 1:02d}", "meals": {"Lunch": True, "Snacks": i % 2 == 0}}
+        for i in range(1, count + 1)
+    ]
+
+
+async def run_writers(writer, num_writers):
+    """Each writer updates its own user repeatedly, as concurrent employees would."""
+
+    async def one_writer(user_id):
+        for i in range(UPDATES_PER_WRITER):
+            await writer.update(user_id, None, DATE, {"Lunch": i % 2 == 0})
+    
+    await asyncio.gather(*(one_writer(user_id) for user_id in range(1, num_writers + 1)))
+
+
+def main():
+    num_records = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_RECORDS
+    
+    print(f"Participation write benchmark ({num_records} stored records)")
+    print("-" * 60)
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = JSONStorage(data_dir)
+        storage.write_participation(generate_participation(num_records))
+        async_storage = AsyncJSONStorage(storage)
+        
+        for num_writers in WRITER_COUNTS:
+            metrics = Metrics()
+            writer = ParticipationWriter(async_storage, ResponseCache(async_storage, metrics), metrics)
+            start = time.perf_counter()
+            asyncio.run(run_writers(writer, num_writers))
+            elapsed = time.perf_counter() - start
+            updates = num_writers * UPDATES_PER_WRITER
+            batches = metrics.get("participation_writes.batches")
+            print(
+                f"  {num_writers:3d} writers: {updates / elapsed:8.0f} updates/s"
+                f"  ({batches} file writes for {updates} updates)"
+            )
+
+
+if __name__ == "__main__":
+    main()
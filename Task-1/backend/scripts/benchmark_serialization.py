@@ -0,0 +1,103 @@
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("SECRET_KEY", "benchmark-only-secret")
+
+from pydantic import TypeAdapter
+
+from app.models import User, DEFAULT_PARTICIPATION_MEALS
+from app.routers.admin import UserParticipation
+from app.serialization import FastJSONResponse, user_participation_row
+
+NUM_ROWS = 10_000
+REPEATS = 5
+DATE = "2026-02-17"
+
+
+def generate_users(count):
+    return [
+        {
+            "id": i,
+            "username": f"employee{i}",
+            "password": "$2b$12$benchmark_hashed_password_placeholder",
+            "name": f"Employee {i}",
+            "email": f"employee{i}@company.com",
+            "role": "Employee",
+            "team_id": (i % 20) + 1,
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def generate_participation(users):
+    return {
+        user["id"]: {"Lunch": user["id"] % 3 != 0, "Snacks": True, "Iftar": False, "EventDinner": True, "OptionalDinner": False}
+        for user in users
+        if user["id"] % 2 == 0
+    }
+
+
+def legacy_path(users, participation):
+    """Model per row, response_model validation, then stdlib JSON encoding."""
+    result = []
+    for user_dict in users:
+        user = User(**user_dict)
+        meals = participation.get(user.id, DEFAULT_PARTICIPATION_MEALS)
+        result.append(UserParticipation(
+            user_id=user.id,
+            username=user.username,
+            name=user.name,
+            email=user.email,
+            role=user.role,
+            team_id=user.team_id,
+            date=DATE,
+            meals=meals
+        ))
+    adapter = TypeAdapter(List[UserParticipation])
+    validated = adapter.validate_python([row.model_dump() for row in result])
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(users, participation):
+    """Plain rows from trusted storage, encoded with orjson."""
+    rows = [
+        user_participation_row(user_dict, DATE, participation.get(user_dict["id"], DEFAULT_PARTICIPATION_MEALS))
+        for user_dict in users
+    ]
+    return FastJSONResponse(rows).body
+
+
+def time_it(func, *args):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_ROWS
+    users = generate_users(num_rows)
+    participation = generate_participation(users)
+    
+    assert json.loads(legacy_path(users, participation)) == json.loads(fast_path(users, participation))
+    
+    legacy = time_it(legacy_path, users, participation)
+    fast = time_it(fast_path, users, participation)
+    
+    print(f"Serialization benchmark ({num_rows} rows, best of {REPEATS})")
+    print("-" * 50)
+    print(f"  Pydantic + response_model + json: {legacy * 1000:8.1f} ms")
+    print(f"  Trusted rows + orjson:            {fast * 1000:8.1f} ms")
+    print(f"  Speedup:                          {legacy / fast:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.db import JSONStorage
+from app.snapshot_sidecar import sidecar_path
+
+NUM_RECORDS = 200_000
+FILENAME = "participation.json"
+
+
+def generate_participation(count):
+    meal_types = ["Lunch", "Snacks", "Iftar", "EventDinner", "OptionalDinner"]
+    return [
+        {
+            "user_id": i % 5_000 + 1,
+            "date": f"2026-{(i // 5_000) % 12 + 1:02d}-{(i // 60_000) % 28 + 1:02d}",
+            "meals": {meal_type: (i + j) % 3 != 0 for j, meal_type in enumerate(meal_types)},
+            "version": i % 7,
+        }
+        for i in range(count)
+    ]
+
+
+def cold_load(data_dir, sidecar_min_bytes):
+    """Time a fresh process's first snapshot of the file (no published snapshot yet)."""
+    storage = JSONStorage(data_dir, sidecar_min_bytes=sidecar_min_bytes)
+    start = time.perf_counter()
+    snapshot = storage.snapshot(FILENAME)
+    return time.perf_counter() - start, len(snapshot.records)
+
+
+def main():
+    """
+    Compare cold snapshot loads from the JSON and from its binary sidecar.
+    
+    Usage: python benchmark_snapshot_load.py [NUM_RECORDS]
+    """
+    num_records = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_RECORDS
+    
+    with tempfile.TemporaryDirectory() as data_dir:
+        writer = JSONStorage(data_dir, sidecar_min_bytes=0)
+        start = time.perf_counter()
+        writer.write_participation(generate_participation(num_records))
+        write_time = time.perf_counter() - start
+        start = time.perf_counter()
+        writer.refresh_sidecars()
+        sidecar_write_time = time.perf_counter() - start
+        json_size = os.path.getsize(writer.get_file_path(FILENAME))
+        sidecar_size = sidecar_path(Path(writer.get_file_path(FILENAME))).stat().st_size
+        
+        print(f"Snapshot load benchmark ({num_records} records)")
+        print("-" * 60)
+        print(f"  JSON:    {json_size / 1e6:8.1f} MB")
+        print(f"  sidecar: {sidecar_size / 1e6:8.1f} MB  (JSON write: {write_time * 1000:.0f} ms, sidecar refresh: {sidecar_write_time * 1000:.0f} ms)")
+        
+        json_time, count = cold_load(data_dir, None)
+        sidecar_time, sidecar_count = cold_load(data_dir, 0)
+        assert count == sidecar_count == num_records
+        print(f"  parse JSON:   {json_time * 1000:8.1f} ms")
+        print(f"  load sidecar: {sidecar_time * 1000:8.1f} ms  ({json_time / sidecar_time:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.db import JSONStorage
+from app.storage_formats import STORAGE_FORMATS
+
+NUM_RECORDS = 200_000
+NUM_ROUNDS = 3
+FILENAME = "participation.json"
+
+
+def generate_participation(count):
+    meal_types = ["Lunch", "Snacks", "Iftar", "EventDinner", "OptionalDinner"]
+    return [
+        {
+            "user_id": i % 5_000 + 1,
+            "date": f"2026-{(i // 5_000) % 12 + 1:02d}-{(i // 60_000) % 28 + 1:02d}",
+            "meals": {meal_type: (i + j) % 3 != 0 for j, meal_type in enumerate(meal_types)},
+            "version": i % 7,
+        }
+        for i in range(count)
+    ]
+
+
+def best_of(rounds, func):
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def benchmark_format(file_format, data, rounds):
+    with tempfile.TemporaryDirectory() as data_dir:
+        storage = JSONStorage(data_dir, file_format=file_format, sidecar_min_bytes=None)
+        write_time = best_of(rounds, lambda: storage.write(FILENAME, data))
+        size = os.path.getsize(storage.get_file_path(FILENAME))
+        
+        tracemalloc.start()
+        storage.write(FILENAME, data)
+        write_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        
+        # A fresh storage has no published snapshot: every load parses the file
+        read_time = best_of(rounds, lambda: JSONStorage(data_dir, sidecar_min_bytes=None).snapshot(FILENAME))
+        assert list(JSONStorage(data_dir, sidecar_min_bytes=None).snapshot(FILENAME).records) == data
+    return size, write_time, write_peak, read_time
+
+
+def main():
+    """
+    Compare file size, write time, write memory and parse time of each storage format.
+    
+    Usage: python benchmark_storage_formats.py [NUM_RECORDS] [NUM_ROUNDS]
+    """
+    num_records = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_RECORDS
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else NUM_ROUNDS
+    data = generate_participation(num_records)
+    
+    print(f"Storage format benchmark ({num_records} participation records, best of {rounds})")
+    print("-" * 72)
+    print(f"  {'format':<9} {'size':>10} {'write':>10} {'write peak mem':>16} {'parse':>10}")
+    for file_format in STORAGE_FORMATS:
+        size, write_time, write_peak, read_time = benchmark_format(file_format, data, rounds)
+        print(
+            f"  {file_format:<9} "
+            f"{size / 1e6:8.1f}MB "
+            f"{write_time * 1000:8.0f}ms "
+            f"{write_peak / 1e6:14.1f}MB "
+            f"{read_time * 1000:8.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("SECRET_KEY", "benchmark-only-secret")
+
+from app.user_search import UserSearchIndex
+
+NUM_USERS = 50_000
+QUERIES = ["e", "emp", "employee4", "employee4999", "smith", "employee12@", "zzz"]
+REPEATS = 1_000
+FIRST_NAMES = ["Abdur", "Nusrat", "Tanvir", "Farhana", "Rafiq", "Sadia", "Imran", "Mitu"]
+LAST_NAMES = ["Rahman", "Hossain", "Islam", "Ahmed", "Smith", "Chowdhury", "Khan", "Akter"]
+
+
+def generate_users(count):
+    return [
+        {
+            "id": i,
+            "username": f"employee{i}",
+            "name": f"{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[(i // 8) % len(LAST_NAMES)]}",
+            "email": f"employee{i}@company.com",
+            "role": "Employee",
+            "team_id": (i % 20) + 1,
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def main():
+    num_users = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_USERS
+    users = generate_users(num_users)
+    
+    start = time.perf_counter()
+    index = UserSearchIndex((0,), users)
+    build = time.perf_counter() - start
+    
+    print(f"User search benchmark ({num_users} users, {len(index.entries)} terms)")
+    print("-" * 60)
+    print(f"  Index build:                        {build * 1000:8.1f} ms")
+    
+    for query in QUERIES:
+        for scoped in (False, True):
+            start = time.perf_counter()
+            for _ in range(REPEATS):
+                index.search(query, 10, team_id=1, scoped=scoped)
+            per_query = (time.perf_counter() - start) / REPEATS
+            label = f"{query!r}{' (team)' if scoped else ''}"
+            print(f"  {label:<34} {per_query * 1_000_000:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+DEFAULT_BUDGET_SECONDS = 1.0
+
+# Runs in a fresh interpreter: import the app and run its start-up (lifespan)
+# phase, which includes the optional warm-up.
+STARTUP_PROBE = """
+import time
+start = time.perf_counter()
+import asyncio
+import main
+
+async def start_app():
+    async with main.app.router.lifespan_context(main.app):
+        pass
+
+asyncio.run(start_app())
+print(time.perf_counter() - start)
+"""
+
+
+def measure_startup(warm_up: bool) -> float:
+    """Measure import-to-ready time of the API in a fresh interpreter."""
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "startup-check-secret")
+    env["MHP_WARMUP_ON_STARTUP"] = "true" if warm_up else "false"
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_PROBE],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        sys.exit(1)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def print_import_profile(limit: int = 15) -> None:
+    """Print the slowest imports of main.py (cumulative, -X importtime)."""
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "startup-check-secret")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        rows.append((int(cumulative), name.strip()))
+    
+    print("Slowest imports (cumulative):")
+    for cumulative, name in sorted(rows, reverse=True)[:limit]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+    print()
+
+
+def main():
+    """
+    Fail (exit code 1) if import-to-ready time exceeds the budget.
+    
+    Usage: python check_startup_time.py [BUDGET_SECONDS] [--profile]
+    """
+    args = [arg for arg in sys.argv[1:] if arg != "--profile"]
+    budget = float(args[0]) if args else DEFAULT_BUDGET_SECONDS
+    
+    if "--profile" in sys.argv:
+        print_import_profile()
+    
+    failed = False
+    for warm_up in (False, True):
+        elapsed = measure_startup(warm_up)
+        label = "with warm-up" if warm_up else "without warm-up"
+        status = "OK" if elapsed <= budget else "OVER BUDGET"
+        print(f"Import-to-ready {label}: {elapsed * 1000:.1f} ms (budget {budget * 1000:.0f} ms) {status}")
+        failed = failed or elapsed > budget
+    
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db import JSONStorage
+from app.storage_formats import STORAGE_FORMATS
+
+
+def data_files(data_dir: Path):
+    """The data files in a directory (example files and hidden files are skipped)."""
+    return sorted(
+        path.name for path in data_dir.glob("*.json")
+        if not path.name.startswith(".") and not path.name.endswith(".example.json")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rewrite data files in another storage format (safe while the server runs)."
+    )
+    parser.add_argument("format", choices=STORAGE_FORMATS, help="Target format")
+    parser.add_argument("files", nargs="*", help="Files to convert (default: every data file)")
+    parser.add_argument("--data-dir", default="data", help="Data directory (default: data)")
+    args = parser.parse_args()
+    
+    data_dir = Path(args.data_dir)
+    storage = JSONStorage(str(data_dir), durability="always", file_format=args.format)
+    files = args.files or data_files(data_dir)
+    if not files:
+        print(f"No data files in {data_dir}", file=sys.stderr)
+        sys.exit(1)
+    
+    for filename in files:
+        path = data_dir / filename
+        if not path.exists():
+            print(f"  {filename}: not found, skipped")
+            continue
+        size_before = os.path.getsize(path)
+        # A write under the storage lock: running workers pick up the new version
+        records = storage.update(filename, len)
+        size_after = os.path.getsize(path)
+        print(f"  {filename}: {records} records, {size_before:,} -> {size_after:,} bytes ({args.format})")
+    print("Set MHP_STORAGE_FORMAT to keep writing this format.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
-import json
 import sys
 from pathlib import Path
 from typing import Dict, List, Any
 import bcrypt
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from app.db import JSONStorage
+
 
 def get_next_user_id(users: List[Dict[str, Any]]) -> int:
     """Get next available user ID."""
@@ -156,46 +158,38 @@ def main():
     else:
         username, password, name, email = get_input_from_user()
     
-    users_file = Path(__file__).parent.parent / "data" / "users.json"
-    
-    if not users_file.exists():
-        print(f"Error: Users file not found at {users_file}")
-        sys.exit(1)
-    
-    try:
-        with open(users_file, 'r', encoding='utf-8') as f:
-            users = json.load(f)
-    except json.JSONDecodeError as e:
-        print(f"Error: Failed to parse users.json: {e}")
-        sys.exit(1)
-    except Exception as e:
-        print(f"Error: Failed to read users.json: {e}")
-        sys.exit(1)
-    
-    if username_exists(users, username):
-        print(f"Error: Username '{username}' already exists in system.")
-        print(f"Existing users with similar names:")
-        for user in users:
-            if username.lower() in user.get("username", "").lower():
-                print(f"  - {user.get('username')} (ID: {user.get('id')})")
-        sys.exit(1)
+    data_dir = Path(__file__).parent.parent / "data"
     
-    if email_exists(users, email):
-        print(f"Error: Email '{email}' already exists in system.")
-        print(f"Existing users with this email:")
-        for user in users:
-            if email.lower() == user.get("email", "").lower():
-                print(f"  - {user.get('name')} (ID: {user.get('id')})")
+    if not (data_dir / "users.json").exists():
+        print(f"Error: Users file not found at {data_dir / 'users.json'}")
         sys.exit(1)
     
     new_user = create_admin_user(username, password, name, email)
-    new_user["id"] = get_next_user_id(users)
     
-    users.append(new_user)
+    def add_admin(users):
+        if username_exists(users, username):
+            print(f"Error: Username '{username}' already exists in system.")
+            print(f"Existing users with similar names:")
+            for user in users:
+                if username.lower() in user.get("username", "").lower():
+                    print(f"  - {user.get('username')} (ID: {user.get('id')})")
+            sys.exit(1)
+        
+        if email_exists(users, email):
+            print(f"Error: Email '{email}' already exists in system.")
+            print(f"Existing users with this email:")
+            for user in users:
+                if email.lower() == user.get("email", "").lower():
+                    print(f"  - {user.get('name')} (ID: {user.get('id')})")
+            sys.exit(1)
+        
+        new_user["id"] = get_next_user_id(users)
+        users.append(new_user)
     
     try:
-        with open(users_file, 'w', encoding='utf-8') as f:
-            json.dump(users, f, indent=2, ensure_ascii=False)
+        # The server may be running: the storage lock keeps both writers consistent
+        # and the version bump tells its workers users.json changed
+        JSONStorage(str(data_dir), durability="always").update("users.json", add_admin)
         print(f"Successfully created admin user!")
         print()
         print(f"User Details:")
@@ -210,7 +204,7 @@ def main():
         print(f"  Username: {new_user['username']}")
         print(f"  Password: {password}")
     except Exception as e:
-        print(f"Error: Failed to write to users.json: {e}")
+        print(f"Error: Failed to update users.json: {e}")
         sys.exit(1)
 
 
@@ -0,0 +1,45 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db import JSONStorage
+from app.user_import import IMPORT_FORMATS, UserImport, UserImportError, parse_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Register many users at once from a CSV or JSON file (writes users.json once)."
+    )
+    parser.add_argument("file", help="CSV (header: username,password,name,email,role,team_id) or JSON file")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="Input format (default: from the file extension)")
+    parser.add_argument("--data-dir", default="data", help="Directory holding users.json (default: data)")
+    parser.add_argument("--workers", type=int, default=None, help="Password hashing threads (default: CPU count)")
+    parser.add_argument("--dry-run", action="store_true", help="Only validate the rows")
+    args = parser.parse_args()
+    
+    path = Path(args.file)
+    fmt = args.format or ("csv" if path.suffix.lower() == ".csv" else "json")
+    
+    try:
+        user_import = UserImport(parse_rows(path.read_text(encoding="utf-8-sig"), fmt))
+        # The server may be running: the storage lock keeps both writers consistent
+        storage = JSONStorage(args.data_dir, durability="always")
+        user_import.prepare(storage.read_users_cached())
+    except (OSError, UserImportError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        sys.exit(2)
+    
+    if not args.dry_run:
+        user_import.hash(args.workers)
+        storage.update("users.json", user_import.commit)
+    
+    summary = user_import.summary()
+    print(json.dumps({**summary, "dry_run": args.dry_run}, indent=2))
+    sys.exit(1 if summary["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()